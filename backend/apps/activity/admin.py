@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ActivityLog
+from .models import ActivityArchive, ActivityLog
 
 @admin.register(ActivityLog)
 class ActivityLogAdmin(admin.ModelAdmin):
@@ -49,4 +49,14 @@ class ActivityLogAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         # Only superusers can delete activity logs
-        return request.user.is_superuser
\ No newline at end of file
+        return request.user.is_superuser
+
+
+@admin.register(ActivityArchive)
+class ActivityArchiveAdmin(admin.ModelAdmin):
+    list_display = ['month', 'row_count', 'file_path', 'created_at']
+    readonly_fields = ['month', 'row_count', 'file_path', 'created_at']
+
+    def has_add_permission(self, request):
+        # Archives are created by the archive_activity_logs command
+        return False
@@ -0,0 +1,159 @@
+"""
+Export and read back archived months of activity.
+
+Each archived month is a gzip-compressed JSONL file holding one serialized
+ActivityLog per line (the same shape the API returns) plus an ``audience``
+list of user ids, so archived entries can be access-filtered without the
+live audience table.
+"""
+import gzip
+import heapq
+import json
+import os
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from apps.projects.counters import discount_activity
+
+from .models import ActivityArchive, ActivityLog, ActivityLogAudience
+from .partitions import add_months, drop_partition
+from .serializers import ActivityLogSerializer
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def month_range(month):
+    """Return the [start, end) UTC datetimes covering ``month``, matching the partition bounds"""
+    start = datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(add_months(month, 1), time.min, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def archive_path(directory, month):
+    return os.path.join(directory, f'activity-{month.strftime("%Y-%m")}.jsonl.gz')
+
+
+def _export_rows(month):
+    """Yield the archived representation of every live entry of ``month``"""
+    start, end = month_range(month)
+    entries = ActivityLog.objects.filter(
+        timestamp__gte=start, timestamp__lt=end
+    ).select_related('project', 'client', 'architect', 'user').order_by('timestamp', 'id')
+
+    chunk = []
+    for entry in entries.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(entry)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield from _serialize_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield from _serialize_chunk(chunk)
+
+
+def _serialize_chunk(entries):
+    audience = {}
+    for activity_id, user_id in ActivityLogAudience.objects.filter(
+        activity_id__in=[entry.pk for entry in entries]
+    ).values_list('activity_id', 'user_id'):
+        audience.setdefault(activity_id, []).append(user_id)
+
+    for entry in entries:
+        data = dict(ActivityLogSerializer(entry).data)
+        data['audience'] = sorted(audience.get(entry.pk, []))
+        yield data
+
+
+def archive_month(month, directory):
+    """
+    Export ``month`` to its archive file and remove it from the live table.
+
+    The file is written (and appended to, when the month was archived before)
+    before any rows are removed. On a partitioned table the month's partition
+    is detached and dropped; rows elsewhere are deleted. Returns the number
+    of entries archived.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = archive_path(directory, month)
+    partial_path = f'{path}.partial'
+
+    exported = 0
+    with gzip.open(partial_path, 'wt', encoding='utf-8') as handle:
+        for data in _export_rows(month):
+            handle.write(json.dumps(data, cls=DjangoJSONEncoder))
+            handle.write('\n')
+            exported += 1
+
+    if os.path.exists(path):
+        # gzip members can be concatenated; readers see one stream
+        with open(path, 'ab') as existing, open(partial_path, 'rb') as addition:
+            existing.write(addition.read())
+        os.remove(partial_path)
+    else:
+        os.replace(partial_path, path)
+
+    start, end = month_range(month)
+    with transaction.atomic():
+        archive, created = ActivityArchive.objects.get_or_create(
+            month=month, defaults={'file_path': path, 'row_count': exported}
+        )
+        if not created:
+            archive.row_count += exported
+            archive.file_path = path
+            archive.save(update_fields=['row_count', 'file_path'])
+
+        ActivityLogAudience.objects.filter(
+            timestamp__gte=start, timestamp__lt=end
+        ).delete()
+        discount_activity(ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end))
+        drop_partition(month)
+        ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end).delete()
+    return exported
+
+
+def _visible_rows(archive, user, entity_type, before):
+    """Stream ``(sort_key, entry)`` for the archived entries ``user`` may see"""
+    see_all = user.role in ['admin', 'manager']
+    with gzip.open(archive.file_path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            data = json.loads(line)
+            audience = data.pop('audience', [])
+            if entity_type and data['entity_type'] != entity_type:
+                continue
+            if not (see_all or user.id in audience):
+                continue
+            key = archived_position(data)
+            if before is None or key < before:
+                yield key, data
+
+
+def archived_position(data):
+    """Return the ``(timestamp, id)`` keyset position of an archived entry"""
+    return (parse_datetime(data['timestamp']), data['id'])
+
+
+def read_archived_page(archives, user, entity_type=None, before=None, limit=50):
+    """
+    Return up to ``limit`` archived entries visible to ``user``, newest
+    first, that sort before the ``(timestamp, id)`` position ``before``.
+
+    ``archives`` must be ordered newest month first. Files are streamed and
+    only ``limit`` entries are held at a time; reading stops at the first
+    month that fills the page.
+    """
+    before = tuple(before) if before is not None else None
+    entries = []
+    for archive in archives:
+        if before is not None and month_range(archive.month)[0] > before[0]:
+            continue
+        rows = heapq.nlargest(
+            limit - len(entries),
+            _visible_rows(archive, user, entity_type, before),
+            key=lambda row: row[0],
+        )
+        entries += [data for _, data in rows]
+        if len(entries) >= limit:
+            break
+    return entries
@@ -0,0 +1,83 @@
+"""
+Maintenance of the denormalized activity audience.
+
+Every activity entry is visible to the user who performed it and to the users
+owning the entity it describes: a project's mechanical manager and the user
+accounts of its client and architect, or the user account of the client or
+architect itself. Those users are stored in ``ActivityLogAudience`` so feeds
+never have to join through the ownership chain at read time.
+"""
+from django.apps import apps
+from django.db.models import Q
+
+# Lookups (relative to ActivityLog) of every user who may see an entry
+AUDIENCE_LOOKUPS = (
+    'user_id',
+    'project__mechanical_manager_id',
+    'project__client__user_account_id',
+    'project__architect_designer__user_account_id',
+    'client__user_account_id',
+    'architect__user_account_id',
+)
+
+REBUILD_CHUNK_SIZE = 2000
+
+
+def audience_for(activity_queryset, audience_model=None):
+    """Build (unsaved) audience rows for the entries in ``activity_queryset``"""
+    if audience_model is None:
+        audience_model = apps.get_model('activity', 'ActivityLogAudience')
+
+    rows = []
+    entries = activity_queryset.values_list(
+        'id', 'entity_type', 'timestamp', *AUDIENCE_LOOKUPS
+    )
+    for activity_id, entity_type, timestamp, *user_ids in entries:
+        for user_id in set(user_ids) - {None}:
+            rows.append(audience_model(
+                activity_id=activity_id,
+                user_id=user_id,
+                entity_type=entity_type,
+                timestamp=timestamp,
+            ))
+    return rows
+
+
+def add_audience(activity_ids):
+    """Create audience rows for newly written activity entries"""
+    if not activity_ids:
+        return
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+    ActivityLogAudience = apps.get_model('activity', 'ActivityLogAudience')
+    ActivityLogAudience.objects.bulk_create(
+        audience_for(ActivityLog.objects.filter(pk__in=activity_ids)),
+        ignore_conflicts=True,
+    )
+
+
+def rebuild_audience(activity_queryset):
+    """Recompute the audience of every entry in ``activity_queryset``"""
+    ActivityLogAudience = apps.get_model('activity', 'ActivityLogAudience')
+    ids = list(activity_queryset.values_list('id', flat=True))
+    for start in range(0, len(ids), REBUILD_CHUNK_SIZE):
+        chunk = ids[start:start + REBUILD_CHUNK_SIZE]
+        ActivityLogAudience.objects.filter(activity_id__in=chunk).delete()
+        ActivityLogAudience.objects.bulk_create(
+            audience_for(activity_queryset.model.objects.filter(pk__in=chunk)),
+            ignore_conflicts=True,
+        )
+
+
+def rebuild_project_audience(project):
+    """Rebuild the audience after a project's manager, client or architect changed"""
+    rebuild_audience(project.activity_logs.all())
+
+
+def rebuild_account_audience(client=None, architect=None):
+    """Rebuild the audience after a client or architect user account changed"""
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+    if client is not None:
+        entries = Q(client=client) | Q(project__client=client)
+    else:
+        entries = Q(architect=architect) | Q(project__architect_designer=architect)
+    rebuild_audience(ActivityLog.objects.filter(entries))
@@ -0,0 +1,203 @@
+"""
+Transactional activity log buffering.
+
+Activity rows recorded while saving tracked models are collected in a buffer
+tied to the enclosing ``activity_batch`` block and written with a single
+``bulk_create`` once the transaction commits. Rows therefore only exist for
+changes that were actually committed, and a save touching many fields costs
+one INSERT instead of one per field.
+
+Routine field edits are coalesced at flush time: when the same user edits the
+same field of the same entity again within ``ACTIVITY_COALESCE_WINDOW_SECONDS``
+the previous entry is updated in place (keeping its original ``old_value``
+and ``timestamp``) rather than a new row being inserted. The window counts
+from the entry's first edit, so a field edited steadily still gets a new
+entry every window.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .audience import add_audience
+from .formatting import format_field_value, get_field_verbose_name
+
+_batch_stack = ContextVar('activity_batch_stack', default=())
+
+# Plain field edits that are merged with a recent entry for the same field
+COALESCE_ACTION_TYPES = ('field_updated', 'client_updated', 'architect_updated')
+
+ENTITY_FIELDS = ('project_id', 'client_id', 'architect_id')
+
+
+@contextmanager
+def activity_batch(using=None):
+    """
+    Run the block atomically and buffer the activity it records.
+
+    Nested batches hand their rows to the enclosing batch, so wrapping several
+    saves in one ``activity_batch`` produces a single ``bulk_create``. The
+    buffered rows are flushed via ``transaction.on_commit`` and are discarded
+    together with the transaction (or savepoint) if it rolls back.
+    """
+    stack = _batch_stack.get()
+    parent = stack[-1] if stack else None
+    rows = []
+
+    with transaction.atomic(using=using):
+        token = _batch_stack.set(stack + (rows,))
+        try:
+            yield rows
+        finally:
+            _batch_stack.reset(token)
+
+        if rows:
+            if parent is not None:
+                parent.extend(rows)
+            else:
+                transaction.on_commit(partial(flush_activity, rows), using=using)
+
+
+def record_activity(**fields):
+    """
+    Record an ActivityLog row with the given field values.
+
+    Inside an ``activity_batch`` the row joins the batch; otherwise it is
+    written when the current transaction commits (immediately in autocommit).
+    """
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+    row = ActivityLog(**fields)
+
+    stack = _batch_stack.get()
+    if stack:
+        stack[-1].append(row)
+    else:
+        transaction.on_commit(partial(flush_activity, [row]))
+    return row
+
+
+def flush_activity(rows):
+    """
+    Write buffered ActivityLog rows and their audience.
+
+    Repeated field edits are coalesced into existing entries first; the rest
+    are inserted with one ``bulk_create``.
+    """
+    if not rows:
+        return []
+    # Imported here: apps.projects.models imports this module
+    from apps.projects.counters import count_new_activity
+
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+
+    with transaction.atomic():
+        rows, merged = coalesce_activity(rows)
+        if merged:
+            ActivityLog.objects.bulk_update(
+                merged, ['new_value', 'description', 'ip_address']
+            )
+        created = ActivityLog.objects.bulk_create(rows)
+        add_audience([row.pk for row in created])
+        count_new_activity(created)
+        return created
+
+
+def _coalesce_key(row):
+    """Identify the entity and field an activity row describes"""
+    return (row.entity_type,) + tuple(
+        getattr(row, attname) for attname in ENTITY_FIELDS
+    ) + (row.changed_field,)
+
+
+def _is_coalescible(row):
+    return (
+        row.action_type in COALESCE_ACTION_TYPES
+        and row.changed_field
+        and row.user_id is not None
+    )
+
+
+def coalesce_activity(rows):
+    """
+    Fold repeated edits of the same field into the latest matching entry.
+
+    An edit is folded into the most recent entry for the same entity and field
+    when that entry has the same action and user and falls inside the coalesce
+    window of its first edit; the entry keeps its first ``old_value`` and
+    ``timestamp`` and takes the new value.
+    Previous entries are looked up with one query per flush.
+
+    Returns ``(rows_to_insert, existing_rows_to_update)``.
+    """
+    window = getattr(settings, 'ACTIVITY_COALESCE_WINDOW_SECONDS', 0)
+    candidates = [row for row in rows if _is_coalescible(row)]
+    if not window or not candidates:
+        return rows, []
+
+    cutoff = timezone.now() - timedelta(seconds=window)
+    latest = _latest_entries(candidates, cutoff)
+
+    pending = []
+    merged = {}
+    for row in rows:
+        key = _coalesce_key(row)
+        previous = latest.get(key)
+        if (
+            _is_coalescible(row)
+            and previous is not None
+            and previous.action_type == row.action_type
+            and previous.user_id == row.user_id
+        ):
+            _merge_into(previous, row)
+            if previous.pk is not None:
+                merged[previous.pk] = previous
+            continue
+
+        pending.append(row)
+        if row.changed_field:
+            latest[key] = row
+    return pending, list(merged.values())
+
+
+def _latest_entries(candidates, cutoff):
+    """Return the newest entry inside the window for each candidate's entity and field"""
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+
+    entity_filter = Q()
+    for attname in ENTITY_FIELDS:
+        ids = {getattr(row, attname) for row in candidates} - {None}
+        if ids:
+            entity_filter |= Q(**{f'{attname}__in': ids})
+
+    recent = ActivityLog.objects.filter(
+        entity_filter,
+        timestamp__gte=cutoff,
+        changed_field__in={row.changed_field for row in candidates},
+    ).order_by('-timestamp', '-id')
+
+    wanted = {_coalesce_key(row) for row in candidates}
+    latest = {}
+    for entry in recent:
+        key = _coalesce_key(entry)
+        if key in wanted and key not in latest:
+            latest[key] = entry
+    return latest
+
+
+def _merge_into(previous, row):
+    """Carry the new value of ``row`` over to ``previous``"""
+    model = type(previous)._meta.get_field(previous.entity_type).related_model
+    verbose_name = get_field_verbose_name(model, previous.changed_field)
+
+    previous.new_value = row.new_value
+    previous.description = (
+        f'{verbose_name} changed from "{format_field_value(previous.old_value)}" '
+        f'to "{format_field_value(row.new_value)}"'
+    )
+    previous.ip_address = row.ip_address or previous.ip_address
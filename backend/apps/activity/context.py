@@ -0,0 +1,90 @@
+"""
+Request-scoped activity context.
+
+Holds the request (and optionally an explicit user / IP address) that
+activity signal handlers attribute log entries to. Backed by contextvars so
+lookups are O(1) and work the same under WSGI, ASGI and in Celery tasks that
+set the context explicitly via ``activity_context``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_request = ContextVar('activity_current_request', default=None)
+_current_user = ContextVar('activity_current_user', default=None)
+_current_ip = ContextVar('activity_current_ip', default=None)
+
+
+def get_client_ip(request):
+    """Get the client IP address from request"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
+
+def set_current_request(request):
+    """Publish the request for the current context, returning reset tokens"""
+    return (
+        _current_request.set(request),
+        _current_user.set(None),
+        _current_ip.set(get_client_ip(request) if request is not None else None),
+    )
+
+
+def reset_current_request(tokens):
+    """Restore the context published before ``set_current_request``"""
+    request_token, user_token, ip_token = tokens
+    _current_ip.reset(ip_token)
+    _current_user.reset(user_token)
+    _current_request.reset(request_token)
+
+
+@contextmanager
+def activity_context(user=None, ip_address=None, request=None):
+    """
+    Attribute activity logged inside the block to ``user``/``ip_address``.
+
+    Intended for code that runs outside the request cycle (Celery tasks,
+    management commands)::
+
+        with activity_context(user=sent_by):
+            project.save()
+    """
+    tokens = (
+        _current_request.set(request),
+        _current_user.set(user),
+        _current_ip.set(ip_address),
+    )
+    try:
+        yield
+    finally:
+        reset_current_request(tokens)
+
+
+def get_current_request():
+    """Get the request being handled in the current context, if any"""
+    return _current_request.get()
+
+
+def get_current_user():
+    """
+    Get the user to attribute activity to.
+
+    An explicitly set user wins; otherwise the request's user is read lazily
+    so that authentication performed by DRF inside the view is picked up.
+    Anonymous users are reported as ``None``.
+    """
+    user = _current_user.get()
+    if user is None:
+        request = _current_request.get()
+        user = getattr(request, 'user', None) if request is not None else None
+    if user is not None and not getattr(user, 'is_authenticated', False):
+        return None
+    return user
+
+
+def get_current_ip():
+    """Get the client IP address for the current context, if any"""
+    return _current_ip.get()
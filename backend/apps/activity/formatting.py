@@ -0,0 +1,39 @@
+"""
+Human-readable field names and values for activity log descriptions.
+"""
+
+
+def get_field_verbose_name(model, field_name):
+    """Get the verbose name of a field"""
+    try:
+        return model._meta.get_field(field_name).verbose_name.title()
+    except:
+        return field_name.replace('_', ' ').title()
+
+
+def format_field_value(value):
+    """Format field values for human-readable display"""
+    if value is None:
+        return "None"
+    elif value == "":
+        return "[Empty]"
+    elif hasattr(value, 'all'):  # Many-to-many field
+        return ", ".join(str(item) for item in value.all())
+    elif hasattr(value, '__str__'):
+        return str(value)
+    else:
+        return value
+
+
+def get_action_type_for_field(field_name):
+    """Determine the appropriate action type for different fields"""
+    action_mapping = {
+        'status': 'status_change',
+        'client': 'client_changed',
+        'architect_designer': 'architect_changed',
+        'mechanical_manager': 'manager_changed',
+        'due_date': 'due_date_changed',
+        'rough_in_date': 'inspection_scheduled',
+        'final_inspection_date': 'inspection_scheduled',
+    }
+    return action_mapping.get(field_name, 'field_updated')
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.activity.archive import archive_month, month_range
+from apps.activity.models import ActivityLog
+from apps.activity.partitions import (
+    add_months, ensure_partitions, list_partitions, month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports activity older than the retention horizon to gzip-compressed '
+        'JSONL files, removes it from the live table and creates upcoming '
+        'monthly partitions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=settings.ACTIVITY_RETENTION_MONTHS,
+            help='Number of most recent months to keep in the live table',
+        )
+        parser.add_argument(
+            '--output-dir',
+            default=settings.ACTIVITY_ARCHIVE_DIR,
+            help='Directory the archive files are written to',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Number of future monthly partitions to keep created (PostgreSQL only)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the months that would be archived without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        horizon = add_months(month_start(today), -options['retention_months'])
+        horizon_start, _ = month_range(horizon)
+
+        months = set(
+            month for month in list_partitions() if month < horizon
+        )
+        months.update(
+            month_start(value) for value in ActivityLog.objects.filter(
+                timestamp__lt=horizon_start
+            ).datetimes('timestamp', 'month', tzinfo=horizon_start.tzinfo)
+        )
+
+        if not months:
+            self.stdout.write(f'No activity older than {horizon:%Y-%m} to archive.')
+
+        for month in sorted(months):
+            if options['dry_run']:
+                self.stdout.write(f'Would archive {month:%Y-%m}')
+                continue
+            count = archive_month(month, options['output_dir'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {count} activity entries for {month:%Y-%m}'
+            ))
+
+        if not options['dry_run']:
+            created = ensure_partitions(today, options['months_ahead'])
+            for month in created:
+                self.stdout.write(self.style.SUCCESS(f'Created partition for {month:%Y-%m}'))
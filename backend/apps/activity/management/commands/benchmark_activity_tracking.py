@@ -0,0 +1,119 @@
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+
+from apps.activity.buffer import activity_batch, flush_activity
+from apps.activity.context import activity_context
+from apps.activity.signals import log_project_activity, track_all_project_changes
+from apps.clients.models import Client
+from apps.projects.models import Project
+
+# Free-text project fields that are tracked, edited by every benchmark save
+EDITED_FIELDS = (
+    'project_name', 'current_sub_status', 'current_open_items', 'current_action_items',
+    'due_date_note', 'rough_in_note', 'final_inspection_note', 'address',
+    'legal_address', 'billing_info',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the cost activity tracking adds to a project save: load, '
+        'edit tracked fields and save, with the project activity handlers '
+        'disconnected and connected, called from shallow and deep stacks. '
+        'Runs in a transaction that is rolled back, so nothing is kept.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--saves', type=int, default=200, help='Load, edit and save cycles per run')
+        parser.add_argument(
+            '--fields', type=int, default=len(EDITED_FIELDS),
+            help=f'Tracked fields changed per save (at most {len(EDITED_FIELDS)})',
+        )
+        parser.add_argument(
+            '--stack-depths', default='0,60',
+            help='Comma-separated extra call frames around each save (a DRF request is about 60)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            depths = [int(depth) for depth in options['stack_depths'].split(',')]
+        except ValueError:
+            raise CommandError('--stack-depths must be a comma-separated list of integers')
+        if not 1 <= options['fields'] <= len(EDITED_FIELDS):
+            raise CommandError(f'--fields must be between 1 and {len(EDITED_FIELDS)}')
+        fields = EDITED_FIELDS[:options['fields']]
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username='activity-benchmark@example.com',
+                email='activity-benchmark@example.com',
+                password='benchmark',
+                role='manager',
+            )
+            project = Project.objects.create(
+                project_name='Benchmark',
+                project_type='M',
+                client=Client.objects.create(name='Benchmark Client'),
+                mechanical_manager=user,
+                due_date=timezone.now().date() + timedelta(days=30),
+                address='1 Benchmark Way',
+            )
+            with activity_context(user=user):
+                for tracking in (False, True):
+                    for depth in depths:
+                        elapsed = self.run(project.pk, fields, options['saves'], depth, tracking)
+                        self.stdout.write(
+                            f"tracking {'on ' if tracking else 'off'}, stack depth {depth:>3}: "
+                            f"{options['saves']} saves in {elapsed:.2f}s "
+                            f"({elapsed / options['saves'] * 1000:.2f} ms/save)"
+                        )
+            transaction.set_rollback(True)
+
+    def run(self, project_pk, fields, saves, depth, tracking):
+        counter = 0
+
+        def save():
+            nonlocal counter
+            counter += 1
+            instance = Project.objects.get(pk=project_pk)
+            for field_name in fields:
+                setattr(instance, field_name, f'{field_name} {counter}')
+            # Activity is flushed on commit; flush it here so its writes are timed
+            with activity_batch() as rows:
+                instance.save()
+            flush_activity(rows)
+
+        with project_activity_handlers(tracking):
+            started = time.perf_counter()
+            for _ in range(saves):
+                call_at_depth(depth, save)
+            return time.perf_counter() - started
+
+
+def call_at_depth(depth, func):
+    """Call ``func`` below ``depth`` extra stack frames"""
+    if depth <= 0:
+        return func()
+    return call_at_depth(depth - 1, func)
+
+
+@contextmanager
+def project_activity_handlers(connected):
+    """Disconnect the project activity handlers for the block unless ``connected``"""
+    if connected:
+        yield
+        return
+    pre_save.disconnect(track_all_project_changes, sender=Project)
+    post_save.disconnect(log_project_activity, sender=Project)
+    try:
+        yield
+    finally:
+        pre_save.connect(track_all_project_changes, sender=Project)
+        post_save.connect(log_project_activity, sender=Project)
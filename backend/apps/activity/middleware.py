@@ -1,11 +1,17 @@
+from .context import get_client_ip, reset_current_request, set_current_request
+
+
 class ActivityLogMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Store the current user and IP in the request for signal access
-        response = self.get_response(request)
-        return response
+        # Publish the request so signal handlers can attribute activity to it
+        tokens = set_current_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_request(tokens)
 
     def process_view(self, request, view_func, view_args, view_kwargs):
         # Attach user and IP to the request for signal handlers
@@ -14,9 +20,4 @@ class ActivityLogMiddleware:
         return None
 
     def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return get_client_ip(request)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-16 21:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0003_alter_activitylog_action_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityLogAudience',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('project', 'Project'), ('client', 'Client'), ('architect', 'Architect')], max_length=20)),
+                ('timestamp', models.DateTimeField()),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audience', to='activity.activitylog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_feed', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Activity Log Audience',
+                'verbose_name_plural': 'Activity Log Audience',
+                'indexes': [models.Index(fields=['user', '-timestamp'], name='activity_audience_feed_idx'), models.Index(fields=['user', 'entity_type', '-timestamp'], name='activity_audience_entity_idx')],
+                'constraints': [models.UniqueConstraint(fields=('activity', 'user'), name='unique_activity_audience_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+AUDIENCE_LOOKUPS = (
+    'user_id',
+    'project__mechanical_manager_id',
+    'project__client__user_account_id',
+    'project__architect_designer__user_account_id',
+    'client__user_account_id',
+    'architect__user_account_id',
+)
+
+BATCH_SIZE = 2000
+
+
+def backfill_audience(apps, schema_editor):
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+    ActivityLogAudience = apps.get_model('activity', 'ActivityLogAudience')
+
+    rows = []
+    entries = ActivityLog.objects.values_list(
+        'id', 'entity_type', 'timestamp', *AUDIENCE_LOOKUPS
+    ).order_by('id')
+    for activity_id, entity_type, timestamp, *user_ids in entries.iterator(chunk_size=BATCH_SIZE):
+        for user_id in set(user_ids) - {None}:
+            rows.append(ActivityLogAudience(
+                activity_id=activity_id,
+                user_id=user_id,
+                entity_type=entity_type,
+                timestamp=timestamp,
+            ))
+        if len(rows) >= BATCH_SIZE:
+            ActivityLogAudience.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    if rows:
+        ActivityLogAudience.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("activity", "0004_activitylogaudience"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_audience, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 5.2.8 on 2026-10-16 21:04
+
+import datetime
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Monthly partitions created ahead of time; later months are added by the
+# archive_activity_logs command and anything else lands in the default partition
+PARTITION_MONTHS_AHEAD = 3
+
+
+# Frozen copies of the partition helpers (apps/activity/partitions.py) as
+# they were when this migration was written; migrations must not import
+# app code that may change later.
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(schema_editor, table, oldest, months_ahead):
+    """Create one partition per month from ``oldest`` through ``months_ahead`` months past today"""
+    qn = schema_editor.quote_name
+    month = datetime.date(oldest.year, oldest.month, 1)
+    today = django.utils.timezone.now().date()
+    last = _add_months(datetime.date(today.year, today.month, 1), months_ahead)
+    while month <= last:
+        name = f'{table}_p{month.year:04d}_{month.month:02d}'
+        following = _add_months(month, 1)
+        schema_editor.execute(
+            f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+
+
+def _rebuild_table(schema_editor, model, partitioned):
+    """Recreate the activity table (partitioned or plain) and copy its rows over"""
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    previous = f'{table}_previous'
+    sequence = f'{table}_id_seq_{"partitioned" if partitioned else "plain"}'
+
+    schema_editor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(previous)}')
+    partition_clause = ' PARTITION BY RANGE ("timestamp")' if partitioned else ''
+    schema_editor.execute(
+        f'CREATE TABLE {qn(table)} (LIKE {qn(previous)} INCLUDING DEFAULTS){partition_clause}'
+    )
+    schema_editor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}."id"')
+    schema_editor.execute(
+        f'ALTER TABLE {qn(table)} ALTER COLUMN "id" SET DEFAULT nextval(\'{sequence}\')'
+    )
+    # Unique constraints on a partitioned table must include the partition key
+    primary_key = '"id", "timestamp"' if partitioned else '"id"'
+    schema_editor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY ({primary_key})')
+
+    if partitioned:
+        schema_editor.execute(
+            f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT'
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'SELECT MIN("timestamp") FROM {qn(previous)}')
+            oldest = cursor.fetchone()[0]
+        # The new table is still empty, so partitions can be created directly
+        _create_partitions(
+            schema_editor, table,
+            (oldest or django.utils.timezone.now()).date(),
+            PARTITION_MONTHS_AHEAD,
+        )
+
+    schema_editor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(previous)}')
+    schema_editor.execute(
+        f'SELECT setval(%s, COALESCE(MAX("id"), 1), MAX("id") IS NOT NULL) FROM {qn(previous)}',
+        [sequence],
+    )
+    schema_editor.execute(f'DROP TABLE {qn(previous)}')
+
+    # Indexes and foreign keys went with the previous table
+    for field in model._meta.local_fields:
+        if field.remote_field and field.db_constraint:
+            for sql in schema_editor._field_indexes_sql(model, field):
+                schema_editor.execute(sql)
+            schema_editor.execute(
+                schema_editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s')
+            )
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def partition_activity_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    _rebuild_table(schema_editor, apps.get_model('activity', 'ActivityLog'), partitioned=True)
+
+
+def unpartition_activity_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    _rebuild_table(schema_editor, apps.get_model('activity', 'ActivityLog'), partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0005_backfill_activitylogaudience'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the archived month', unique=True)),
+                ('file_path', models.CharField(max_length=500)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Activity Archive',
+                'verbose_name_plural': 'Activity Archives',
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='activitylogaudience',
+            name='activity',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='audience', to='activity.activitylog'),
+        ),
+        migrations.RunPython(partition_activity_table, unpartition_activity_table),
+    ]
@@ -5,6 +5,13 @@ from apps.clients.models import Client
 from apps.architects.models import Architect
 
 class ActivityLog(models.Model):
+    """
+    Append-only record of changes to projects, clients and architects.
+
+    On PostgreSQL the table is range partitioned by month on ``timestamp``
+    (see ``partitions.py``); months past the retention horizon are exported
+    with the ``archive_activity_logs`` command and recorded as ActivityArchive.
+    """
     ENTITY_TYPES = [
         ('project', 'Project'),
         ('client', 'Client'),
@@ -101,4 +108,65 @@ class ActivityLog(models.Model):
             models.Index(fields=['architect', 'timestamp']),
             models.Index(fields=['action_type', 'timestamp']),
             models.Index(fields=['user', 'timestamp']),
-        ]
\ No newline at end of file
+        ]
+
+class ActivityLogAudience(models.Model):
+    """
+    Denormalized list of users who can see an activity entry.
+
+    Populated when activity is written and rebuilt when project, client or
+    architect ownership changes, so per-user feeds are a single indexed
+    lookup on (user, timestamp) instead of a multi-way join.
+    """
+    # No database constraint: on PostgreSQL the activity table is partitioned
+    # and its id alone is not unique at the database level
+    activity = models.ForeignKey(
+        ActivityLog,
+        on_delete=models.CASCADE,
+        related_name='audience',
+        db_constraint=False
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='activity_feed'
+    )
+    # Copied from the activity entry so feeds can be ordered from this table
+    entity_type = models.CharField(max_length=20, choices=ActivityLog.ENTITY_TYPES)
+    timestamp = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user} - {self.activity_id}"
+
+    class Meta:
+        verbose_name = 'Activity Log Audience'
+        verbose_name_plural = 'Activity Log Audience'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['activity', 'user'],
+                name='unique_activity_audience_user'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='activity_audience_feed_idx'),
+            models.Index(
+                fields=['user', 'entity_type', '-timestamp'],
+                name='activity_audience_entity_idx'
+            ),
+        ]
+
+
+class ActivityArchive(models.Model):
+    """A month of activity exported to a gzip-compressed JSONL file"""
+    month = models.DateField(unique=True, help_text='First day of the archived month')
+    file_path = models.CharField(max_length=500)
+    row_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Activity archive {self.month.strftime('%Y-%m')} ({self.row_count} entries)"
+
+    class Meta:
+        ordering = ['-month']
+        verbose_name = 'Activity Archive'
+        verbose_name_plural = 'Activity Archives'
@@ -0,0 +1,40 @@
+from apps.common.pagination import KeysetPagination
+
+from .archive import archived_position, read_archived_page
+from .models import ActivityLog
+
+
+class ActivityCursorPagination(KeysetPagination):
+    """
+    Opt-in cursor pagination for activity feeds (``?cursor=``).
+
+    Feeds stay unpaginated when no cursor is given. Archived months share
+    the feed's ``(timestamp, id)`` order, so once a page runs out of live
+    entries it is filled from the archive files with the same cursor.
+    """
+    ordering = ('-timestamp', '-id')
+    page_size = 50
+    max_page_size = 200
+
+    def paginate_archives(self, archives, request, user, entity_type=None):
+        """Paginate archived entries only; archived reads are always paginated"""
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.count = None
+        self.last_position = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param, ''), ActivityLog
+        )
+        return self.continue_from_archives([], archives, user, entity_type)
+
+    def continue_from_archives(self, data, archives, user, entity_type=None):
+        """Fill the rest of a page of serialized live entries from ``archives``"""
+        wanted = self.page_size_value + 1 - len(data)
+        entries = read_archived_page(
+            archives, user, entity_type, before=self.last_position, limit=wanted
+        )
+        self.has_next = len(entries) == wanted
+        entries = entries[:wanted - 1]
+        if entries:
+            self.last_position = list(archived_position(entries[-1]))
+        self.next_position = self.last_position if self.has_next else None
+        return list(data) + entries
@@ -0,0 +1,138 @@
+"""
+Monthly range partitioning of the activity log on PostgreSQL.
+
+``activity_activitylog`` is partitioned by ``timestamp`` with one partition
+per calendar month (``activity_activitylog_p2026_01``) plus a default
+partition that catches anything outside the created ranges. Other database
+backends keep a plain table; every helper here is a no-op for them so the
+archive command can fall back to deleting rows.
+"""
+import re
+from datetime import date
+
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+PARENT_TABLE = 'activity_activitylog'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+
+_PARTITION_RE = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def is_partitioned(connection=None):
+    """Return True if the activity table is a partitioned PostgreSQL table"""
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relkind FROM pg_class c "
+            "WHERE c.oid = to_regclass(%s)",
+            [PARENT_TABLE],
+        )
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def month_start(value):
+    """Return the first day of the month containing ``value``"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Return the first day of the month ``count`` months after ``month``"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARENT_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def list_partitions(connection=None):
+    """Return the months that have a dedicated partition, oldest first"""
+    connection = connection or default_connection
+    if not is_partitioned(connection):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [PARENT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month, connection=None):
+    """
+    Create the partition for ``month`` unless it already exists.
+
+    Rows for that month that landed in the default partition are moved into
+    the new partition before it is attached, so this is safe to run for
+    months that already have data. The move and the attach happen in one
+    transaction: if attaching fails the rows stay in the default partition.
+    """
+    connection = connection or default_connection
+    if not is_partitioned(connection) or month in list_partitions(connection):
+        return False
+
+    qn = connection.ops.quote_name
+    name = partition_name(month)
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # Serialises concurrent runs and holds off writes until the moved
+        # rows are attached; the lock is released at commit
+        cursor.execute(f'LOCK TABLE {qn(PARENT_TABLE)} IN SHARE ROW EXCLUSIVE MODE')
+        if month in list_partitions(connection):
+            return False
+        cursor.execute(
+            f'CREATE TABLE {qn(name)} (LIKE {qn(PARENT_TABLE)} INCLUDING DEFAULTS)'
+        )
+        cursor.execute(
+            f'WITH moved AS ('
+            f'DELETE FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *'
+            f') INSERT INTO {qn(name)} SELECT * FROM moved',
+            bounds,
+        )
+        # Partition bounds are DDL and cannot be bound parameters
+        cursor.execute(
+            f'ALTER TABLE {qn(PARENT_TABLE)} ATTACH PARTITION {qn(name)} '
+            f"FOR VALUES FROM ('{bounds[0]}') TO ('{bounds[1]}')"
+        )
+    return True
+
+
+def ensure_partitions(start, months_ahead, connection=None):
+    """Create partitions from ``start`` through ``months_ahead`` months past today"""
+    connection = connection or default_connection
+    created = []
+    month = month_start(start)
+    last = add_months(month_start(timezone.now().date()), months_ahead)
+    while month <= last:
+        if create_partition(month, connection):
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partition(month, connection=None):
+    """Detach and drop the partition for ``month``; returns False if there is none"""
+    connection = connection or default_connection
+    if month not in list_partitions(connection):
+        return False
+
+    qn = connection.ops.quote_name
+    name = partition_name(month)
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(PARENT_TABLE)} DETACH PARTITION {qn(name)}')
+        cursor.execute(f'DROP TABLE {qn(name)}')
+    return True
@@ -1,8 +1,9 @@
 # apps/activity/serializers.py
 from rest_framework import serializers
 from .models import ActivityLog
+from apps.common.fieldsets import SparseFieldsetMixin
 
-class ActivityLogSerializer(serializers.ModelSerializer):
+class ActivityLogSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # User fields
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
@@ -26,6 +27,12 @@ class ActivityLogSerializer(serializers.ModelSerializer):
     # Computed field for entity display name
     entity_display_name = serializers.SerializerMethodField()
 
+    sparse_dependencies = {
+        'action_type_display': ['action_type'],
+        'entity_type_display': ['entity_type'],
+        'entity_display_name': ['entity_type', 'project__job_number', 'client__name', 'architect__name'],
+    }
+
     def get_entity_display_name(self, obj):
         """Get a display name for the associated entity"""
         return obj.get_entity_display_name()
@@ -1,3 +1,678 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.clients.models import Client
+from apps.projects.models import Project
+from .archive import month_range
+from .buffer import activity_batch
+from .context import (
+    activity_context, get_current_ip, get_current_request, get_current_user,
+)
+from .middleware import ActivityLogMiddleware
+from .models import ActivityArchive, ActivityLog, ActivityLogAudience
+from .partitions import (
+    PARENT_TABLE, add_months, create_partition, list_partitions, month_start, partition_name,
+)
+
+User = get_user_model()
+
+
+def _activity_inserts(ctx):
+    """Count INSERT statements into the activity log table"""
+    table = connection.ops.quote_name(ActivityLog._meta.db_table)
+    return sum(
+        1 for query in ctx.captured_queries
+        if query['sql'].startswith(f'INSERT INTO {table}')
+    )
+
+
+class ActivityContextTests(TestCase):
+    """Test the request-scoped activity context"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            username="context@test.com",
+            email="context@test.com",
+            password="testpass123",
+            role="manager",
+        )
+
+    def test_middleware_publishes_request_for_duration_of_call(self):
+        """Test the middleware exposes the request only while it is handled"""
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='10.0.0.1, 10.0.0.2')
+        request.user = self.user
+        seen = {}
+
+        def get_response(req):
+            seen['request'] = get_current_request()
+            seen['user'] = get_current_user()
+            seen['ip'] = get_current_ip()
+            return 'response'
+
+        ActivityLogMiddleware(get_response)(request)
+
+        self.assertIs(seen['request'], request)
+        self.assertEqual(seen['user'], self.user)
+        self.assertEqual(seen['ip'], '10.0.0.1')
+        self.assertIsNone(get_current_request())
+
+    def test_anonymous_user_is_not_attributed(self):
+        """Test anonymous requests do not attribute activity to a user"""
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        seen = {}
+
+        def get_response(req):
+            seen['user'] = get_current_user()
+            return 'response'
+
+        ActivityLogMiddleware(get_response)(request)
+        self.assertIsNone(seen['user'])
+
+    def test_activity_context_attributes_saves(self):
+        """Test explicitly set context is used by signal handlers"""
+        client = Client.objects.create(name="Context Client")
+        project = Project.objects.create(
+            project_name="Context Project",
+            project_type="M",
+            client=client,
+            mechanical_manager=self.user,
+            due_date=timezone.now().date() + timedelta(days=10),
+            address="1 Context Way",
+        )
+
+        with activity_context(user=self.user, ip_address='192.168.1.5'):
+            project.project_name = "Renamed Project"
+            with self.captureOnCommitCallbacks(execute=True):
+                project.save()
+
+        log = ActivityLog.objects.get(project=project, changed_field='project_name')
+        self.assertEqual(log.user, self.user)
+        self.assertEqual(log.ip_address, '192.168.1.5')
+        self.assertIsNone(get_current_user())
+
+
+class FieldTrackerTests(TestCase):
+    """Test load-time snapshots used for change tracking"""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username="tracker@test.com",
+            email="tracker@test.com",
+            password="testpass123",
+            role="manager",
+        )
+        self.client_a = Client.objects.create(name="Tracker Client A")
+        self.client_b = Client.objects.create(name="Tracker Client B")
+        self.project = Project.objects.create(
+            project_name="Tracked Project",
+            project_type="M",
+            client=self.client_a,
+            mechanical_manager=self.manager,
+            due_date=timezone.now().date() + timedelta(days=10),
+            address="1 Tracker Way",
+        )
+
+    def test_changed_fields_uses_snapshot(self):
+        """Test diffing a loaded instance issues no queries"""
+        project = Project.objects.get(pk=self.project.pk)
+        project.status = 'in_progress'
+        project.project_name = 'Tracked Project'  # unchanged value
+
+        with self.assertNumQueries(0):
+            self.assertEqual(project.changed_fields(), ['status'])
+            self.assertEqual(project.get_original_value('status'), 'not_started')
+
+    def test_original_foreign_key_value(self):
+        """Test the original related object is returned for changed foreign keys"""
+        project = Project.objects.select_related('client').get(pk=self.project.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(project.get_original_value('client'), self.client_a)
+
+        project.client = self.client_b
+        self.assertEqual(project.changed_fields(), ['client'])
+        self.assertEqual(project.get_original_value('client'), self.client_a)
+
+    def test_save_rebaselines_snapshot(self):
+        """Test a saved instance diffs against its saved state"""
+        project = Project.objects.get(pk=self.project.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            project.status = 'submitted'
+            project.save()
+        self.assertEqual(project.changed_fields(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.status = 'completed'
+            project.save()
+        self.assertEqual(
+            list(ActivityLog.objects.filter(
+                project=project, changed_field='status'
+            ).order_by('id').values_list('old_value', 'new_value')),
+            [('not_started', 'submitted'), ('submitted', 'completed')],
+        )
+
+    def test_update_does_not_refetch_row(self):
+        """Test saving a loaded instance does not re-select it for tracking"""
+        project = Project.objects.get(pk=self.project.pk)
+        project.current_open_items = 'Ductwork drawings'
+
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                project.save()
+
+        statements = [q['sql'].split()[0].upper() for q in ctx.captured_queries]
+        updates = [q['sql'].split()[1].strip('"') for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        # The project row, then its activity counter once for the flush
+        self.assertEqual(updates, ['projects_project', 'projects_projectcounters'])
+        # Nothing is read while saving; the only SELECT is the audience lookup
+        self.assertNotIn('SELECT', statements[:statements.index('UPDATE')])
+        self.assertEqual(_activity_inserts(ctx), 1)
+
+
+class ActivityBufferTests(TestCase):
+    """Test transactional buffering of activity rows"""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username="buffer@test.com",
+            email="buffer@test.com",
+            password="testpass123",
+            role="manager",
+        )
+        self.client_obj = Client.objects.create(name="Buffer Client")
+        self.project = Project.objects.create(
+            project_name="Buffered Project",
+            project_type="M",
+            client=self.client_obj,
+            mechanical_manager=self.manager,
+            due_date=timezone.now().date() + timedelta(days=10),
+            address="1 Buffer Way",
+        )
+
+    def test_multi_field_update_is_one_insert(self):
+        """Test all field changes of a save are written in one INSERT"""
+        project = Project.objects.get(pk=self.project.pk)
+        project.status = 'in_progress'
+        project.current_sub_status = 'Design'
+        project.current_open_items = 'Load calcs'
+        project.address = '2 Buffer Way'
+
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                project.save()
+
+        self.assertEqual(_activity_inserts(ctx), 1)
+        self.assertEqual(
+            ActivityLog.objects.filter(project=project).exclude(
+                action_type='project_created'
+            ).count(),
+            4,
+        )
+
+    def test_nothing_recorded_before_commit(self):
+        """Test buffered rows are only written once the transaction commits"""
+        project = Project.objects.get(pk=self.project.pk)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            project.status = 'submitted'
+            project.save()
+            self.assertFalse(
+                ActivityLog.objects.filter(changed_field='status').exists()
+            )
+
+        for callback in callbacks:
+            callback()
+        self.assertTrue(ActivityLog.objects.filter(changed_field='status').exists())
+
+    def test_rolled_back_save_records_nothing(self):
+        """Test a failed batch discards the rows it buffered"""
+        project = Project.objects.get(pk=self.project.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with activity_batch():
+                    project.status = 'completed'
+                    project.save()
+                    raise RuntimeError('abort')
+
+        self.assertFalse(ActivityLog.objects.filter(changed_field='status').exists())
+
+
+@override_settings(ACTIVITY_COALESCE_WINDOW_SECONDS=60)
+class ActivityCoalesceTests(TestCase):
+    """Test coalescing of rapid successive field edits"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="autosave@test.com",
+            email="autosave@test.com",
+            password="testpass123",
+            role="manager",
+        )
+        self.other_user = User.objects.create_user(
+            username="other@test.com",
+            email="other@test.com",
+            password="testpass123",
+            role="manager",
+        )
+        self.project = Project.objects.create(
+            project_name="Autosaved Project",
+            project_type="M",
+            client=Client.objects.create(name="Autosave Client"),
+            mechanical_manager=self.user,
+            due_date=timezone.now().date() + timedelta(days=10),
+            address="1 Autosave Way",
+        )
+
+    def _edit(self, user, **values):
+        project = Project.objects.get(pk=self.project.pk)
+        for field_name, value in values.items():
+            setattr(project, field_name, value)
+        with activity_context(user=user):
+            with self.captureOnCommitCallbacks(execute=True):
+                project.save()
+
+    def _logs(self, field_name):
+        return ActivityLog.objects.filter(
+            project=self.project, changed_field=field_name
+        ).order_by('id')
+
+    def test_successive_edits_update_previous_entry(self):
+        """Test repeated edits keep the first old value and the latest new value"""
+        self._edit(self.user, current_open_items='Duct')
+        self._edit(self.user, current_open_items='Ductwork')
+        self._edit(self.user, current_open_items='Ductwork drawings')
+
+        log = self._logs('current_open_items').get()
+        self.assertEqual(log.old_value, 'None')
+        self.assertEqual(log.new_value, 'Ductwork drawings')
+        self.assertIn('"Ductwork drawings"', log.description)
+
+    def test_different_user_starts_new_entry(self):
+        """Test edits by another user are not folded into the previous entry"""
+        self._edit(self.user, current_open_items='Duct')
+        self._edit(self.other_user, current_open_items='Ductwork')
+        self._edit(self.user, current_open_items='Ductwork drawings')
+
+        self.assertEqual(
+            list(self._logs('current_open_items').values_list('old_value', 'new_value')),
+            [('None', 'Duct'), ('Duct', 'Ductwork'), ('Ductwork', 'Ductwork drawings')],
+        )
+
+    def test_edits_outside_window_are_not_coalesced(self):
+        """Test an entry older than the window is left untouched"""
+        self._edit(self.user, current_open_items='Duct')
+        self._logs('current_open_items').update(
+            timestamp=timezone.now() - timedelta(minutes=5)
+        )
+        self._edit(self.user, current_open_items='Ductwork')
+
+        self.assertEqual(self._logs('current_open_items').count(), 2)
+
+    def test_window_counts_from_the_first_edit(self):
+        """Test steady edits inside the window still start a new entry each window"""
+        start = timezone.now()
+        for seconds, value in ((0, 'Duct'), (50, 'Ductwork'), (100, 'Ductwork drawings')):
+            with patch('django.utils.timezone.now', return_value=start + timedelta(seconds=seconds)):
+                self._edit(self.user, current_open_items=value)
+
+        logs = list(self._logs('current_open_items'))
+        self.assertEqual(
+            [(log.old_value, log.new_value) for log in logs],
+            [('None', 'Ductwork'), ('Ductwork', 'Ductwork drawings')],
+        )
+        # A merged entry keeps the time of its first edit
+        self.assertEqual(logs[0].timestamp, start)
+
+    def test_status_changes_are_never_coalesced(self):
+        """Test only plain field updates are coalesced"""
+        self._edit(self.user, status='in_progress')
+        self._edit(self.user, status='submitted')
+
+        self.assertEqual(self._logs('status').count(), 2)
+
+    @override_settings(ACTIVITY_COALESCE_WINDOW_SECONDS=0)
+    def test_zero_window_disables_coalescing(self):
+        """Test a zero window records every edit"""
+        self._edit(self.user, current_open_items='Duct')
+        self._edit(self.user, current_open_items='Ductwork')
+
+        self.assertEqual(self._logs('current_open_items').count(), 2)
+
+
+class ActivityAudienceTests(TestCase):
+    """Test the denormalized audience used by non-admin feeds"""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username="feedmanager@test.com",
+            email="feedmanager@test.com",
+            password="testpass123",
+            role="employee",
+        )
+        self.client_user = User.objects.create_user(
+            username="feedclient@test.com",
+            email="feedclient@test.com",
+            password="testpass123",
+            role="client",
+        )
+        self.other_client_user = User.objects.create_user(
+            username="feedother@test.com",
+            email="feedother@test.com",
+            password="testpass123",
+            role="client",
+        )
+        self.client_obj = Client.objects.create(
+            name="Feed Client", user_account=self.client_user
+        )
+        self.other_client = Client.objects.create(
+            name="Other Feed Client", user_account=self.other_client_user
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                project_name="Feed Project",
+                project_type="M",
+                client=self.client_obj,
+                mechanical_manager=self.manager,
+                due_date=timezone.now().date() + timedelta(days=10),
+                address="1 Feed Way",
+            )
+        self.api = APIClient()
+
+    def _feed(self, user, url='/api/activity/activity-logs/'):
+        self.api.force_authenticate(user=user)
+        response = self.api.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {entry['id'] for entry in response.data}
+
+    def _project_log_ids(self):
+        return set(self.project.activity_logs.values_list('id', flat=True))
+
+    def test_audience_written_with_activity(self):
+        """Test new entries are visible to the project's owners"""
+        self.assertEqual(
+            set(ActivityLogAudience.objects.filter(
+                activity__project=self.project
+            ).values_list('user_id', flat=True)),
+            {self.manager.id, self.client_user.id},
+        )
+        self.assertEqual(self._feed(self.client_user), self._project_log_ids())
+        self.assertEqual(self._feed(self.other_client_user), set())
+
+    def test_project_activity_uses_audience(self):
+        """Test project_activity returns only the user's project entries"""
+        url = '/api/activity/activity-logs/project_activity/'
+        self.assertEqual(self._feed(self.manager, url), self._project_log_ids())
+        self.assertEqual(self._feed(self.other_client_user, url), set())
+
+    def test_project_ownership_change_rebuilds_audience(self):
+        """Test moving a project to another client moves its history too"""
+        project = Project.objects.get(pk=self.project.pk)
+        project.client = self.other_client
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+
+        self.assertEqual(self._feed(self.client_user), set())
+        self.assertEqual(self._feed(self.other_client_user), self._project_log_ids())
+
+    def test_account_change_rebuilds_audience(self):
+        """Test relinking a client account hands over the client's history"""
+        new_user = User.objects.create_user(
+            username="feednew@test.com",
+            email="feednew@test.com",
+            password="testpass123",
+            role="client",
+        )
+        client = Client.objects.get(pk=self.client_obj.pk)
+        client.user_account = new_user
+        with self.captureOnCommitCallbacks(execute=True):
+            client.save()
+
+        self.assertEqual(self._feed(self.client_user), set())
+        self.assertEqual(self._feed(new_user), self._project_log_ids())
+        self.assertFalse(
+            ActivityLog.objects.filter(changed_field='user_account').exists()
+        )
+
+
+class ActivityArchiveTests(TestCase):
+    """Test archival of old activity months and reading them back"""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username="archivemanager@test.com",
+            email="archivemanager@test.com",
+            password="testpass123",
+            role="manager",
+        )
+        self.client_user = User.objects.create_user(
+            username="archiveclient@test.com",
+            email="archiveclient@test.com",
+            password="testpass123",
+            role="client",
+        )
+        self.other_user = User.objects.create_user(
+            username="archiveother@test.com",
+            email="archiveother@test.com",
+            password="testpass123",
+            role="architect",
+        )
+        client = Client.objects.create(name="Archive Client", user_account=self.client_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(
+                project_name="Archived Project",
+                project_type="M",
+                client=client,
+                mechanical_manager=self.manager,
+                due_date=timezone.now().date() + timedelta(days=10),
+                address="1 Archive Way",
+            )
+        self.old_month = add_months(month_start(timezone.now().date()), -30)
+        old_timestamp = month_range(self.old_month)[0] + timedelta(days=3)
+        ActivityLog.objects.update(timestamp=old_timestamp)
+        ActivityLogAudience.objects.update(timestamp=old_timestamp)
+
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        self.api = APIClient()
+
+    def _archive(self):
+        call_command(
+            'archive_activity_logs',
+            retention_months=24,
+            output_dir=self.archive_dir,
+            stdout=StringIO(),
+        )
+
+    def test_archive_exports_and_removes_old_months(self):
+        """Test old months are written to gzip JSONL and removed from the table"""
+        live_ids = set(ActivityLog.objects.values_list('id', flat=True))
+        self._archive()
+
+        self.assertFalse(ActivityLog.objects.exists())
+        self.assertFalse(ActivityLogAudience.objects.exists())
+        archive = ActivityArchive.objects.get(month=self.old_month)
+        self.assertEqual(archive.row_count, len(live_ids))
+
+        with gzip.open(archive.file_path, 'rt') as handle:
+            entries = [json.loads(line) for line in handle]
+        self.assertEqual({entry['id'] for entry in entries}, live_ids)
+        self.assertIn(self.client_user.id, entries[0]['audience'])
+        self.assertEqual(entries[0]['project_job_number'], self.project.job_number)
+
+    def test_dry_run_changes_nothing(self):
+        """Test --dry-run only reports the months"""
+        out = StringIO()
+        call_command(
+            'archive_activity_logs', output_dir=self.archive_dir, dry_run=True, stdout=out
+        )
+        self.assertIn(self.old_month.strftime('%Y-%m'), out.getvalue())
+        self.assertTrue(ActivityLog.objects.exists())
+        self.assertFalse(ActivityArchive.objects.exists())
+
+    def test_archived_month_is_served_with_access_filtering(self):
+        """Test ?month= reads archived entries visible to the user"""
+        live_ids = set(ActivityLog.objects.values_list('id', flat=True))
+        self._archive()
+        url = f'/api/activity/activity-logs/?month={self.old_month:%Y-%m}'
+
+        for user, expected in [
+            (self.client_user, live_ids),
+            (self.manager, live_ids),
+            (self.other_user, set()),
+        ]:
+            self.api.force_authenticate(user=user)
+            response = self.api.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results = response.data['results']
+            self.assertEqual({entry['id'] for entry in results}, expected)
+            self.assertTrue(all('audience' not in entry for entry in results))
+
+    def test_cursor_feed_continues_into_archived_months(self):
+        """Test cursor pages move on from live entries to archived ones"""
+        archived_ids = set(ActivityLog.objects.values_list('id', flat=True))
+        self._archive()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.status = 'in_progress'
+            self.project.save()
+        live_ids = list(ActivityLog.objects.values_list('id', flat=True))
+        self.assertTrue(live_ids)
+
+        self.api.force_authenticate(user=self.manager)
+        pages = []
+        url = '/api/activity/activity-logs/?cursor=&page_size=1'
+        while url:
+            response = self.api.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([entry['id'] for entry in response.data['results']])
+            url = response.data['next']
+
+        ids = [entry_id for page in pages for entry_id in page]
+        self.assertTrue(all(len(page) == 1 for page in pages))
+        self.assertEqual(set(ids[:len(live_ids)]), set(live_ids))
+        self.assertEqual(set(ids[len(live_ids):]), archived_ids)
+
+    def test_invalid_month_is_rejected(self):
+        """Test a malformed month parameter is a validation error"""
+        self.api.force_authenticate(user=self.manager)
+        response = self.api.get('/api/activity/activity-logs/?month=last-year')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The activity log is only partitioned on PostgreSQL')
+class ActivityPartitionTests(TestCase):
+    """Test moving default-partition rows into a new monthly partition"""
+
+    def setUp(self):
+        self.month = date(2001, 1, 1)
+        self.entry = ActivityLog.objects.create(
+            entity_type='client', action_type='client_updated', description='Old'
+        )
+        ActivityLog.objects.filter(pk=self.entry.pk).update(
+            timestamp=timezone.make_aware(datetime(2001, 1, 2))
+        )
+
+    def test_rows_move_into_the_created_partition(self):
+        """Test rows of the month end up in its partition"""
+        self.assertTrue(create_partition(self.month))
+
+        self.assertIn(self.month, list_partitions())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {partition_name(self.month)}')
+            self.assertEqual([row[0] for row in cursor.fetchall()], [self.entry.pk])
+        self.assertFalse(create_partition(self.month))
+
+    def test_failed_attach_keeps_rows_visible(self):
+        """Test a failing ATTACH rolls the move back instead of losing rows"""
+        # A partition overlapping the second half of the month makes ATTACH fail
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE activity_overlap (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)'
+            )
+            cursor.execute(
+                f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION activity_overlap '
+                f"FOR VALUES FROM ('2001-01-15') TO ('2001-02-15')"
+            )
+
+        with self.assertRaises(DatabaseError):
+            create_partition(self.month)
+
+        self.assertTrue(ActivityLog.objects.filter(pk=self.entry.pk).exists())
+        self.assertNotIn(self.month, list_partitions())
+
+
+class ActivityCursorPaginationTests(TestCase):
+    """Test opt-in keyset pagination of the activity feed"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="cursoradmin@test.com",
+            email="cursoradmin@test.com",
+            password="testpass123",
+            role="admin",
+        )
+        client = Client.objects.create(name="Cursor Client")
+        now = timezone.now()
+        self.entries = ActivityLog.objects.bulk_create([
+            ActivityLog(
+                entity_type='client',
+                client=client,
+                action_type='client_updated',
+                description=f'Entry {index}',
+            )
+            for index in range(5)
+        ])
+        # Two entries share a timestamp so the id tiebreaker is exercised
+        for index, entry in enumerate(self.entries):
+            entry.timestamp = now - timedelta(minutes=min(index, 3))
+        ActivityLog.objects.bulk_update(self.entries, ['timestamp'])
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.admin)
+
+    def test_feed_is_unpaginated_without_cursor(self):
+        """Test the feed keeps returning a plain list when no cursor is given"""
+        response = self.api.get('/api/activity/activity-logs/')
+        self.assertIsInstance(response.data, list)
+
+    def test_cursor_pages_are_contiguous(self):
+        """Test following next links visits every entry exactly once in order"""
+        response = self.api.get(
+            '/api/activity/activity-logs/', {'cursor': '', 'page_size': 2, 'count': 'exact'}
+        )
+        self.assertEqual(response.data['count'], 5)
+
+        seen = []
+        while True:
+            seen.extend(entry['id'] for entry in response.data['results'])
+            if not response.data['next']:
+                break
+            # Entries added meanwhile do not shift the following pages
+            ActivityLog.objects.create(
+                entity_type='client', action_type='client_updated', description='New'
+            )
+            response = self.api.get(response.data['next'])
+
+        expected = sorted(
+            self.entries, key=lambda entry: (entry.timestamp, entry.id), reverse=True
+        )
+        self.assertEqual(seen, [entry.id for entry in expected])
+
+    def test_invalid_cursor_is_rejected(self):
+        """Test a tampered cursor returns 404"""
+        response = self.api.get('/api/activity/activity-logs/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
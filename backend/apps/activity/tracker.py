@@ -0,0 +1,137 @@
+"""
+Field change tracking for activity logging.
+
+``FieldTrackerMixin`` snapshots the values of a model's ``tracked_fields`` when
+an instance is loaded from the database, so change tracking can diff against
+that snapshot instead of re-fetching the row in ``pre_save``.
+"""
+from django.db import router
+
+from .buffer import activity_batch
+
+
+class FieldTrackerMixin:
+    """
+    Model mixin that remembers the originally loaded values of ``tracked_fields``.
+
+    Usage::
+
+        class Project(FieldTrackerMixin, models.Model):
+            tracked_fields = ['status', 'client', ...]
+
+        project = Project.objects.get(pk=1)
+        project.status = 'completed'
+        project.changed_fields()            # ['status']
+        project.get_original_value('status')  # 'in_progress'
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Activity recorded by the save signals is buffered and flushed in one
+        # INSERT when the save commits
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with activity_batch(using=using):
+            super().save(*args, **kwargs)
+        # The saved state becomes the baseline for the next diff
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_tracked_fields(fields)
+
+    @classmethod
+    def _tracked_attnames(cls):
+        """Return (field_name, attname) pairs for the tracked fields"""
+        cache_attr = '_tracked_attnames_cache'
+        if cache_attr not in cls.__dict__:
+            setattr(cls, cache_attr, [
+                (name, cls._meta.get_field(name).attname)
+                for name in cls.tracked_fields
+            ])
+        return cls.__dict__[cache_attr]
+
+    def _snapshot_tracked_fields(self, only=None):
+        """
+        Record the current value of every loaded (non-deferred) tracked field.
+
+        When ``only`` is given (e.g. ``update_fields``), just those fields are
+        re-baselined and the rest of the snapshot is kept.
+        """
+        loaded = self.__dict__
+        snapshot = {
+            name: loaded[attname]
+            for name, attname in self._tracked_attnames()
+            if attname in loaded
+            and (only is None or name in only or attname in only)
+        }
+        if only is not None and getattr(self, '_tracked_originals', None) is not None:
+            self._tracked_originals.update(snapshot)
+        else:
+            self._tracked_originals = snapshot
+
+    def _get_tracked_originals(self):
+        """
+        Return the original values, fetching any that are unknown.
+
+        Instances loaded from the database already carry a snapshot, so this
+        normally issues no query. Fields that were deferred at load time but
+        have since been assigned, or instances constructed in memory for an
+        existing row, are resolved with a single ``values()`` query.
+        """
+        if self._state.adding or self.pk is None:
+            return {}
+
+        originals = getattr(self, '_tracked_originals', None)
+        if originals is None:
+            originals = self._tracked_originals = {}
+
+        missing = [
+            (name, attname) for name, attname in self._tracked_attnames()
+            if attname in self.__dict__ and name not in originals
+        ]
+        if missing:
+            row = type(self)._base_manager.using(self._state.db).filter(
+                pk=self.pk
+            ).values(*[attname for _, attname in missing]).first()
+            if row is not None:
+                for name, attname in missing:
+                    originals[name] = row[attname]
+        return originals
+
+    def changed_fields(self):
+        """Return the names of tracked fields whose value differs from the snapshot"""
+        originals = self._get_tracked_originals()
+        return [
+            name for name, attname in self._tracked_attnames()
+            if name in originals
+            and attname in self.__dict__
+            and self.__dict__[attname] != originals[name]
+        ]
+
+    def get_original_value(self, field_name):
+        """
+        Return the value ``field_name`` had when the instance was loaded.
+
+        For foreign keys the related object is returned. It is taken from the
+        relation cache when it still points at the original row, so a query is
+        only needed when the relation itself was changed.
+        """
+        original = self._get_tracked_originals().get(field_name)
+        field = self._meta.get_field(field_name)
+        if not field.is_relation or original is None:
+            return original
+
+        if field.is_cached(self):
+            cached = field.get_cached_value(self)
+            if cached is not None and cached.pk == original:
+                return cached
+        return field.related_model._base_manager.using(
+            self._state.db
+        ).filter(pk=original).first()
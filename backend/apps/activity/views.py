@@ -1,54 +1,111 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Q
-from .models import ActivityLog
+from datetime import datetime
+from .archive import month_range
+from .models import ActivityArchive, ActivityLog
+from .pagination import ActivityCursorPagination
 from .serializers import ActivityLogSerializer
+from apps.common.fieldsets import SparseFieldsetViewMixin, is_sparse_request
 
-class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
+class ActivityLogViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing activity logs with role-based access control
     Only GET operations are allowed
     """
     serializer_class = ActivityLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ActivityCursorPagination
+    sparse_select_related = ('project', 'client', 'architect', 'user')
 
     def get_queryset(self):
         """
         Return activity logs based on user role
         - Admin/Manager: See all activity logs
-        - Other users: See only their own activity logs
+        - Other users: See activity they performed or on entities they own
         """
         user = self.request.user
 
-        # Base queryset with optimizations for all entity types
-        queryset = ActivityLog.objects.all().select_related(
-            'project', 'client', 'architect', 'user'
-        ).order_by('-timestamp')
-
         # Optional entity_type filter from query params
         entity_type = self.request.query_params.get('entity_type')
-        if entity_type and entity_type in ['project', 'client', 'architect']:
-            queryset = queryset.filter(entity_type=entity_type)
+        if entity_type not in ['project', 'client', 'architect']:
+            entity_type = None
 
         if user.role in ['admin', 'manager']:
             # Admin and managers can see all activity logs
-            return queryset
+            queryset = ActivityLog.objects.all()
+            if entity_type:
+                queryset = queryset.filter(entity_type=entity_type)
+            ordering = '-timestamp'
         else:
-            # Other users can only see activity logs where they are the user
-            # OR activity logs for entities they have access to
-            return queryset.filter(
-                Q(user=user) |
-                # Project access
-                Q(project__mechanical_manager=user) |
-                Q(project__client__user_account=user) |
-                Q(project__architect_designer__user_account=user) |
-                # Client access (if user is linked to client)
-                Q(client__user_account=user) |
-                # Architect access (if user is linked to architect)
-                Q(architect__user_account=user)
-            ).distinct()
+            # Other users see activity they performed or that concerns
+            # entities they own, as recorded in the audience index
+            audience_filter = {'audience__user': user}
+            if entity_type:
+                audience_filter['audience__entity_type'] = entity_type
+            queryset = ActivityLog.objects.filter(**audience_filter)
+            ordering = '-audience__timestamp'
+
+        # Optional month filter (YYYY-MM) for paging back through history
+        month = self.get_requested_month()
+        if month:
+            start, end = month_range(month)
+            queryset = queryset.filter(timestamp__gte=start, timestamp__lt=end)
+
+        return self.apply_sparse_fieldset(queryset).order_by(ordering)
+
+    def get_requested_month(self):
+        """Parse the ?month=YYYY-MM query parameter"""
+        month = self.request.query_params.get('month')
+        if not month:
+            return None
+        try:
+            return datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            raise ValidationError({'month': 'Expected a month in YYYY-MM format.'})
+
+    def list(self, request, *args, **kwargs):
+        """
+        List activity logs. Archived entries are read from their archive
+        files with the same access rules: a cursor page that runs out of
+        live entries continues into the archived months, and an archived
+        ``?month=`` is always served in cursor pages.
+        """
+        month = self.get_requested_month()
+        entity_type = request.query_params.get('entity_type')
+        if entity_type not in ['project', 'client', 'architect']:
+            entity_type = None
+
+        archives = ActivityArchive.objects.order_by('-month')
+        if month and archives.filter(month=month).exists():
+            data = self.paginator.paginate_archives(
+                archives.filter(month=month), request, request.user, entity_type
+            )
+            return self.get_paginated_response(self.prune_archived(data))
+
+        if not self.paginator.is_requested(request):
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        data = self.get_serializer(page, many=True).data
+        if not self.paginator.has_next and not month:
+            data = self.paginator.continue_from_archives(
+                data, archives, request.user, entity_type
+            )
+        return self.get_paginated_response(self.prune_archived(data))
+
+    def prune_archived(self, data):
+        """Apply ?fields= / ?exclude= to archived entries, stored in full"""
+        if not is_sparse_request(self.request):
+            return data
+        return [
+            {
+                name: entry[name]
+                for name in ActivityLogSerializer.selected_field_names(self.request, entry.keys())
+            }
+            for entry in data
+        ]
 
     @action(detail=False, methods=['get'])
     def my_activity(self, request):
@@ -83,38 +140,17 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
         """
         user = request.user
 
-        # Filter to only project activity
-        base_filter = Q(entity_type='project')
-
-        # Get projects the user has access to
+        # Get project activity the user has access to
         if user.role == 'admin':
-            project_activity = ActivityLog.objects.filter(base_filter)
-        elif user.role == 'manager':
             project_activity = ActivityLog.objects.filter(
-                base_filter & (
-                    Q(project__mechanical_manager=user) |
-                    Q(user=user)
-                )
-            )
-        elif user.role == 'employee':
-            project_activity = ActivityLog.objects.filter(
-                base_filter & (
-                    Q(project__mechanical_manager=user) |
-                    Q(user=user)
-                )
-            )
-        elif user.role == 'client':
-            project_activity = ActivityLog.objects.filter(
-                base_filter & Q(project__client__user_account=user)
-            )
-        elif user.role == 'architect':
-            project_activity = ActivityLog.objects.filter(
-                base_filter & Q(project__architect_designer__user_account=user)
-            )
+                entity_type='project'
+            ).order_by('-timestamp')
         else:
-            project_activity = ActivityLog.objects.filter(base_filter & Q(user=user))
+            project_activity = ActivityLog.objects.filter(
+                audience__user=user, audience__entity_type='project'
+            ).order_by('-audience__timestamp')
 
-        project_activity = project_activity.select_related('project', 'user').order_by('-timestamp')
+        project_activity = project_activity.select_related('project', 'user')
 
         page = self.paginate_queryset(project_activity)
         if page is not None:
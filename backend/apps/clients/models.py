@@ -1,7 +1,9 @@
 from django.db import models
 from django.conf import settings
 
-class Client(models.Model):
+from apps.activity.tracker import FieldTrackerMixin
+
+class Client(FieldTrackerMixin, models.Model):
     # Basic Information
     name = models.CharField(max_length=200)
     contact_email = models.EmailField(blank=True, null=True)
@@ -38,6 +40,13 @@ class Client(models.Model):
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Fields snapshotted on load for activity change tracking
+    tracked_fields = [
+        'name', 'contact_email', 'phone', 'address', 'company_name',
+        'contact_person', 'billing_address', 'notes', 'is_active',
+        'user_account',
+    ]
     
     def __str__(self):
         if self.company_name:
@@ -2,6 +2,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Client
+from apps.common.fieldsets import SparseFieldsetMixin
 
 User = get_user_model()
 
@@ -12,7 +13,7 @@ class UserMiniSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'first_name', 'last_name', 'is_active']
         read_only_fields = fields
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Default client serializer for list views."""
     is_user = serializers.BooleanField(read_only=True)
     user_account_email = serializers.EmailField(source='user_account.email', read_only=True)
@@ -26,6 +27,8 @@ class ClientSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'is_user']
 
+    sparse_dependencies = {'is_user': ['user_account']}
+
 class ClientCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating new clients."""
     email = serializers.EmailField(write_only=True, required=False)
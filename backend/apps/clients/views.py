@@ -22,14 +22,16 @@ from .serializers import (
 from .permissions import IsAdminOrManagerOrReadOnly, IsAdminOrManagerOrOwnerReadOnly
 from .filters import ClientFilter
 from .pagination import StandardResultsSetPagination
+from apps.common.fieldsets import SparseFieldsetViewMixin
 
 logger = logging.getLogger(__name__)
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing clients with advanced features.
     """
-    queryset = Client.objects.all().select_related('user_account')
+    queryset = Client.objects.all()
+    sparse_select_related = ('user_account',)
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminOrManagerOrReadOnly]
     pagination_class = StandardResultsSetPagination
@@ -60,7 +62,7 @@ class ClientViewSet(viewsets.ModelViewSet):
         """
         Filter queryset based on user permissions and query parameters.
         """
-        queryset = super().get_queryset()
+        queryset = self.apply_sparse_fieldset(super().get_queryset())
         
         # If user is not admin or manager, apply restrictions
         if self.request.user.role not in ['admin', 'manager']:
@@ -0,0 +1,105 @@
+"""
+Sparse fieldsets for read endpoints.
+
+``?fields=id,job_number,status`` limits a response to the listed fields and
+``?exclude=billing_info,address`` drops fields from the default set. The
+serializer mixin prunes its fields; the view mixin uses the same selection to
+defer model columns nobody asked for and to skip joins and prefetches that
+only serve omitted fields. Without either parameter nothing changes.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _parse(request, param):
+    value = request.query_params.get(param) if request is not None else None
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def is_sparse_request(request):
+    return (
+        request is not None
+        and request.method in SAFE_METHODS
+        and (FIELDS_PARAM in request.query_params or EXCLUDE_PARAM in request.query_params)
+    )
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin implementing ``?fields=`` / ``?exclude=``.
+
+    ``sparse_dependencies`` lists the model fields read by computed fields
+    (method fields, ``source='get_..._display'``) so views know not to defer
+    them; dotted ``source`` paths are worked out automatically.
+    """
+    sparse_dependencies = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if is_sparse_request(request):
+            keep = self.selected_field_names(request, self.fields.keys())
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+    @classmethod
+    def selected_field_names(cls, request, available=None):
+        """Return the names of the fields a request keeps out of ``available``"""
+        names = list(available if available is not None else cls.Meta.fields)
+        include = _parse(request, FIELDS_PARAM)
+        exclude = _parse(request, EXCLUDE_PARAM) or set()
+        return [
+            name for name in names
+            if (include is None or name in include) and name not in exclude
+        ]
+
+    @classmethod
+    def required_model_paths(cls, names):
+        """
+        Return the model paths (``status``, ``client__name``) the given
+        serializer fields read
+        """
+        paths = set()
+        for name in names:
+            if name in cls.sparse_dependencies:
+                paths.update(cls.sparse_dependencies[name])
+                continue
+            declared = cls._declared_fields.get(name)
+            source = getattr(declared, 'source', None) or name
+            paths.add(source.replace('.', '__'))
+        return paths
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin that shapes the queryset for a sparse fieldset request.
+
+    ``sparse_select_related`` and ``sparse_prefetch_related`` list the
+    relations the full representation needs; each is only joined or
+    prefetched when a selected field reads through it.
+    """
+    sparse_select_related = ()
+    sparse_prefetch_related = ()
+
+    def apply_sparse_fieldset(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if not is_sparse_request(self.request) or not hasattr(serializer_class, 'required_model_paths'):
+            queryset = queryset.select_related(*self.sparse_select_related)
+            return queryset.prefetch_related(*self.sparse_prefetch_related)
+
+        names = serializer_class.selected_field_names(self.request)
+        paths = serializer_class.required_model_paths(names)
+        roots = {path.split('__')[0] for path in paths}
+
+        related = [name for name in self.sparse_select_related if name in roots]
+        prefetch = [name for name in self.sparse_prefetch_related if name in roots]
+        deferred = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if not field.primary_key and field.name not in roots and field.attname not in roots
+        ]
+        return queryset.select_related(*related).prefetch_related(*prefetch).defer(*deferred)
@@ -0,0 +1,178 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints of all apps.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination.
+
+    Only active when the request carries a ``cursor`` parameter (an empty
+    value requests the first page). Pages are selected with a
+    ``WHERE (key, id) < (last_key, last_id)`` condition on ``ordering``
+    instead of OFFSET, so deep pages cost the same as the first one and
+    rows inserted meanwhile never shift a page. ``?count=approximate`` adds
+    a planner estimate of the total, ``?count=exact`` an exact COUNT(*).
+
+    Pages always follow ``ordering``: an ``?ordering=`` asking for anything
+    else is rejected, and search results come in this order rather than by
+    rank.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering_query_param = 'ordering'
+
+    def is_requested(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.check_ordering(request)
+        self.page_size_value = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(
+            request.query_params[self.cursor_query_param], queryset.model
+        )
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(queryset.model, position))
+
+        results = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(results) > self.page_size_value
+        results = results[:self.page_size_value]
+        # Where this page ends, for sources that continue the same ordering
+        self.last_position = self.get_position(results[-1]) if results else position
+        self.next_position = self.last_position if self.has_next else None
+        return results
+
+    def check_ordering(self, request):
+        requested = request.query_params.get(self.ordering_query_param)
+        if requested and requested != self.ordering[0]:
+            raise exceptions.ValidationError({
+                self.ordering_query_param: (
+                    f'Cursor pagination is always ordered by {self.ordering[0]}; '
+                    f'drop {self.ordering_query_param} or use page-numbered pages.'
+                )
+            })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'approximate':
+            return estimate_count(queryset)
+        return None
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def get_position(self, obj):
+        return [getattr(obj, name) for name, _ in self._fields()]
+
+    def get_position_filter(self, model, position):
+        """Build the row-value comparison "after ``position``" as nested Q objects"""
+        condition = None
+        for (name, descending), value in reversed(list(zip(self._fields(), position))):
+            lookup = 'lt' if descending else 'gt'
+            after = Q(**{f'{name}__{lookup}': value})
+            condition = after if condition is None else after | (Q(**{name: value}) & condition)
+        return condition
+
+    def encode_cursor(self, position):
+        # Full-precision ISO datetimes; UUIDs and other keys as strings
+        payload = json.dumps([
+            value.isoformat() if hasattr(value, 'isoformat')
+            else value if isinstance(value, (int, str)) else str(value)
+            for value in position
+        ])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor.')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor.')
+        try:
+            return [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self._fields(), values)
+            ]
+        except ValidationError:
+            raise NotFound('Invalid cursor.')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, '')
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'page_size': self.page_size_value,
+            'results': data,
+        }
+        if self.count is not None:
+            response['count'] = self.count
+        return Response(response)
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for ``queryset`` on PostgreSQL.
+
+    Falls back to an exact count on other databases or if the plan cannot
+    be read.
+    """
+    from django.db import connections
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return queryset.count()
@@ -40,7 +40,7 @@ class EmailAccountAdmin(admin.ModelAdmin):
         'email_address', 'provider', 'user', 'is_active',
         'sync_enabled', 'last_sync_at', 'last_sync_status', 'total_synced',
     ]
-    list_filter = ['provider', 'is_active', 'sync_enabled', 'last_sync_status']
+    list_filter = ['provider', 'is_active', 'sync_enabled', 'sync_mode', 'last_sync_status']
     search_fields = ['email_address', 'user__email', 'user__first_name']
     readonly_fields = [
         'id', 'last_sync_at', 'last_sync_status', 'last_sync_error',
@@ -65,7 +65,7 @@ class SyncedEmailAdmin(admin.ModelAdmin):
         'subject', 'from_address', 'direction', 'date',
         'is_read', 'project', 'client', 'folder',
     ]
-    list_filter = ['direction', 'is_read', 'is_starred', 'folder']
+    list_filter = ['direction', 'is_read', 'is_starred', 'folder', 'body_status']
     search_fields = ['subject', 'from_address', 'from_name', 'snippet']
     readonly_fields = ['id', 'synced_at']
     date_hierarchy = 'date'
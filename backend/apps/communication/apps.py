@@ -5,3 +5,7 @@ class CommunicationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.communication'
     verbose_name = 'Communication'
+
+    def ready(self):
+        # Import and connect signals
+        from . import signals
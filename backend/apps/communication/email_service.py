@@ -8,7 +8,7 @@ import os
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from apps.projects.models import Project
-from apps.activity.models import ActivityLog
+from apps.activity.buffer import activity_batch, record_activity
 from apps.users.models import EmailSettings
 from .models import EmailLog, EmailTemplate
 from .template_service import EmailTemplateRenderer
@@ -205,20 +205,21 @@ class CommunicationEmailService:
 
                 email.send()
 
-            # Update log status
-            email_log.status = 'sent'
-            email_log.save()
-
-            # Create activity log entry for the email sent
+            # Update log status and record the activity entry together; the
+            # activity row is written when this block commits
             sender_info = f' by {sent_by.get_full_name()}' if sent_by else ''
-            ActivityLog.objects.create(
-                entity_type='project',
-                project=project,
-                action_type='email_sent',
-                description=f'Email sent{sender_info} to {recipient_email}: "{subject}"',
-                new_value=f'Template: {template.name}',
-                user=sent_by
-            )
+            with activity_batch():
+                email_log.status = 'sent'
+                email_log.save()
+
+                record_activity(
+                    entity_type='project',
+                    project=project,
+                    action_type='email_sent',
+                    description=f'Email sent{sender_info} to {recipient_email}: "{subject}"',
+                    new_value=f'Template: {template.name}',
+                    user=sent_by
+                )
 
             return {
                 'success': True,
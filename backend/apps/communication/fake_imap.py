@@ -0,0 +1,373 @@
+"""
+A minimal in-process IMAP4rev1 server for tests and sync benchmarks.
+
+It serves fixed mailboxes over plain TCP on localhost and understands the
+subset of IMAP the sync service uses (LOGIN, SELECT/EXAMINE, STATUS,
+UID SEARCH, UID FETCH of whole messages, selected headers, BODYSTRUCTURE
+and partial body sections, LIST, NOOP, IDLE, LOGOUT). ``notify`` pushes
+an EXISTS response to the clients idling on a folder. ``latency`` delays every
+tagged response to stand in for the round trip to a remote server.
+Every command received is recorded in ``commands``, and the highest number
+of simultaneous connections in ``peak_connections``.
+"""
+import email
+import re
+import socketserver
+import threading
+import time
+
+from .imap_protocol import parse_sequence_set
+
+
+class FakeMailbox:
+    """Messages of one folder, keyed by UID"""
+
+    def __init__(self, messages=(), uidvalidity=1):
+        self.uidvalidity = uidvalidity
+        self.messages = {}
+        for raw in messages:
+            self.append(raw)
+
+    def append(self, raw, flags=()):
+        uid = max(self.messages, default=0) + 1
+        self.messages[uid] = {'raw': raw, 'flags': list(flags)}
+        return uid
+
+    def uids(self):
+        return sorted(self.messages)
+
+    def parsed(self, uid):
+        message = self.messages[uid]
+        if 'parsed' not in message:
+            message['parsed'] = email.message_from_bytes(message['raw'])
+        return message['parsed']
+
+
+FETCH_ITEM = re.compile(r'BODY(?:\.PEEK)?\[[^\]]*\](?:<[\d.]+>)?|[^\s()]+')
+
+
+def _quote(value):
+    if value is None:
+        return 'NIL'
+    return '"%s"' % str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _raw_payload(part):
+    payload = part.get_payload()
+    return payload.encode('utf-8', errors='replace') if isinstance(payload, str) else b''
+
+
+def bodystructure(part):
+    """Render the BODYSTRUCTURE of a parsed message (RFC 3501, section 7.4.2)"""
+    if part.is_multipart():
+        children = ''.join(bodystructure(child) for child in part.get_payload())
+        return f'({children} {_quote(part.get_content_subtype().upper())})'
+    params = []
+    for key, value in (part.get_params(header='content-type') or [])[1:]:
+        params += [_quote(key.upper()), _quote(value)]
+    disposition = 'NIL'
+    if part.get_content_disposition():
+        filename = part.get_filename()
+        disposition_params = f'({_quote("FILENAME")} {_quote(filename)})' if filename else 'NIL'
+        disposition = f'({_quote(part.get_content_disposition().upper())} {disposition_params})'
+    payload = _raw_payload(part)
+    fields = [
+        _quote(part.get_content_maintype().upper()),
+        _quote(part.get_content_subtype().upper()),
+        f"({' '.join(params)})" if params else 'NIL',
+        _quote(part.get('Content-ID')),
+        'NIL',
+        _quote((part.get('Content-Transfer-Encoding') or '7BIT').upper()),
+        str(len(payload)),
+    ]
+    if part.get_content_maintype() == 'text':
+        fields.append(str(payload.count(b'\n')))
+    fields += ['NIL', disposition, 'NIL', 'NIL']
+    return f"({' '.join(fields)})"
+
+
+def body_section(message, section):
+    """Raw content of a numbered body section such as ``1`` or ``1.2``"""
+    part = message
+    for number in section.split('.'):
+        if part.is_multipart():
+            part = part.get_payload()[int(number) - 1]
+        elif number != '1':
+            return b''
+    return _raw_payload(part)
+
+
+class FakeIMAPHandler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        self.server.connection_opened()
+        self.open = True
+        self.write_lock = threading.Lock()
+
+    def finish(self):
+        self.close_connection()
+        super().finish()
+
+    def close_connection(self):
+        if self.open:
+            self.open = False
+            self.server.connection_closed()
+
+    def handle(self):
+        self.folder = None
+        self.send(b'* OK Fake IMAP4rev1 ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            line = line.rstrip(b'\r\n').decode('utf-8', errors='replace')
+            self.server.record(line)
+            tag, _, rest = line.partition(' ')
+            command, _, args = rest.partition(' ')
+            handler = getattr(self, f'do_{command.lower()}', None)
+            if handler is None:
+                self.reply(tag, f'BAD Unknown command {command}')
+                continue
+            if handler(tag, args) is False:
+                return
+
+    def send(self, data):
+        with self.write_lock:
+            self.wfile.write(data + b'\r\n')
+
+    def reply(self, tag, text):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send(f'{tag} {text}'.encode())
+        self.wfile.flush()
+
+    @staticmethod
+    def unquote(value):
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            return value[1:-1]
+        return value
+
+    def do_capability(self, tag, args):
+        self.send(b'* CAPABILITY IMAP4rev1 IDLE' if self.server.idle_supported else b'* CAPABILITY IMAP4rev1')
+        self.reply(tag, 'OK CAPABILITY completed')
+
+    def do_idle(self, tag, args):
+        if not self.server.idle_supported:
+            self.reply(tag, 'BAD Unknown command IDLE')
+            return
+        self.send(b'+ idling')
+        with self.server._lock:
+            self.server.idlers.append(self)
+        try:
+            line = self.rfile.readline()
+        finally:
+            with self.server._lock:
+                self.server.idlers.remove(self)
+        if not line:
+            return False
+        self.server.record(line.rstrip(b'\r\n').decode('utf-8', errors='replace'))
+        if line.strip().upper() != b'DONE':
+            self.reply(tag, 'BAD Expected DONE')
+            return
+        self.reply(tag, 'OK IDLE terminated')
+
+    def do_login(self, tag, args):
+        self.reply(tag, 'OK LOGIN completed')
+
+    def do_noop(self, tag, args):
+        self.reply(tag, 'OK NOOP completed')
+
+    def do_logout(self, tag, args):
+        # Counted as closed before the client sees the reply
+        self.close_connection()
+        self.send(b'* BYE Logging out')
+        self.reply(tag, 'OK LOGOUT completed')
+        return False
+
+    def do_list(self, tag, args):
+        for name in self.server.mailboxes:
+            self.send(f'* LIST () "/" "{name}"'.encode())
+        self.reply(tag, 'OK LIST completed')
+
+    def do_select(self, tag, args, read_only=False):
+        name = self.unquote(args)
+        mailbox = self.server.mailboxes.get(name)
+        if mailbox is None:
+            self.folder = None
+            self.reply(tag, 'NO Mailbox does not exist')
+            return
+        self.folder = mailbox
+        self.send(f'* {len(mailbox.messages)} EXISTS'.encode())
+        self.send(f'* OK [UIDVALIDITY {mailbox.uidvalidity}] UIDs valid'.encode())
+        self.send(f'* OK [UIDNEXT {max(mailbox.messages, default=0) + 1}] Predicted next UID'.encode())
+        self.reply(tag, f"OK [{'READ-ONLY' if read_only else 'READ-WRITE'}] SELECT completed")
+
+    def do_examine(self, tag, args):
+        return self.do_select(tag, args, read_only=True)
+
+    def do_status(self, tag, args):
+        match = re.match(r'("[^"]*"|\S+)\s*\((.*)\)', args)
+        name = self.unquote(match.group(1)) if match else ''
+        mailbox = self.server.mailboxes.get(name)
+        if mailbox is None:
+            self.reply(tag, 'NO Mailbox does not exist')
+            return
+        self.send(
+            f'* STATUS "{name}" (UIDVALIDITY {mailbox.uidvalidity} '
+            f'MESSAGES {len(mailbox.messages)})'.encode()
+        )
+        self.reply(tag, 'OK STATUS completed')
+
+    def do_uid(self, tag, args):
+        command, _, args = args.partition(' ')
+        if self.folder is None:
+            self.reply(tag, 'BAD No mailbox selected')
+            return
+        if command.upper() == 'SEARCH':
+            self.uid_search(tag, args)
+        elif command.upper() == 'FETCH':
+            self.uid_fetch(tag, args)
+        else:
+            self.reply(tag, f'BAD Unsupported UID {command}')
+
+    def uid_search(self, tag, args):
+        uids = self.folder.uids()
+        criteria = args.split()
+        for key, value in zip(criteria, criteria[1:]):
+            if key.upper() == 'UID':
+                wanted = parse_sequence_set(value, max(uids, default=0))
+                uids = [uid for uid in uids if uid in wanted]
+        self.send(('* SEARCH ' + ' '.join(str(uid) for uid in uids)).rstrip().encode())
+        self.reply(tag, 'OK SEARCH completed')
+
+    def uid_fetch(self, tag, args):
+        sequence, _, items = args.partition(' ')
+        items = FETCH_ITEM.findall(items.upper())
+        uids = self.folder.uids()
+        wanted = parse_sequence_set(sequence, max(uids, default=0))
+        for position, uid in enumerate(uids, start=1):
+            if uid not in wanted:
+                continue
+            self.send_fetch(position, uid, self.folder.messages[uid], items)
+        self.reply(tag, 'OK FETCH completed')
+
+    def send_fetch(self, position, uid, message, items):
+        parts = [f'UID {uid}'.encode()]
+        for item in items:
+            if item == 'UID':
+                continue
+            if item == 'FLAGS':
+                parts.append(f"FLAGS ({' '.join(message['flags'])})".encode())
+            elif item == 'RFC822.SIZE':
+                parts.append(f"RFC822.SIZE {len(message['raw'])}".encode())
+            elif item in ('RFC822', 'BODY[]', 'BODY.PEEK[]'):
+                name = 'RFC822' if item == 'RFC822' else 'BODY[]'
+                parts.append(f"{name} {{{len(message['raw'])}}}\r\n".encode() + message['raw'])
+            elif item == 'BODYSTRUCTURE':
+                parts.append(f'BODYSTRUCTURE {bodystructure(self.folder.parsed(uid))}'.encode())
+            elif item.startswith('BODY'):
+                parts.append(self.fetch_section(uid, item))
+        self.wfile.write(f'* {position} FETCH ('.encode() + b' '.join(parts) + b')\r\n')
+
+    def fetch_section(self, uid, item):
+        match = re.match(r'BODY(?:\.PEEK)?\[([^\]]*)\](?:<(\d+)\.(\d+)>)?', item)
+        section, offset, length = match.groups()
+        parsed = self.folder.parsed(uid)
+        if section.startswith('HEADER.FIELDS'):
+            names = set(re.findall(r'[\w-]+', section[len('HEADER.FIELDS'):]))
+            content = ''.join(
+                f'{key}: {value}\r\n' for key, value in parsed.items() if key.upper() in names
+            ).encode() + b'\r\n'
+        else:
+            content = body_section(parsed, section)
+        name = f'BODY[{section}]'
+        if offset is not None:
+            content = content[int(offset):int(offset) + int(length)]
+            name += f'<{offset}>'
+        return f'{name} {{{len(content)}}}\r\n'.encode() + content
+
+
+class FakeIMAPServer(socketserver.ThreadingTCPServer):
+    """
+    Serve ``mailboxes`` ({folder name: FakeMailbox}) on an ephemeral
+    localhost port until ``stop()``; also usable as a context manager.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailboxes, latency=0, idle_supported=True):
+        super().__init__(('127.0.0.1', 0), FakeIMAPHandler)
+        self.mailboxes = mailboxes
+        self.latency = latency
+        self.idle_supported = idle_supported
+        self.idlers = []
+        self.commands = []
+        self.open_connections = 0
+        self.peak_connections = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def record(self, line):
+        with self._lock:
+            self.commands.append(line)
+
+    def connection_opened(self):
+        with self._lock:
+            self.open_connections += 1
+            self.peak_connections = max(self.peak_connections, self.open_connections)
+
+    def connection_closed(self):
+        with self._lock:
+            self.open_connections -= 1
+
+    def notify(self, folder):
+        """Tell the clients idling on ``folder`` how many messages it now has"""
+        mailbox = self.mailboxes[folder]
+        with self._lock:
+            idlers = [handler for handler in self.idlers if handler.folder is mailbox]
+        for handler in idlers:
+            handler.send(f'* {len(mailbox.messages)} EXISTS'.encode())
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def build_message(index, body_size=2048, sender='client@example.com', to='me@example.com',
+                  subject=None, attachment_size=0):
+    """Build a raw RFC 822 message for fake mailboxes"""
+    from email.message import EmailMessage
+    from email.policy import SMTP
+
+    msg = EmailMessage()
+    msg['Subject'] = subject or f'Message {index}'
+    msg['From'] = sender
+    msg['To'] = to
+    msg['Date'] = 'Mon, 17 Feb 2026 10:30:00 +0000'
+    msg['Message-ID'] = f'<fake-{index}@example.com>'
+    line = f'Line of message {index}. '
+    msg.set_content((line * (body_size // len(line) + 1))[:body_size])
+    if attachment_size:
+        msg.add_attachment(
+            b'\x00' * attachment_size, maintype='application', subtype='pdf',
+            filename=f'document-{index}.pdf',
+        )
+    return msg.as_bytes(policy=SMTP)
+
@@ -0,0 +1,135 @@
+"""
+Per-host caps on simultaneous IMAP connections.
+
+Providers throttle clients that hold too many connections at once
+(Office 365 allows only a handful per client). Every connection the sync
+service opens takes one of its host's slots, which are counted in the
+cache the same way the dashboard stats lock is. With a shared cache
+backend (Redis) the caps hold across all Celery workers; with the local
+memory cache they hold within one process.
+
+A slot is a cache lease. Long syncs renew it after every committed batch
+so it does not run out while the connection is still open.
+
+IMAP IDLE connections (see idle.py) stay open for days. They are capped
+by a separate per-host budget (IdleConnectionLimiter), so that they
+count against the host without starving syncs of slots.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_HOST_CONNECTION_LIMIT = 5
+
+# Caps for providers known to throttle, overridable per host through
+# settings.EMAIL_SYNC_HOST_CONNECTION_LIMITS
+HOST_CONNECTION_LIMITS = {
+    'outlook.office365.com': 4,
+    'imap.gmail.com': 10,
+}
+
+DEFAULT_IDLE_HOST_CONNECTION_LIMIT = 50
+
+# IDLE connection budgets, overridable per host through
+# settings.EMAIL_IDLE_HOST_CONNECTION_LIMITS
+IDLE_HOST_CONNECTION_LIMITS = {
+    'outlook.office365.com': 20,
+}
+
+# A slot whose holder died is freed after this long; holders renew it
+SLOT_LEASE_SECONDS = 900
+
+# How long to wait for a free slot before giving up
+SLOT_WAIT_SECONDS = 120
+
+
+class HostBusy(Exception):
+    """No connection slot of the host became free in time"""
+
+
+class HostConnectionLimiter:
+    """Counting semaphore per IMAP host, held in the cache"""
+
+    key_prefix = 'imap-host-slot'
+    host_limits = HOST_CONNECTION_LIMITS
+    limits_setting = 'EMAIL_SYNC_HOST_CONNECTION_LIMITS'
+    default_limit_setting = 'EMAIL_SYNC_DEFAULT_HOST_CONNECTIONS'
+    fallback_limit = DEFAULT_HOST_CONNECTION_LIMIT
+
+    def __init__(self, limits=None, default_limit=None, lease=SLOT_LEASE_SECONDS,
+                 wait=SLOT_WAIT_SECONDS, poll_interval=0.2):
+        self.limits = {
+            **self.host_limits,
+            **getattr(settings, self.limits_setting, {}),
+            **(limits or {}),
+        }
+        self.default_limit = default_limit or getattr(
+            settings, self.default_limit_setting, self.fallback_limit
+        )
+        self.lease = lease
+        self.wait = wait
+        self.poll_interval = poll_interval
+
+    def limit(self, host):
+        return self.limits.get(host.lower(), self.default_limit)
+
+    def acquire(self, host, wait=None):
+        """
+        Take a free slot of ``host``, waiting up to ``wait`` seconds (the
+        limiter's default when None), and return it for ``release``.
+        Raises HostBusy when none frees up.
+        """
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + (self.wait if wait is None else wait)
+        while True:
+            for index in range(self.limit(host)):
+                key = f'{self.key_prefix}:{host.lower()}:{index}'
+                if cache.add(key, token, timeout=self.lease):
+                    return key, token
+            if time.monotonic() >= deadline:
+                raise HostBusy(f'All {self.limit(host)} connection slots of {host} are busy')
+            time.sleep(self.poll_interval)
+
+    def renew(self, slot):
+        """
+        Extend the lease of a held slot. A lease that already ran out is
+        taken again if the slot is still free; returns False if another
+        connection holds it now.
+        """
+        key, token = slot
+        if cache.get(key) == token:
+            return cache.touch(key, self.lease)
+        return cache.add(key, token, timeout=self.lease)
+
+    def release(self, slot):
+        key, token = slot
+        # Leave the slot alone if our lease ran out and someone else holds it
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+class IdleConnectionLimiter(HostConnectionLimiter):
+    """
+    Per-host budget of IDLE connections, separate from the sync slots.
+    It never waits: a folder that gets no slot is retried later, and its
+    account keeps being synced by the periodic task meanwhile.
+    """
+
+    key_prefix = 'imap-idle-slot'
+    host_limits = IDLE_HOST_CONNECTION_LIMITS
+    limits_setting = 'EMAIL_IDLE_HOST_CONNECTION_LIMITS'
+    default_limit_setting = 'EMAIL_IDLE_DEFAULT_HOST_CONNECTIONS'
+    fallback_limit = DEFAULT_IDLE_HOST_CONNECTION_LIMIT
+
+    def __init__(self, limits=None, default_limit=None, lease=SLOT_LEASE_SECONDS, wait=0, poll_interval=0.2):
+        super().__init__(limits, default_limit, lease, wait, poll_interval)
+
+
+host_limiter = HostConnectionLimiter()
+
+# For work done inside a web request: never wait for a slot
+interactive_host_limiter = HostConnectionLimiter(wait=0)
+
+idle_host_limiter = IdleConnectionLimiter()
@@ -0,0 +1,372 @@
+"""
+IMAP IDLE push sync.
+
+Instead of every account being re-synced on a timer, the daemon keeps one
+connection per account folder sitting in IDLE (RFC 2177) and runs the
+incremental folder sync only when the server reports EXISTS or EXPUNGE.
+All connections are multiplexed on one selector; syncs run on a small
+thread pool so a slow folder does not hold up notifications of others.
+
+IDLE is re-issued before servers drop idle clients (RFC 2177 allows them
+to after 30 minutes). Servers without the IDLE capability keep their
+connection and are polled at the account's sync interval instead.
+
+Connections are counted against the host's IDLE budget (see
+host_limits). While every folder of an account is watched, the daemon
+stamps ``EmailAccount.idle_seen_at``. The periodic Celery sync then
+treats the account as pushed and only syncs it as a safety net.
+
+imaplib has no IDLE support, so the IDLE exchange is written to the
+socket directly; between IDLE phases the connection is handed back to
+imaplib for the sync itself.
+"""
+import logging
+import re
+import selectors
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.db import connections as db_connections
+from django.utils import timezone
+
+from .host_limits import idle_host_limiter
+from .linking_service import EmailLinkingService
+from .models import EmailAccount
+from .sync_executor import DEFAULT_SYNC_FOLDERS
+from .sync_service import IMAPSyncService
+
+logger = logging.getLogger(__name__)
+
+# Re-issue IDLE well before the server's 30 minute inactivity timeout
+IDLE_REFRESH_SECONDS = 25 * 60
+
+# Wait this long after a notification so a burst of them syncs once
+DEBOUNCE_SECONDS = 1.0
+
+# How often the set of active accounts is re-read from the database
+ACCOUNT_RELOAD_SECONDS = 60
+
+# Seconds before reconnecting a folder after its 1st, 2nd, ... failure
+RECONNECT_BACKOFF = (5, 30, 120, 600)
+
+# Timeout for the server to answer IDLE or DONE
+RESPONSE_TIMEOUT = 30
+
+# How often connection slots are renewed and watched accounts stamped
+HEARTBEAT_SECONDS = 120
+
+# An account counts as watched this long after its last stamp
+IDLE_SESSION_TIMEOUT = 3 * HEARTBEAT_SECONDS
+
+CHANGE_RESPONSE = re.compile(rb'^\* \d+ (EXISTS|EXPUNGE)\b', re.IGNORECASE)
+
+
+class IdleWatch:
+    """
+    One watched account folder and its connection. ``state`` is one of
+    ``closed``, ``syncing``, ``idle`` (waiting in IDLE) or ``poll`` (the
+    server has no IDLE; waiting for ``next_poll``).
+    """
+
+    def __init__(self, account, folder, limiter=None):
+        self.account = account
+        self.folder = folder
+        # Sync results are written with update(), so updated_at only
+        # moves when the account itself is edited
+        self.version = account.updated_at
+        self.service = IMAPSyncService(account, limiter=limiter or idle_host_limiter)
+        self.state = 'closed'
+        self.supports_idle = False
+        self.tag = None
+        self.buffer = b''
+        self.idle_since = None
+        self.changed_at = None
+        self.next_poll = 0
+        self.failures = 0
+        self.retry_at = 0
+
+    def __repr__(self):
+        return f'<IdleWatch {self.account.email_address} {self.folder} {self.state}>'
+
+    @property
+    def poll_interval(self):
+        return self.account.sync_interval_minutes * 60
+
+    def open(self):
+        self.service.connect()
+        self.supports_idle = 'IDLE' in self.service.connection.capabilities
+
+    def close(self):
+        if self.tag is not None:
+            try:
+                self.stop_idle()
+            except Exception:
+                pass
+        self.service.disconnect()
+        self.buffer = b''
+        self.state = 'closed'
+
+    def fileno(self):
+        return self.service.connection.socket().fileno()
+
+    def start_idle(self):
+        """Enter IDLE on the selected folder"""
+        connection = self.service.connection
+        self.tag = connection._new_tag()
+        connection.send(self.tag + b' IDLE\r\n')
+        while True:
+            line = self._read_line()
+            if line.startswith(b'+'):
+                break
+            if line.startswith(self.tag + b' '):
+                self.tag = None
+                raise ConnectionError(f'IDLE refused: {line.decode(errors="replace")}')
+            self._handle_untagged(line)
+        self.idle_since = time.monotonic()
+        self.state = 'idle'
+
+    def stop_idle(self):
+        """Leave IDLE so imaplib can use the connection again"""
+        self.service.connection.send(b'DONE\r\n')
+        while True:
+            line = self._read_line()
+            if line.startswith(self.tag + b' '):
+                break
+            self._handle_untagged(line)
+        self.tag = None
+        self.idle_since = None
+        if line.split()[1:2] != [b'OK']:
+            raise ConnectionError(f'IDLE failed: {line.decode(errors="replace")}')
+
+    def read_notifications(self):
+        """Consume what the server pushed while idling"""
+        sock = self.service.connection.socket()
+        data = sock.recv(65536)
+        # TLS may hold decrypted data the selector cannot see
+        while data and getattr(sock, 'pending', lambda: 0)():
+            data += sock.recv(65536)
+        if not data:
+            raise ConnectionError('Connection closed by server')
+        self.buffer += data
+        while b'\r\n' in self.buffer:
+            line, self.buffer = self.buffer.split(b'\r\n', 1)
+            self._handle_untagged(line)
+
+    def _read_line(self):
+        sock = self.service.connection.socket()
+        sock.settimeout(RESPONSE_TIMEOUT)
+        try:
+            while b'\r\n' not in self.buffer:
+                data = sock.recv(65536)
+                if not data:
+                    raise ConnectionError('Connection closed by server')
+                self.buffer += data
+        finally:
+            sock.settimeout(None)
+        line, self.buffer = self.buffer.split(b'\r\n', 1)
+        return line
+
+    def _handle_untagged(self, line):
+        if line.upper().startswith(b'* BYE'):
+            raise ConnectionError(f'Server closed the connection: {line.decode(errors="replace")}')
+        if CHANGE_RESPONSE.match(line) and self.changed_at is None:
+            self.changed_at = time.monotonic()
+
+
+class IdleDaemon:
+    """
+    Watches the folders of all active accounts. ``run_once`` is one turn
+    of the event loop; ``run`` loops until ``stop``. With ``workers=0``
+    syncs run inline on the loop thread.
+    """
+
+    def __init__(self, workers=4, debounce=DEBOUNCE_SECONDS, poll_interval=None, limiter=None):
+        self.selector = selectors.DefaultSelector()
+        self.limiter = limiter or idle_host_limiter
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='imap-idle') if workers else None
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.watches = {}
+        self.syncing = {}
+        self.next_reload = 0
+        self.next_heartbeat = 0
+        self.running = False
+
+    def run(self):
+        self.running = True
+        try:
+            while self.running:
+                self.run_once()
+        finally:
+            self.close()
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+        for watch in self.watches.values():
+            self._unregister(watch)
+            watch.close()
+        self.watches = {}
+        self.syncing = {}
+
+    def run_once(self, timeout=1.0):
+        now = time.monotonic()
+        if now >= self.next_reload:
+            self.load_accounts()
+            self.next_reload = now + ACCOUNT_RELOAD_SECONDS
+
+        for watch in list(self.syncing):
+            if self.syncing[watch].done():
+                self._finish_sync(watch, self.syncing.pop(watch))
+
+        for watch in self.watches.values():
+            if watch.state == 'closed' and now >= watch.retry_at:
+                self._open(watch)
+
+        if self.selector.get_map():
+            events = self.selector.select(timeout)
+        else:
+            events = []
+            time.sleep(timeout)
+        for key, _ in events:
+            watch = key.data
+            try:
+                watch.read_notifications()
+            except Exception as exc:
+                self._fail(watch, exc)
+
+        now = time.monotonic()
+        if now >= self.next_heartbeat:
+            self.heartbeat()
+            self.next_heartbeat = now + HEARTBEAT_SECONDS
+
+        for watch in list(self.watches.values()):
+            if watch.state not in ('idle', 'poll'):
+                continue
+            try:
+                if watch.changed_at is not None and now - watch.changed_at >= self.debounce:
+                    self._start_sync(watch)
+                elif watch.state == 'poll' and now >= watch.next_poll:
+                    self._start_sync(watch)
+                elif watch.state == 'idle' and now - watch.idle_since >= IDLE_REFRESH_SECONDS:
+                    self._unregister(watch)
+                    watch.stop_idle()
+                    watch.start_idle()
+                    self._register(watch)
+            except Exception as exc:
+                self._fail(watch, exc)
+
+    def heartbeat(self):
+        """Renew the connection slots and stamp the fully watched accounts"""
+        watched = {}
+        for (account_pk, _), watch in self.watches.items():
+            if watch.state != 'closed':
+                watch.service.renew_host_slot()
+            watched[account_pk] = watched.get(account_pk, True) and watch.state != 'closed'
+        account_pks = [pk for pk, live in watched.items() if live]
+        if account_pks:
+            EmailAccount.objects.filter(pk__in=account_pks).update(idle_seen_at=timezone.now())
+
+    def load_accounts(self):
+        """Start watching new folders and stop watching removed ones"""
+        wanted = {}
+        for account in EmailAccount.objects.filter(is_active=True, sync_enabled=True):
+            for folder in account.sync_folders or DEFAULT_SYNC_FOLDERS:
+                wanted[(account.pk, folder)] = account
+
+        for key in list(self.watches):
+            watch = self.watches[key]
+            account = wanted.get(key)
+            # Edited accounts (credentials, folders) are reconnected afresh
+            if account is None or account.updated_at != watch.version:
+                if watch in self.syncing:
+                    continue
+                self._unregister(watch)
+                watch.close()
+                del self.watches[key]
+        for key, account in wanted.items():
+            if key not in self.watches:
+                # Each watch gets its own instance; syncs update it from their threads
+                self.watches[key] = IdleWatch(
+                    EmailAccount.objects.get(pk=account.pk), key[1], limiter=self.limiter
+                )
+
+    def _open(self, watch):
+        try:
+            watch.open()
+        except Exception as exc:
+            self._fail(watch, exc)
+            return
+        logger.info(
+            'Watching %s %s (%s)', watch.account.email_address, watch.folder,
+            'IDLE' if watch.supports_idle else 'polling',
+        )
+        # Catch up on whatever arrived while the folder was not watched
+        self._start_sync(watch)
+
+    def _start_sync(self, watch):
+        self._unregister(watch)
+        if watch.tag is not None:
+            watch.stop_idle()
+        watch.state = 'syncing'
+        watch.changed_at = None
+        if self.executor:
+            self.syncing[watch] = self.executor.submit(self._sync_in_thread, watch)
+            return
+        future = Future()
+        try:
+            future.set_result(self._sync(watch))
+        except Exception as exc:
+            future.set_exception(exc)
+        self._finish_sync(watch, future)
+
+    def _sync(self, watch):
+        new_count = watch.service._sync_folder(watch.folder)
+        if new_count:
+            # One folder's outcome is not the account's sync status
+            watch.service.count_synced(new_count)
+            EmailLinkingService.bulk_link_unlinked(account_id=watch.account.pk)
+            logger.info(
+                'Synced %d new emails for %s %s',
+                new_count, watch.account.email_address, watch.folder,
+            )
+        return new_count
+
+    def _sync_in_thread(self, watch):
+        try:
+            return self._sync(watch)
+        finally:
+            db_connections.close_all()
+
+    def _finish_sync(self, watch, future):
+        try:
+            future.result()
+            if watch.supports_idle:
+                watch.start_idle()
+                self._register(watch)
+            else:
+                watch.state = 'poll'
+                watch.next_poll = time.monotonic() + (self.poll_interval or watch.poll_interval)
+            watch.failures = 0
+        except Exception as exc:
+            self._fail(watch, exc)
+
+    def _fail(self, watch, exc):
+        logger.warning('Watch of %s %s failed: %s', watch.account.email_address, watch.folder, exc)
+        self._unregister(watch)
+        watch.tag = None
+        watch.close()
+        watch.failures += 1
+        backoff = RECONNECT_BACKOFF[min(watch.failures, len(RECONNECT_BACKOFF)) - 1]
+        watch.retry_at = time.monotonic() + backoff
+
+    def _register(self, watch):
+        self.selector.register(watch.fileno(), selectors.EVENT_READ, watch)
+
+    def _unregister(self, watch):
+        for key in list(self.selector.get_map().values()):
+            if key.data is watch:
+                self.selector.unregister(key.fileobj)
@@ -0,0 +1,219 @@
+"""
+IMAP protocol helpers for the sync service.
+
+imaplib hands back FETCH responses as a flat list in which one message
+may span several items: a tuple ``(prefix, literal)`` for every literal
+(``RFC822 {1234}``) and plain bytes for the text in between. When many
+messages are fetched with a single ``UID FETCH``, this module splits that
+list back into messages and parses each one's attributes.
+
+It also reads BODYSTRUCTURE, so a header-first sync can list attachments
+and pick the text part to preview without downloading the message.
+"""
+import base64
+import quopri
+import re
+
+# Start of an untagged FETCH response as imaplib reports it: "<seq> ("
+FETCH_START = re.compile(rb'^\d+ \(')
+
+LITERAL_MARKER = re.compile(rb'\{\d+\}$')
+
+TOKEN = re.compile(
+    rb'\s*(?:'
+    rb'(?P<open>\()|(?P<close>\))'
+    rb'|"(?P<quoted>(?:[^"\\]|\\.)*)"'
+    rb'|\x00(?P<literal>\d+)\x00'
+    # Atoms, including section specs such as BODY[HEADER.FIELDS (FROM)]<0>
+    rb'|(?P<atom>[^\s()"\x00\[]+(?:\[[^\]]*\](?:<[\d.]+>)?)?)'
+    rb')'
+)
+
+INTEGER_ATTRIBUTES = ('UID', 'RFC822.SIZE')
+
+
+def uid_set(uids):
+    """Compact UIDs into an IMAP sequence set, e.g. ``1001:1200,1205``"""
+    ranges = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ','.join(
+        str(start) if start == end else f'{start}:{end}' for start, end in ranges
+    )
+
+
+def parse_sequence_set(value, largest):
+    """Expand an IMAP sequence set (``*`` being ``largest``) into a set of integers"""
+    numbers = set()
+    for part in value.split(','):
+        bounds = [largest if bound == '*' else int(bound) for bound in part.split(':')]
+        start, end = min(bounds), max(bounds)
+        numbers.update(range(start, end + 1))
+    return numbers
+
+
+def _tokenize(text, literals):
+    """Parse IMAP data into nested lists of str, bytes (literals) and None (NIL)"""
+    stack = [[]]
+    position = 0
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if not match or match.end() == position:
+            break
+        position = match.end()
+        if match.group('open'):
+            stack.append([])
+        elif match.group('close'):
+            if len(stack) > 1:
+                closed = stack.pop()
+                stack[-1].append(closed)
+        elif match.group('quoted') is not None:
+            stack[-1].append(
+                re.sub(rb'\\(.)', rb'\1', match.group('quoted')).decode('utf-8', errors='replace')
+            )
+        elif match.group('literal') is not None:
+            stack[-1].append(literals[int(match.group('literal'))])
+        elif match.group('atom') is not None:
+            atom = match.group('atom').decode('utf-8', errors='replace')
+            stack[-1].append(None if atom.upper() == 'NIL' else atom)
+    while len(stack) > 1:
+        closed = stack.pop()
+        stack[-1].append(closed)
+    return stack[0]
+
+
+def _parse_message(text, literals):
+    tokens = _tokenize(text, literals)
+    if len(tokens) < 2 or not isinstance(tokens[1], list):
+        return None
+    attributes = tokens[1]
+    message = {}
+    for key, value in zip(attributes[::2], attributes[1::2]):
+        if not isinstance(key, str):
+            continue
+        key = key.upper()
+        if key in INTEGER_ATTRIBUTES and isinstance(value, str) and value.isdigit():
+            value = int(value)
+        message[key] = value
+    return message
+
+
+def parse_fetch_response(data):
+    """
+    Split imaplib's FETCH data into one ``{attribute: value}`` dict per
+    message, e.g. ``{'UID': 1001, 'FLAGS': ['\\\\Seen'], 'RFC822': b'...'}``.
+
+    Attribute names are upper-cased; literals are returned as bytes.
+    Responses without a UID (unsolicited flag updates) are dropped.
+    """
+    messages = []
+    text, literals = None, []
+
+    def finish():
+        if text is not None:
+            message = _parse_message(text, literals)
+            if message and 'UID' in message:
+                messages.append(message)
+
+    for item in data or []:
+        if item is None:
+            continue
+        head, literal = item if isinstance(item, tuple) else (item, None)
+        if FETCH_START.match(head):
+            finish()
+            text, literals = b'', []
+        elif text is None:
+            continue
+        if literal is not None:
+            head = LITERAL_MARKER.sub(b'', head) + b'\x00%d\x00' % len(literals)
+            literals.append(literal)
+        text += head
+    finish()
+    return messages
+
+
+def _pairs(values):
+    """Turn an IMAP parameter list ``["CHARSET", "utf-8", ...]`` into a dict"""
+    if not isinstance(values, list):
+        return {}
+    return {
+        key.lower(): value
+        for key, value in zip(values[::2], values[1::2])
+        if isinstance(key, str)
+    }
+
+
+def describe_bodystructure(structure, section=''):
+    """
+    Flatten a parsed BODYSTRUCTURE into its leaf parts, in order. Each part
+    is a dict with ``section`` (for ``BODY[<section>]``), ``content_type``,
+    ``charset``, ``encoding``, ``size`` (octets as transferred),
+    ``filename``, ``disposition`` and ``content_id``.
+    """
+    if not isinstance(structure, list) or not structure:
+        return []
+    if isinstance(structure[0], list):
+        # Multipart: child parts first, then subtype and extension data
+        parts = []
+        for index, child in enumerate(structure, start=1):
+            if not isinstance(child, list):
+                break
+            parts += describe_bodystructure(child, f'{section}.{index}' if section else str(index))
+        return parts
+
+    fields = structure + [None] * (12 - len(structure))
+    maintype = (fields[0] or 'text').lower()
+    subtype = (fields[1] or 'plain').lower()
+    params = _pairs(fields[2])
+    # Extension data follows the type-specific fields
+    if maintype == 'text':
+        disposition = fields[9]
+    elif (maintype, subtype) == ('message', 'rfc822'):
+        disposition = fields[11]
+    else:
+        disposition = fields[8]
+    disposition_type, disposition_params = '', {}
+    if isinstance(disposition, list) and disposition:
+        disposition_type = str(disposition[0] or '').lower()
+        disposition_params = _pairs(disposition[1] if len(disposition) > 1 else None)
+    size = fields[6]
+    return [{
+        'section': section or '1',
+        'content_type': f'{maintype}/{subtype}',
+        'charset': params.get('charset') or 'utf-8',
+        'encoding': (fields[5] or '7bit').lower() if isinstance(fields[5], str) else '7bit',
+        'size': int(size) if isinstance(size, str) and size.isdigit() else 0,
+        'filename': disposition_params.get('filename') or params.get('name') or '',
+        'disposition': disposition_type,
+        'content_id': (fields[3] or '').strip('<>') if isinstance(fields[3], str) else '',
+    }]
+
+
+def is_attachment(part):
+    """Same rule the sync service applies when walking a full message"""
+    return part['disposition'] == 'attachment' or (
+        bool(part['filename']) and part['disposition'] != 'inline'
+    )
+
+
+def decoded_size(part):
+    """Approximate size of a part once its transfer encoding is removed"""
+    if part['encoding'] == 'base64':
+        return part['size'] * 3 // 4
+    return part['size']
+
+
+def decode_part(data, encoding, charset):
+    """Decode a part body, possibly cut short by a partial fetch, to text"""
+    if encoding == 'base64':
+        data = re.sub(rb'[^A-Za-z0-9+/=]', b'', data)
+        data = base64.b64decode(data[:len(data) // 4 * 4])
+    elif encoding == 'quoted-printable':
+        data = quopri.decodestring(data)
+    try:
+        return data.decode(charset, errors='replace')
+    except LookupError:
+        return data.decode('utf-8', errors='replace')
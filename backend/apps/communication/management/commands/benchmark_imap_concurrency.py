@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.communication.fake_imap import FakeIMAPServer, FakeMailbox, build_message
+from apps.communication.host_limits import HostConnectionLimiter
+from apps.communication.models import EmailAccount
+from apps.communication.sync_executor import IMAPConnectionPool, run_folders
+
+from .benchmark_imap_sync import fetch_folder
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures sync throughput of many accounts with several folders each '
+        'against a local fake IMAP server: serial folders over one connection '
+        'versus the concurrent executor under a per-host connection cap. '
+        'Nothing is written to the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=50)
+        parser.add_argument('--folders', type=int, default=3)
+        parser.add_argument('--messages', type=int, default=40, help='Messages per folder')
+        parser.add_argument('--latency-ms', type=float, default=60, help='Simulated round trip per command')
+        parser.add_argument('--account-workers', type=int, default=10, help='Accounts synced at once')
+        parser.add_argument('--connections', type=int, default=3, help='Connections per account')
+        parser.add_argument('--host-limit', type=int, default=16, help='Connection cap of the host')
+
+    def handle(self, *args, **options):
+        folders = [f'Folder{index}' for index in range(1, options['folders'] + 1)]
+        mailboxes = {
+            folder: FakeMailbox([build_message(index) for index in range(1, options['messages'] + 1)])
+            for folder in folders
+        }
+        limiter = HostConnectionLimiter(
+            limits={'127.0.0.1': options['host_limit']}, wait=3600, poll_interval=0.01,
+        )
+
+        with FakeIMAPServer(mailboxes, latency=options['latency_ms'] / 1000) as server:
+            accounts = [
+                EmailAccount(
+                    email_address=f'benchmark{index}@example.com',
+                    password='benchmark',
+                    provider='imap',
+                    imap_host='127.0.0.1',
+                    imap_port=server.port,
+                    imap_use_ssl=False,
+                    sync_folders=folders,
+                )
+                for index in range(options['accounts'])
+            ]
+            scenarios = [
+                ('serial, 1 connection per account', 1, 1),
+                (
+                    f"{options['account_workers']} accounts at once, "
+                    f"{options['connections']} connections each",
+                    options['account_workers'], options['connections'],
+                ),
+            ]
+            for label, account_workers, connections in scenarios:
+                server.peak_connections = server.open_connections
+                started = time.perf_counter()
+                count = self.run(accounts, account_workers, connections, limiter)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{label}: {count} messages in {elapsed:.2f}s '
+                    f'({count / elapsed:.0f} msg/s, peak {server.peak_connections} connections, '
+                    f"cap {options['host_limit']})"
+                )
+
+    def run(self, accounts, account_workers, connections, limiter):
+        def sync(account):
+            pool = IMAPConnectionPool(account, size=connections, limiter=limiter)
+            try:
+                outcomes = run_folders(pool, account.sync_folders, fetch_folder)
+            finally:
+                pool.close()
+            for _, exc in outcomes.values():
+                if exc is not None:
+                    raise exc
+            return sum(count for count, _ in outcomes.values())
+
+        with ThreadPoolExecutor(max_workers=account_workers) as executor:
+            return sum(executor.map(sync, accounts))
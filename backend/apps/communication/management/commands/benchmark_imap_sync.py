@@ -0,0 +1,80 @@
+import email
+import time
+from email.policy import default as default_policy
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.communication.fake_imap import FakeIMAPServer, FakeMailbox, build_message
+from apps.communication.models import EmailAccount
+from apps.communication.sync_service import IMAPSyncService
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures IMAP fetch throughput (messages/second) of the sync service '
+        'at different UID FETCH batch sizes against a local fake IMAP server. '
+        'Nothing is written to the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500, help='Messages in the fake folder')
+        parser.add_argument('--message-size', type=int, default=4096, help='Body size of each message in bytes')
+        parser.add_argument('--latency-ms', type=float, default=60, help='Simulated round trip per command')
+        parser.add_argument(
+            '--batch-sizes', default='1,10,50,200',
+            help='Comma-separated UID FETCH batch sizes to compare',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            batch_sizes = [int(size) for size in options['batch_sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--batch-sizes must be a comma-separated list of integers')
+
+        self.stdout.write(f"Building {options['messages']} messages...")
+        mailbox = FakeMailbox([
+            build_message(index, body_size=options['message_size'])
+            for index in range(1, options['messages'] + 1)
+        ])
+
+        with FakeIMAPServer({'INBOX': mailbox}, latency=options['latency_ms'] / 1000) as server:
+            account = EmailAccount(
+                email_address='benchmark@example.com',
+                password='benchmark',
+                provider='imap',
+                imap_host='127.0.0.1',
+                imap_port=server.port,
+                imap_use_ssl=False,
+            )
+            for batch_size in batch_sizes:
+                count, elapsed, round_trips = self.run_fetch(account, server, batch_size)
+                self.stdout.write(
+                    f'batch size {batch_size:>5}: {count} messages in {elapsed:.2f}s '
+                    f'({count / elapsed:.0f} msg/s, {round_trips} round trips)'
+                )
+
+    def run_fetch(self, account, server, batch_size):
+        service = IMAPSyncService(account, fetch_batch_size=batch_size)
+        service.connect()
+        try:
+            commands_before = len(server.commands)
+            started = time.perf_counter()
+            count = fetch_folder(service, 'INBOX')
+            elapsed = time.perf_counter() - started
+            return count, elapsed, len(server.commands) - commands_before
+        finally:
+            service.disconnect()
+
+
+def fetch_folder(service, folder):
+    """Fetch and parse a whole folder the way _sync_folder does, without storing"""
+    service.connection.select(folder, readonly=True)
+    _, data = service.connection.uid('SEARCH', None, 'ALL')
+    uids = sorted(int(uid) for uid in data[0].split())
+    count = 0
+    for batch in service._plan_fetch_batches(uids):
+        for message in service._fetch_messages(batch):
+            msg = email.message_from_bytes(message['RFC822'], policy=default_policy)
+            service._parse_email(msg)
+            count += 1
+    return count
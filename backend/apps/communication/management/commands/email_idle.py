@@ -0,0 +1,42 @@
+import logging
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.communication.idle import IdleDaemon
+
+
+class Command(BaseCommand):
+    help = (
+        'Long-running daemon that holds IMAP IDLE connections for the folders '
+        'of all active email accounts and syncs a folder as soon as the server '
+        'reports new or expunged messages. Servers without IDLE are polled at '
+        "the account's sync interval. Stop with SIGINT or SIGTERM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Folder syncs run at once; 0 runs them on the event loop thread',
+        )
+        parser.add_argument(
+            '--debounce', type=float, default=1.0,
+            help='Seconds to wait after a notification so a burst syncs once',
+        )
+
+    def handle(self, *args, **options):
+        if options['verbosity'] > 1:
+            logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+
+        daemon = IdleDaemon(workers=options['workers'], debounce=options['debounce'])
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping, closing IDLE connections...')
+            daemon.stop()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        self.stdout.write('Watching active email accounts for new mail')
+        daemon.run()
+        self.stdout.write(self.style.SUCCESS('Stopped'))
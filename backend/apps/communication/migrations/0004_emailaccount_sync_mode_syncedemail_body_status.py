@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("communication", "0003_emailaccount_emailthread_synccursor_syncedemail_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emailaccount",
+            name="sync_mode",
+            field=models.CharField(
+                choices=[("headers", "Headers first"), ("full", "Full messages")],
+                default="full",
+                help_text="Fetch whole messages; or headers and a preview first, bodies on demand",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="syncedemail",
+            name="body_status",
+            field=models.CharField(
+                choices=[("complete", "Complete"), ("pending", "Pending")],
+                default="complete",
+                help_text="'pending' until the body of a header-first sync is fetched",
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="syncedemail",
+            index=models.Index(
+                condition=models.Q(("body_status", "pending")),
+                fields=["account", "-date"],
+                name="synced_email_body_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0004_emailaccount_sync_mode_syncedemail_body_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailaccount',
+            name='idle_seen_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Last time the IMAP IDLE daemon was watching every folder', null=True),
+        ),
+    ]
@@ -6,6 +6,7 @@ from cryptography.fernet import Fernet
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from apps.activity.tracker import FieldTrackerMixin
 from apps.projects.models import Project
 from apps.clients.models import Client
 
@@ -186,6 +187,11 @@ class EmailAccount(models.Model):
         ('oauth2', 'OAuth 2.0'),
     ]
 
+    SYNC_MODE_CHOICES = [
+        ('headers', 'Headers first'),
+        ('full', 'Full messages'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -229,12 +235,22 @@ class EmailAccount(models.Model):
         default=30,
         help_text="Only sync emails newer than this many days"
     )
+    sync_mode = models.CharField(
+        max_length=20,
+        choices=SYNC_MODE_CHOICES,
+        default='full',
+        help_text="Fetch whole messages; or headers and a preview first, bodies on demand"
+    )
 
     # Status tracking
     last_sync_at = models.DateTimeField(null=True, blank=True)
     last_sync_status = models.CharField(max_length=20, blank=True)
     last_sync_error = models.TextField(blank=True)
     total_synced = models.IntegerField(default=0)
+    idle_seen_at = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        help_text="Last time the IMAP IDLE daemon was watching every folder"
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -394,7 +410,7 @@ class EmailThread(models.Model):
         self.save(update_fields=['message_count', 'unread_count', 'last_message_at'])
 
 
-class SyncedEmail(models.Model):
+class SyncedEmail(FieldTrackerMixin, models.Model):
     """Individual email message synced from an IMAP account"""
 
     DIRECTION_CHOICES = [
@@ -402,6 +418,11 @@ class SyncedEmail(models.Model):
         ('outbound', 'Outbound'),
     ]
 
+    BODY_STATUS_CHOICES = [
+        ('complete', 'Complete'),
+        ('pending', 'Pending'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     account = models.ForeignKey(
         EmailAccount,
@@ -456,6 +477,12 @@ class SyncedEmail(models.Model):
         help_text="Short preview of the email body"
     )
     has_attachments = models.BooleanField(default=False)
+    body_status = models.CharField(
+        max_length=10,
+        choices=BODY_STATUS_CHOICES,
+        default='complete',
+        help_text="'pending' until the body of a header-first sync is fetched"
+    )
 
     # CRM linking
     project = models.ForeignKey(
@@ -482,6 +509,9 @@ class SyncedEmail(models.Model):
     raw_headers = models.JSONField(default=dict, blank=True)
     synced_at = models.DateTimeField(auto_now_add=True)
 
+    # Snapshotted on load so project counters can follow relinks and reads
+    tracked_fields = ['project', 'is_read']
+
     class Meta:
         ordering = ['-date']
         verbose_name = 'Synced Email'
@@ -495,6 +525,11 @@ class SyncedEmail(models.Model):
             models.Index(fields=['project', '-date']),
             models.Index(fields=['client', '-date']),
             models.Index(fields=['is_read']),
+            models.Index(
+                fields=['account', '-date'],
+                name='synced_email_body_pending_idx',
+                condition=models.Q(body_status='pending'),
+            ),
         ]
 
     def __str__(self):
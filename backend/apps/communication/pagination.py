@@ -0,0 +1,12 @@
+from apps.common.pagination import KeysetPagination
+
+
+class SyncedEmailCursorPagination(KeysetPagination):
+    """
+    Opt-in cursor pagination for synced emails (``?cursor=``).
+
+    Lists stay unpaginated when no cursor is given.
+    """
+    ordering = ('-date', '-id')
+    page_size = 50
+    max_page_size = 200
@@ -3,6 +3,7 @@ from .models import (
     EmailTemplate, EmailLog, EmailAttachment,
     EmailAccount, EmailThread, SyncedEmail, SyncedEmailAttachment, SyncCursor,
 )
+from apps.common.fieldsets import SparseFieldsetMixin
 
 
 class EmailTemplateSerializer(serializers.ModelSerializer):
@@ -28,7 +29,7 @@ class EmailAttachmentSerializer(serializers.ModelSerializer):
         fields = ['id', 'file_name', 'file_path', 'file_size', 'content_type', 'uploaded_at']
 
 
-class EmailLogSerializer(serializers.ModelSerializer):
+class EmailLogSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     project_name = serializers.CharField(source='project.project_name', read_only=True)
     project_job_number = serializers.CharField(source='project.job_number', read_only=True)
     template_name = serializers.CharField(source='template.name', read_only=True)
@@ -51,6 +52,8 @@ class EmailLogSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['sent_at', 'opened_at', 'clicked_at']
 
+    sparse_dependencies = {'status_display': ['status']}
+
 
 class SendEmailSerializer(serializers.Serializer):
     """Serializer for sending email request"""
@@ -99,6 +102,7 @@ class EmailAccountSerializer(serializers.ModelSerializer):
             'smtp_host', 'smtp_port', 'smtp_use_tls',
             'is_active', 'sync_enabled',
             'sync_interval_minutes', 'sync_folders', 'max_sync_age_days',
+            'sync_mode',
             'last_sync_at', 'last_sync_status', 'last_sync_error',
             'total_synced',
             'created_at', 'updated_at',
@@ -130,7 +134,7 @@ class EmailAccountCreateSerializer(serializers.ModelSerializer):
             'smtp_host', 'smtp_port', 'smtp_use_tls',
             'password',
             'sync_enabled', 'sync_interval_minutes',
-            'sync_folders', 'max_sync_age_days',
+            'sync_folders', 'max_sync_age_days', 'sync_mode',
         ]
 
     def create(self, validated_data):
@@ -164,7 +168,7 @@ class SyncedEmailAttachmentSerializer(serializers.ModelSerializer):
         fields = ['id', 'file_name', 'content_type', 'file_size', 'is_inline']
 
 
-class SyncedEmailSerializer(serializers.ModelSerializer):
+class SyncedEmailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Full serializer for a synced email message"""
     attachments = SyncedEmailAttachmentSerializer(many=True, read_only=True)
     project_name = serializers.CharField(source='project.project_name', read_only=True, default=None)
@@ -180,7 +184,7 @@ class SyncedEmailSerializer(serializers.ModelSerializer):
             'from_address', 'from_name',
             'to_addresses', 'cc_addresses', 'bcc_addresses', 'reply_to',
             'subject', 'date', 'snippet',
-            'body_text', 'body_html',
+            'body_text', 'body_html', 'body_status',
             'has_attachments', 'attachments',
             'project', 'project_name', 'project_job_number',
             'client', 'client_name',
@@ -191,12 +195,14 @@ class SyncedEmailSerializer(serializers.ModelSerializer):
             'id', 'account', 'message_id', 'folder',
             'from_address', 'from_name',
             'to_addresses', 'cc_addresses', 'bcc_addresses',
-            'subject', 'date', 'body_text', 'body_html',
+            'subject', 'date', 'body_text', 'body_html', 'body_status',
             'has_attachments', 'synced_at',
         ]
 
+    sparse_dependencies = {'direction_display': ['direction']}
+
 
-class SyncedEmailListSerializer(serializers.ModelSerializer):
+class SyncedEmailListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for listing synced emails"""
     project_name = serializers.CharField(source='project.project_name', read_only=True, default=None)
     client_name = serializers.CharField(source='client.name', read_only=True, default=None)
@@ -213,7 +219,7 @@ class SyncedEmailListSerializer(serializers.ModelSerializer):
         ]
 
 
-class EmailThreadSerializer(serializers.ModelSerializer):
+class EmailThreadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for email threads"""
     project_name = serializers.CharField(source='project.project_name', read_only=True, default=None)
     project_job_number = serializers.CharField(source='project.job_number', read_only=True, default=None)
@@ -236,6 +242,9 @@ class EmailThreadSerializer(serializers.ModelSerializer):
             'last_message_at', 'created_at', 'updated_at',
         ]
 
+    # latest_snippet runs its own query
+    sparse_dependencies = {'latest_snippet': []}
+
     def get_latest_snippet(self, obj):
         latest = obj.messages.order_by('-date').only('snippet').first()
         return latest.snippet if latest else ''
@@ -0,0 +1,64 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.projects.counters import adjust_project_counters, discount_communication
+
+from .models import EmailLog, SyncedEmail
+
+
+@receiver(post_save, sender=EmailLog)
+def count_sent_email(sender, instance, created, **kwargs):
+    """
+    Count a newly logged email towards its project
+    """
+    if created:
+        adjust_project_counters(
+            [instance.project_id], sent_email_count=1, last_communication_at=instance.sent_at
+        )
+
+
+@receiver(post_delete, sender=EmailLog)
+def discount_sent_email(sender, instance, **kwargs):
+    discount_communication(instance.project_id, instance.sent_at, sent_email_count=-1)
+
+
+@receiver(post_save, sender=SyncedEmail)
+def count_synced_email(sender, instance, created, **kwargs):
+    """
+    Keep project email and unread counters in step when a synced email is
+    stored, linked to another project or marked read/unread
+    """
+    unread = 0 if instance.is_read else 1
+    if created:
+        adjust_project_counters(
+            [instance.project_id],
+            synced_email_count=1, unread_email_count=unread,
+            last_communication_at=instance.date,
+        )
+        return
+
+    # post_save runs before FieldTrackerMixin re-baselines, so the snapshot
+    # still holds the values loaded before this save
+    changed = instance.changed_fields()
+    if 'project' in changed:
+        old_project = instance.get_original_value('project')
+        was_unread = 0 if instance.get_original_value('is_read') else 1
+        if old_project is not None:
+            discount_communication(
+                old_project.pk, instance.date, synced_email_count=-1, unread_email_count=-was_unread
+            )
+        adjust_project_counters(
+            [instance.project_id],
+            synced_email_count=1, unread_email_count=unread,
+            last_communication_at=instance.date,
+        )
+    elif 'is_read' in changed:
+        adjust_project_counters([instance.project_id], unread_email_count=-1 if instance.is_read else 1)
+
+
+@receiver(post_delete, sender=SyncedEmail)
+def discount_synced_email(sender, instance, **kwargs):
+    discount_communication(
+        instance.project_id, instance.date,
+        synced_email_count=-1, unread_email_count=0 if instance.is_read else -1,
+    )
@@ -0,0 +1,175 @@
+"""
+Concurrent IMAP sync of an account's folders.
+
+Folders are synced in parallel over a small pool of authenticated
+connections. A connection goes back to the pool after a folder and is
+reused for the next one, so an account logs in at most ``connections``
+times per sync. Every connection holds one of its host's slots (see
+host_limits), so many accounts on the same provider cannot together
+exceed the provider's cap.
+
+Only an account's first connection waits for a host slot. Further ones
+are opened when a slot is free right away, and otherwise the folder
+waits for one of the account's connections to come back. An account
+that holds slots while waiting for more could deadlock with other
+accounts doing the same.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections as db_connections
+
+from .host_limits import HostBusy
+from .sync_service import IMAPSyncService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNC_FOLDERS = ['INBOX', '[Gmail]/Sent Mail']
+
+# Connections one account syncs its folders over
+ACCOUNT_CONNECTIONS = getattr(settings, 'EMAIL_SYNC_ACCOUNT_CONNECTIONS', 3)
+
+# How often a folder waiting for a connection tries the host for a new slot
+SLOT_RETRY_SECONDS = 1.0
+
+
+class IMAPConnectionPool:
+    """
+    Up to ``size`` connected IMAPSyncService instances for one account,
+    opened on first demand and reused until ``close``. ``service_options``
+    (e.g. ``fetch_batch_size``) are passed to every instance.
+    """
+
+    def __init__(self, account, size=ACCOUNT_CONNECTIONS, limiter=None,
+                 service_class=IMAPSyncService, service_options=None):
+        self.account = account
+        self.size = max(1, size)
+        self.limiter = limiter
+        self.service_class = service_class
+        self.service_options = service_options or {}
+        self._idle = []
+        self._open = 0
+        self._condition = threading.Condition()
+        # An OAuth2 token refresh must not run once per connection
+        self._login_lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connected service; it is dropped if the work fails"""
+        service = self._checkout()
+        try:
+            yield service
+        except Exception:
+            self._discard(service)
+            raise
+        with self._condition:
+            self._idle.append(service)
+            self._condition.notify()
+
+    def _checkout(self):
+        while True:
+            with self._condition:
+                while not self._idle and self._open >= self.size:
+                    self._condition.wait()
+                if self._idle:
+                    return self._idle.pop()
+                self._open += 1
+                # Only a pool without connections may wait for a host slot
+                wait = None if self._open == 1 else 0
+            try:
+                service = self.service_class(self.account, limiter=self.limiter, **self.service_options)
+                with self._login_lock:
+                    service.connect(wait=wait)
+                return service
+            except HostBusy:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                    if wait is None:
+                        raise
+                    # Wait for a connection of this pool, or try the host again
+                    self._condition.wait(SLOT_RETRY_SECONDS)
+            except Exception:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                raise
+
+    def _discard(self, service):
+        service.disconnect()
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for service in idle:
+            self._discard(service)
+
+
+def run_folders(pool, folders, task):
+    """
+    Run ``task(service, folder)`` for every folder over the pool's
+    connections and return ``{folder: (result, exception)}``
+    """
+    def run(folder):
+        try:
+            with pool.connection() as service:
+                return task(service, folder), None
+        except Exception as exc:
+            return None, exc
+
+    if pool.size == 1 or len(folders) == 1:
+        return {folder: run(folder) for folder in folders}
+
+    def run_in_thread(folder):
+        try:
+            return run(folder)
+        finally:
+            # Worker threads open their own database connections
+            db_connections.close_all()
+
+    workers = min(pool.size, len(folders))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='imap-sync') as executor:
+        futures = {folder: executor.submit(run_in_thread, folder) for folder in folders}
+    return {folder: future.result() for folder, future in futures.items()}
+
+
+def sync_account(account, connections=ACCOUNT_CONNECTIONS, limiter=None, service_options=None):
+    """
+    Incrementally sync every configured folder of ``account``, with up
+    to ``connections`` folders at a time, and record the outcome.
+    ``service_options`` are IMAPSyncService arguments for the connections.
+
+    Raises if no connection can be opened at all (login failure, host
+    busy), like a single-connection sync would.
+    """
+    folders = account.sync_folders or DEFAULT_SYNC_FOLDERS
+    pool = IMAPConnectionPool(
+        account, size=min(connections, len(folders)), limiter=limiter,
+        service_options=service_options,
+    )
+    try:
+        # Open the first connection up front so login errors surface here
+        with pool.connection():
+            pass
+        outcomes = run_folders(pool, folders, lambda service, folder: service._sync_folder(folder))
+    finally:
+        pool.close()
+
+    total_new = 0
+    errors = []
+    for folder, (new_count, exc) in outcomes.items():
+        if exc is not None:
+            logger.error(
+                "Error syncing folder %s for %s: %s",
+                folder, account.email_address, exc,
+            )
+            errors.append(f"{folder}: {exc}")
+        else:
+            total_new += new_count
+    return IMAPSyncService(account).record_sync_result(total_new, errors)
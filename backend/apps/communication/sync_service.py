@@ -4,6 +4,12 @@ IMAP Email Sync Service
 Handles connecting to IMAP servers, fetching emails incrementally,
 parsing message content, and storing them as SyncedEmail records.
 Supports Gmail, Outlook, and generic IMAP providers.
+
+Accounts in ``headers`` sync mode fetch only selected headers, the
+BODYSTRUCTURE and a short preview of the text part per message; the
+message is stored with ``body_status='pending'`` and its full content is
+fetched by ``fetch_bodies`` when it is first opened or by a background
+pass. ``full`` mode downloads whole messages during the sync.
 """
 import email
 import email.header
@@ -14,8 +20,15 @@ import re
 from datetime import datetime, timedelta
 from email.policy import default as default_policy
 
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
+from .host_limits import HostBusy, host_limiter
+from .imap_protocol import (
+    decode_part, decoded_size, describe_bodystructure, is_attachment,
+    parse_fetch_response, uid_set,
+)
 from .models import (
     EmailAccount, EmailThread, SyncedEmail,
     SyncedEmailAttachment, SyncCursor,
@@ -23,21 +36,50 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Bounds of one UID FETCH of full messages: message count and total size
+FETCH_BATCH_SIZE = 200
+FETCH_BATCH_BYTES = 20 * 1024 * 1024
+
+# UIDs whose sizes are asked for per UID FETCH RFC822.SIZE
+SIZE_QUERY_CHUNK = 5000
+
+# Messages per UID FETCH in headers sync mode
+HEADER_BATCH_SIZE = 500
+
+# Headers fetched in headers sync mode, enough for _parse_email
+HEADER_FIELDS = (
+    'DATE', 'SUBJECT', 'FROM', 'TO', 'CC', 'BCC', 'REPLY-TO',
+    'MESSAGE-ID', 'IN-REPLY-TO', 'REFERENCES', 'X-MAILER',
+)
+
+# Octets of the text part fetched for the snippet in headers sync mode
+PREVIEW_BYTES = 2048
+
 
 class IMAPSyncService:
     """Service for syncing emails from IMAP accounts"""
 
-    def __init__(self, account: EmailAccount):
+    def __init__(self, account: EmailAccount, fetch_batch_size=FETCH_BATCH_SIZE,
+                 fetch_batch_bytes=FETCH_BATCH_BYTES, limiter=None):
         self.account = account
         self.connection = None
+        self.fetch_batch_size = fetch_batch_size
+        self.fetch_batch_bytes = fetch_batch_bytes
+        self.limiter = limiter or host_limiter
+        self.host_slot = None
 
     # ------------------------------------------------------------------
     # Connection management
     # ------------------------------------------------------------------
 
-    def connect(self):
-        """Establish IMAP connection with password or OAuth2 auth."""
+    def connect(self, wait=None):
+        """
+        Establish IMAP connection with password or OAuth2 auth, holding
+        one of the host's connection slots until ``disconnect``. ``wait``
+        overrides how long the limiter waits for a slot.
+        """
         config = self.account.get_imap_config()
+        self.host_slot = self.limiter.acquire(config['host'], wait=wait)
         try:
             if config['ssl']:
                 self.connection = imaplib.IMAP4_SSL(
@@ -63,7 +105,11 @@ class IMAPSyncService:
                 "IMAP login failed for %s: %s",
                 self.account.email_address, exc,
             )
+            self.disconnect()
             raise ConnectionError(f"IMAP login failed: {exc}") from exc
+        except Exception:
+            self.disconnect()
+            raise
 
     def _authenticate_oauth2(self):
         """Authenticate via XOAUTH2 SASL mechanism, refreshing token if needed."""
@@ -103,13 +149,24 @@ class IMAPSyncService:
         )
 
     def disconnect(self):
-        """Close IMAP connection"""
+        """Close IMAP connection and free its host slot"""
         if self.connection:
             try:
                 self.connection.logout()
             except Exception:
                 pass
             self.connection = None
+        if self.host_slot:
+            self.limiter.release(self.host_slot)
+            self.host_slot = None
+
+    def renew_host_slot(self):
+        """Keep the host slot of a long-running connection from expiring"""
+        if self.host_slot and not self.limiter.renew(self.host_slot):
+            logger.warning(
+                "Lost host connection slot of %s while syncing",
+                self.account.email_address,
+            )
 
     def test_connection(self):
         """Test that we can connect and authenticate"""
@@ -149,42 +206,49 @@ class IMAPSyncService:
     # Incremental sync
     # ------------------------------------------------------------------
 
-    def sync(self):
-        """Run a full incremental sync across configured folders"""
-        folders = self.account.sync_folders or ['INBOX', '[Gmail]/Sent Mail']
-        total_new = 0
-        errors = []
+    def sync(self, connections=1):
+        """
+        Run a full incremental sync across configured folders, over up to
+        ``connections`` simultaneous connections (see sync_executor)
+        """
+        from .sync_executor import sync_account
+
+        return sync_account(
+            self.account, connections=connections, limiter=self.limiter,
+            service_options={
+                'fetch_batch_size': self.fetch_batch_size,
+                'fetch_batch_bytes': self.fetch_batch_bytes,
+            },
+        )
+
+    def record_sync_result(self, total_new, errors):
+        """Update the account's sync status and return the sync result"""
+        self.account.last_sync_at = timezone.now()
+        self.account.last_sync_status = 'error' if errors else 'success'
+        self.account.last_sync_error = '; '.join(errors) if errors else ''
+        EmailAccount.objects.filter(pk=self.account.pk).update(
+            last_sync_at=self.account.last_sync_at,
+            last_sync_status=self.account.last_sync_status,
+            last_sync_error=self.account.last_sync_error,
+            total_synced=F('total_synced') + total_new,
+        )
+        self.account.refresh_from_db(fields=['total_synced'])
 
-        self.connect()
-        try:
-            for folder in folders:
-                try:
-                    new_count = self._sync_folder(folder)
-                    total_new += new_count
-                except Exception as exc:
-                    logger.error(
-                        "Error syncing folder %s for %s: %s",
-                        folder, self.account.email_address, exc,
-                    )
-                    errors.append(f"{folder}: {exc}")
-
-            # Update account sync status
-            self.account.last_sync_at = timezone.now()
-            self.account.last_sync_status = 'error' if errors else 'success'
-            self.account.last_sync_error = '; '.join(errors) if errors else ''
-            self.account.total_synced += total_new
-            self.account.save(update_fields=[
-                'last_sync_at', 'last_sync_status',
-                'last_sync_error', 'total_synced',
-            ])
+        return {
+            'success': not errors,
+            'new_emails': total_new,
+            'errors': errors,
+        }
 
-            return {
-                'success': not errors,
-                'new_emails': total_new,
-                'errors': errors,
-            }
-        finally:
-            self.disconnect()
+    def count_synced(self, total_new):
+        """
+        Add ``total_new`` to the account's total without touching its sync
+        status, for syncs of a single folder
+        """
+        # Folder watches and full syncs may count into the same row at once
+        EmailAccount.objects.filter(pk=self.account.pk).update(
+            total_synced=F('total_synced') + total_new,
+        )
 
     def _sync_folder(self, folder_name):
         """Sync a single IMAP folder incrementally using UIDs"""
@@ -228,37 +292,131 @@ class IMAPSyncService:
             cursor.save()
             return 0
 
-        uids = data[0].split()
+        # Skip already-synced UIDs
+        uids = sorted(
+            uid for uid in (int(uid_bytes) for uid_bytes in data[0].split())
+            if uid > cursor.last_uid
+        )
         new_count = 0
 
-        for uid_bytes in uids:
-            uid_str = uid_bytes.decode('utf-8')
-            uid_int = int(uid_str)
-
-            # Skip already-synced UIDs
-            if uid_int <= cursor.last_uid:
-                continue
-
-            try:
-                synced = self._fetch_and_store_email(uid_str, folder_name)
-                if synced:
-                    new_count += 1
-            except Exception as exc:
-                logger.error(
-                    "Error fetching UID %s in %s: %s",
-                    uid_str, folder_name, exc,
-                )
-
-            # Update cursor progressively
-            if uid_int > cursor.last_uid:
-                cursor.last_uid = uid_int
+        if self.account.sync_mode == 'headers':
+            batches = (
+                uids[start:start + HEADER_BATCH_SIZE]
+                for start in range(0, len(uids), HEADER_BATCH_SIZE)
+            )
+            fetch = self._fetch_headers
+        else:
+            batches = self._plan_fetch_batches(uids)
+            fetch = self._fetch_messages
+
+        for batch in batches:
+            messages = fetch(batch)
+            # The cursor moves with each committed batch, so an interrupted
+            # sync resumes after the last batch it stored
+            with transaction.atomic():
+                stored = self._store_messages(messages, folder_name)
+                cursor.last_uid = batch[-1]
+                cursor.message_count += stored
+                cursor.save()
+            new_count += stored
+            self.renew_host_slot()
 
         cursor.last_sync_at = timezone.now()
-        cursor.message_count += new_count
         cursor.save()
 
         return new_count
 
+    def _plan_fetch_batches(self, uids):
+        """
+        Split UIDs into fetch batches bounded by message count and by the
+        total RFC822.SIZE the server reports for them. A message larger
+        than the byte bound is fetched on its own.
+        """
+        batch, batch_bytes = [], 0
+        for start in range(0, len(uids), SIZE_QUERY_CHUNK):
+            chunk = uids[start:start + SIZE_QUERY_CHUNK]
+            status, data = self.connection.uid('FETCH', uid_set(chunk), '(UID RFC822.SIZE)')
+            if status != 'OK':
+                raise imaplib.IMAP4.error(f'UID FETCH RFC822.SIZE failed: {data}')
+            sizes = {
+                message['UID']: message.get('RFC822.SIZE') or 0
+                for message in parse_fetch_response(data)
+            }
+            # UIDs without a size were expunged since the search
+            for uid in chunk:
+                if uid not in sizes:
+                    continue
+                size = sizes[uid]
+                if batch and (
+                    len(batch) >= self.fetch_batch_size
+                    or batch_bytes + size > self.fetch_batch_bytes
+                ):
+                    yield batch
+                    batch, batch_bytes = [], 0
+                batch.append(uid)
+                batch_bytes += size
+        if batch:
+            yield batch
+
+    def _fetch_messages(self, uids):
+        """Fetch full messages and flags for many UIDs in one round trip"""
+        status, data = self.connection.uid('FETCH', uid_set(uids), '(UID FLAGS RFC822)')
+        if status != 'OK':
+            raise imaplib.IMAP4.error(f'UID FETCH failed: {data}')
+        return parse_fetch_response(data)
+
+    def _fetch_headers(self, uids):
+        """
+        Fetch flags, selected headers and BODYSTRUCTURE for many UIDs, then
+        the first PREVIEW_BYTES of each message's text part, with one
+        round trip per distinct part section (usually one or two)
+        """
+        status, data = self.connection.uid(
+            'FETCH', uid_set(uids),
+            f"(UID FLAGS BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS ({' '.join(HEADER_FIELDS)})])",
+        )
+        if status != 'OK':
+            raise imaplib.IMAP4.error(f'UID FETCH headers failed: {data}')
+        messages = parse_fetch_response(data)
+
+        by_section = {}
+        for message in messages:
+            message['PARTS'] = describe_bodystructure(message.get('BODYSTRUCTURE'))
+            preview_part = self._preview_part(message['PARTS'])
+            if preview_part:
+                message['PREVIEW_PART'] = preview_part
+                by_section.setdefault(preview_part['section'], []).append(message['UID'])
+
+        by_uid = {message['UID']: message for message in messages}
+        for section, section_uids in by_section.items():
+            status, data = self.connection.uid(
+                'FETCH', uid_set(section_uids), f'(UID BODY.PEEK[{section}]<0.{PREVIEW_BYTES}>)'
+            )
+            if status != 'OK':
+                continue
+            for preview in parse_fetch_response(data):
+                content = self._section_value(preview, f'BODY[{section}]')
+                if preview['UID'] in by_uid and isinstance(content, bytes):
+                    by_uid[preview['UID']]['PREVIEW'] = content
+        return messages
+
+    @staticmethod
+    def _preview_part(parts):
+        """The part a snippet is taken from: first text/plain, else text/html"""
+        for content_type in ('text/plain', 'text/html'):
+            for part in parts:
+                if part['content_type'] == content_type and not is_attachment(part):
+                    return part
+        return None
+
+    @staticmethod
+    def _section_value(message, prefix):
+        """Value of the first attribute named like ``prefix`` (servers vary the suffix)"""
+        for key, value in message.items():
+            if key.startswith(prefix):
+                return value
+        return None
+
     def _build_search_criteria(self, cursor):
         """Build IMAP search criteria for incremental sync"""
         criteria = []
@@ -280,33 +438,53 @@ class IMAPSyncService:
     # Email fetching and parsing
     # ------------------------------------------------------------------
 
-    def _fetch_and_store_email(self, uid, folder_name):
-        """Fetch a single email by UID and store it"""
-        status, data = self.connection.uid(
-            'FETCH', uid, '(RFC822 FLAGS)'
-        )
-        if status != 'OK' or not data or not data[0]:
-            return False
-
-        raw_email = data[0][1]
-        flags_data = data[0][0].decode('utf-8', errors='replace')
-
-        msg = email.message_from_bytes(raw_email, policy=default_policy)
+    def _store_messages(self, messages, folder_name):
+        """Store fetched messages not synced yet and return how many were stored"""
+        parsed_messages = []
+        for message in messages:
+            raw_email = message.get('RFC822')
+            headers = self._section_value(message, 'BODY[HEADER.FIELDS')
+            if isinstance(raw_email, bytes):
+                msg = email.message_from_bytes(raw_email, policy=default_policy)
+                parsed = self._parse_email(msg)
+            elif isinstance(headers, bytes):
+                msg = email.message_from_bytes(headers, policy=default_policy)
+                parsed = self._parse_header_message(msg, message)
+            else:
+                continue
+            uid = str(message['UID'])
+            # Extract message ID for deduplication
+            message_id = msg.get('Message-ID', '').strip()
+            if not message_id:
+                message_id = f"<generated-{uid}-{folder_name}@{self.account.email_address}>"
+            parsed_messages.append((uid, message_id, parsed, message.get('FLAGS') or []))
+
+        # Skip messages already synced (dedup by message_id), one query per batch
+        seen = set(SyncedEmail.objects.filter(
+            account=self.account,
+            message_id__in=[message_id for _, message_id, _, _ in parsed_messages],
+        ).values_list('message_id', flat=True))
 
-        # Extract message ID for deduplication
-        message_id = msg.get('Message-ID', '').strip()
-        if not message_id:
-            message_id = f"<generated-{uid}-{folder_name}@{self.account.email_address}>"
+        stored = 0
+        for uid, message_id, parsed, flags in parsed_messages:
+            if message_id in seen:
+                continue
+            seen.add(message_id)
+            try:
+                with transaction.atomic():
+                    self._store_email(parsed, message_id, uid, folder_name, flags)
+                stored += 1
+            except Exception as exc:
+                logger.error(
+                    "Error storing UID %s in %s: %s",
+                    uid, folder_name, exc,
+                )
+        return stored
 
-        # Skip if already synced (dedup by message_id)
-        if SyncedEmail.objects.filter(
-            account=self.account,
-            message_id=message_id,
-        ).exists():
-            return False
+    def _store_email(self, parsed, message_id, uid, folder_name, flags):
+        """Store one parsed message with its attachments"""
+        flags_data = ' '.join(flags)
 
-        # Parse email fields
-        parsed = self._parse_email(msg, flags_data)
         parsed['message_id'] = message_id
         parsed['imap_uid'] = uid
         parsed['folder'] = folder_name
@@ -339,7 +517,9 @@ class IMAPSyncService:
             direction=direction,
             body_text=parsed.get('body_text', ''),
             body_html=parsed.get('body_html', ''),
+            snippet=parsed.get('snippet', ''),
             has_attachments=parsed.get('has_attachments', False),
+            body_status=parsed.get('body_status', 'complete'),
             is_read='\\Seen' in flags_data,
             is_starred='\\Flagged' in flags_data,
             is_draft='\\Draft' in flags_data,
@@ -361,8 +541,111 @@ class IMAPSyncService:
         if thread:
             thread.update_counts()
 
+        return synced_email
+
+    # ------------------------------------------------------------------
+    # Deferred bodies
+    # ------------------------------------------------------------------
+
+    def fetch_bodies(self, emails):
+        """
+        Download the full content of header-first emails of this account
+        and mark them complete. Returns the number of emails completed.
+        """
+        by_folder = {}
+        for synced_email in emails:
+            if synced_email.body_status == 'pending' and synced_email.imap_uid.isdigit():
+                by_folder.setdefault(synced_email.folder, []).append(synced_email)
+        if not by_folder:
+            return 0
+
+        completed = 0
+        self.connect()
+        try:
+            for folder_name, folder_emails in by_folder.items():
+                status, _ = self.connection.select(folder_name, readonly=True)
+                if status != 'OK':
+                    logger.warning("Cannot select folder: %s", folder_name)
+                    continue
+                for start in range(0, len(folder_emails), self.fetch_batch_size):
+                    batch = folder_emails[start:start + self.fetch_batch_size]
+                    messages = self._fetch_messages([int(e.imap_uid) for e in batch])
+                    raw_by_uid = {
+                        str(message['UID']): message.get('RFC822') for message in messages
+                    }
+                    for synced_email in batch:
+                        raw_email = raw_by_uid.get(synced_email.imap_uid)
+                        if isinstance(raw_email, bytes) and self._complete_body(synced_email, raw_email):
+                            completed += 1
+                    self.renew_host_slot()
+        finally:
+            self.disconnect()
+        return completed
+
+    def _complete_body(self, synced_email, raw_email):
+        """Store the body and attachments of a fetched message on its pending email"""
+        msg = email.message_from_bytes(raw_email, policy=default_policy)
+        message_id = msg.get('Message-ID', '').strip()
+        if message_id and message_id != synced_email.message_id:
+            # The UID now names another message (the folder was rebuilt)
+            logger.warning(
+                "UID %s in %s no longer holds %s",
+                synced_email.imap_uid, synced_email.folder, synced_email.message_id,
+            )
+            return False
+
+        parsed = self._parse_email(msg)
+        synced_email.body_text = parsed['body_text']
+        synced_email.body_html = parsed['body_html']
+        synced_email.has_attachments = parsed['has_attachments']
+        synced_email.snippet = parsed['body_text'][:300].strip() or synced_email.snippet
+        synced_email.body_status = 'complete'
+        with transaction.atomic():
+            synced_email.save(update_fields=[
+                'body_text', 'body_html', 'has_attachments', 'snippet', 'body_status',
+            ])
+            synced_email.attachments.all().delete()
+            SyncedEmailAttachment.objects.bulk_create([
+                SyncedEmailAttachment(
+                    email=synced_email,
+                    file_name=att_data['filename'],
+                    content_type=att_data['content_type'],
+                    file_size=att_data.get('size', 0),
+                    is_inline=att_data.get('is_inline', False),
+                    content_id=att_data.get('content_id', ''),
+                )
+                for att_data in parsed['attachments']
+            ])
         return True
 
+    def _parse_header_message(self, msg, message):
+        """
+        Parse a header-only fetch: fields from the selected headers,
+        attachments from BODYSTRUCTURE and the snippet from the preview
+        """
+        parsed = self._parse_email(msg)
+        parsed['attachments'] = [
+            {
+                'filename': self._decode_header(part['filename'] or 'attachment'),
+                'content_type': part['content_type'],
+                'size': decoded_size(part),
+                'is_inline': part['disposition'] == 'inline',
+                'content_id': part['content_id'],
+            }
+            for part in message.get('PARTS', []) if is_attachment(part)
+        ]
+        parsed['has_attachments'] = bool(parsed['attachments'])
+        preview_part = message.get('PREVIEW_PART')
+        if preview_part and message.get('PREVIEW'):
+            preview = decode_part(
+                message['PREVIEW'], preview_part['encoding'], preview_part['charset']
+            )
+            if preview_part['content_type'] == 'text/html':
+                preview = re.sub(r'<[^>]*>?', ' ', preview)
+            parsed['snippet'] = ' '.join(preview.split())[:300]
+        parsed['body_status'] = 'pending'
+        return parsed
+
     def _parse_email(self, msg, flags_data=''):
         """Parse an email.message.Message into a dict"""
         result = {}
@@ -605,3 +888,29 @@ class IMAPSyncService:
             return parsed
         except (ValueError, TypeError):
             return timezone.now()
+
+
+def fetch_pending_bodies(emails, limiter=None):
+    """
+    Fetch the bodies of pending synced emails, one connection per account.
+    Failures are logged and leave the emails pending for a later attempt,
+    as does a host with no free connection slot under ``limiter``.
+    """
+    by_account = {}
+    for synced_email in emails:
+        if synced_email.body_status == 'pending':
+            by_account.setdefault(synced_email.account_id, []).append(synced_email)
+
+    completed = 0
+    for account_emails in by_account.values():
+        account = account_emails[0].account
+        try:
+            completed += IMAPSyncService(account, limiter=limiter).fetch_bodies(account_emails)
+        except HostBusy as exc:
+            logger.info("Bodies for %s left pending: %s", account.email_address, exc)
+        except Exception as exc:
+            logger.error(
+                "Error fetching bodies for %s: %s",
+                account.email_address, exc,
+            )
+    return completed
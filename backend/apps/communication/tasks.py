@@ -93,7 +93,7 @@ def sync_email_account(self, account_id):
         dict: Sync result with counts and errors
     """
     from .models import EmailAccount
-    from .sync_service import IMAPSyncService
+    from .sync_executor import sync_account
     from .linking_service import EmailLinkingService
 
     try:
@@ -105,8 +105,9 @@ def sync_email_account(self, account_id):
         return {'success': False, 'error': 'Account not found or disabled'}
 
     try:
-        service = IMAPSyncService(account)
-        result = service.sync()
+        # Folders are synced in parallel within the account's and its
+        # host's connection limits; a busy host raises and is retried
+        result = sync_account(account)
 
         # Auto-link newly synced emails
         if result.get('new_emails', 0) > 0:
@@ -131,11 +132,25 @@ def sync_all_active_accounts():
     """
     Periodic task: Sync all active email accounts.
     Called by Celery Beat on schedule.
+
+    Accounts the IDLE daemon is watching get new mail as it arrives; they
+    are synced here only once EMAIL_IDLE_SAFETY_SYNC_SECONDS have passed
+    since their last full sync.
     """
+    from datetime import timedelta
+
+    from django.conf import settings
+    from django.utils import timezone
+
+    from .idle import IDLE_SESSION_TIMEOUT
     from .models import EmailAccount
 
+    now = timezone.now()
     accounts = EmailAccount.objects.filter(
         is_active=True, sync_enabled=True
+    ).exclude(
+        idle_seen_at__gte=now - timedelta(seconds=IDLE_SESSION_TIMEOUT),
+        last_sync_at__gte=now - timedelta(seconds=settings.EMAIL_IDLE_SAFETY_SYNC_SECONDS),
     )
 
     queued = 0
@@ -147,6 +162,28 @@ def sync_all_active_accounts():
     return {'queued': queued}
 
 
+@shared_task
+def fetch_pending_email_bodies(limit=500):
+    """
+    Periodic task: Fetch the bodies of emails synced header-first.
+    Works through the newest pending emails of active accounts, a bounded
+    number per run, so it stays a low-priority background pass.
+    """
+    from .models import SyncedEmail
+    from .sync_service import fetch_pending_bodies
+
+    pending = list(
+        SyncedEmail.objects.filter(
+            body_status='pending',
+            account__is_active=True,
+            account__sync_enabled=True,
+        ).select_related('account').order_by('account', '-date')[:limit]
+    )
+    fetched = fetch_pending_bodies(pending)
+    logger.info('Fetched %d of %d pending email bodies', fetched, len(pending))
+    return {'fetched': fetched, 'pending': len(pending)}
+
+
 @shared_task
 def link_unlinked_emails():
     """
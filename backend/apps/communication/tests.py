@@ -1,6 +1,8 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from unittest.mock import patch, MagicMock
 from rest_framework.test import APITestCase, APIClient
@@ -14,8 +16,14 @@ from .models import (
     EmailAccount, EmailThread, SyncedEmail,
     SyncedEmailAttachment, SyncCursor,
 )
+from .fake_imap import FakeIMAPServer, FakeMailbox, build_message
+from .imap_protocol import parse_fetch_response, uid_set
+from .host_limits import HostBusy, HostConnectionLimiter, IdleConnectionLimiter
+from .idle import IdleDaemon
 from .linking_service import EmailLinkingService
+from .sync_executor import IMAPConnectionPool, run_folders
 from .sync_service import IMAPSyncService
+from .tasks import sync_all_active_accounts
 
 User = get_user_model()
 
@@ -155,6 +163,7 @@ class EmailAccountModelTests(TestCase):
         self.assertEqual(account.max_sync_age_days, 30)
         self.assertEqual(account.total_synced, 0)
         self.assertIsNone(account.last_sync_at)
+        self.assertEqual(account.sync_mode, 'full')
 
     def test_str_representation(self):
         """Test string representation of account"""
@@ -373,6 +382,48 @@ class SyncedEmailModelTests(TestCase):
         self.assertEqual(emails[0].subject, "Newer")
         self.assertEqual(emails[1].subject, "Older")
 
+    def test_project_counters_follow_synced_emails(self):
+        """Test project email counters track creation, reads, relinks and deletes"""
+        client = Client.objects.create(name="Counter Client")
+        project_data = dict(
+            project_type="M", client=client, mechanical_manager=self.user, address="1 Counter St",
+        )
+        project = Project.objects.create(project_name="Counter Project", **project_data)
+        other = Project.objects.create(project_name="Other Project", **project_data)
+        date = timezone.now()
+
+        email = SyncedEmail.objects.create(
+            account=self.account,
+            message_id="<counter@test.com>",
+            from_address="a@test.com",
+            to_addresses=[],
+            subject="Counted",
+            date=date,
+            project=project,
+        )
+        project.counters.refresh_from_db()
+        self.assertEqual(project.counters.synced_email_count, 1)
+        self.assertEqual(project.counters.unread_email_count, 1)
+        self.assertEqual(project.counters.last_communication_at, date)
+
+        email.is_read = True
+        email.save(update_fields=['is_read'])
+        project.counters.refresh_from_db()
+        self.assertEqual(project.counters.unread_email_count, 0)
+
+        email.project = other
+        email.save(update_fields=['project'])
+        project.counters.refresh_from_db()
+        other.counters.refresh_from_db()
+        self.assertEqual(project.counters.synced_email_count, 0)
+        self.assertIsNone(project.counters.last_communication_at)
+        self.assertEqual(other.counters.synced_email_count, 1)
+
+        email.delete()
+        other.counters.refresh_from_db()
+        self.assertEqual(other.counters.synced_email_count, 0)
+        self.assertIsNone(other.counters.last_communication_at)
+
 
 class SyncCursorModelTests(TestCase):
     """Test SyncCursor model functionality"""
@@ -784,6 +835,332 @@ class IMAPSyncServiceUnitTests(TestCase):
         self.assertIsNotNone(thread)
         self.assertEqual(thread.subject, 'Brand New Conversation')
 
+    def test_uid_set_compacts_ranges(self):
+        """Test UIDs are compacted into an IMAP sequence set"""
+        self.assertEqual(uid_set([7, 1, 2, 3, 5, 8]), '1:3,5,7:8')
+
+    def test_parse_fetch_response_splits_messages(self):
+        """Test a multi-message FETCH response is split per message"""
+        data = [
+            (b'1 (UID 11 FLAGS (\\Seen) RFC822 {5}', b'first'),
+            b')',
+            (b'2 (UID 12 RFC822 {6}', b'second'),
+            b' FLAGS ())',
+            b'3 (FLAGS (\\Deleted))',
+        ]
+        messages = parse_fetch_response(data)
+        self.assertEqual([m['UID'] for m in messages], [11, 12])
+        self.assertEqual(messages[0]['FLAGS'], ['\\Seen'])
+        self.assertEqual(messages[1]['RFC822'], b'second')
+
+
+class IMAPBatchSyncTests(TestCase):
+    """Test folder sync against a local fake IMAP server"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="batchsync@test.com",
+            email="batchsync@test.com",
+            password="testpass123",
+            role="manager",
+        )
+        self.mailbox = FakeMailbox([build_message(index) for index in range(1, 6)])
+        self.server = FakeIMAPServer({'INBOX': self.mailbox}).start()
+        self.addCleanup(self.server.stop)
+        self.account = EmailAccount.objects.create(
+            user=self.user,
+            email_address="me@example.com",
+            provider="imap",
+            imap_host="127.0.0.1",
+            imap_port=self.server.port,
+            imap_use_ssl=False,
+            password="secret",
+            sync_folders=['INBOX'],
+            sync_mode='full',
+        )
+
+    def fetch_commands(self):
+        return [command for command in self.server.commands if '(UID FLAGS RFC822)' in command]
+
+    def test_sync_fetches_messages_in_batches(self):
+        """Test messages are fetched in UID batches and the cursor follows"""
+        result = IMAPSyncService(self.account, fetch_batch_size=2).sync()
+
+        self.assertEqual(result['new_emails'], 5)
+        self.assertEqual(SyncedEmail.objects.filter(account=self.account).count(), 5)
+        self.assertEqual(len(self.fetch_commands()), 3)
+        cursor = SyncCursor.objects.get(account=self.account, folder='INBOX')
+        self.assertEqual(cursor.last_uid, 5)
+
+    def test_sync_resumes_after_cursor(self):
+        """Test a later sync fetches only messages after the cursor"""
+        IMAPSyncService(self.account).sync()
+        self.mailbox.append(build_message(6))
+        self.server.commands.clear()
+
+        result = IMAPSyncService(self.account).sync()
+
+        self.assertEqual(result['new_emails'], 1)
+        self.assertEqual(self.fetch_commands()[0].split()[3], '6')
+
+    def test_header_first_sync_defers_bodies(self):
+        """Test headers mode stores previews and fetches bodies on first view"""
+        self.mailbox.append(build_message(6, attachment_size=200000))
+        self.account.sync_mode = 'headers'
+        self.account.save(update_fields=['sync_mode'])
+
+        result = IMAPSyncService(self.account).sync()
+
+        self.assertEqual(result['new_emails'], 6)
+        self.assertEqual(self.fetch_commands(), [])
+        pending = SyncedEmail.objects.get(message_id='<fake-6@example.com>')
+        self.assertEqual(pending.body_status, 'pending')
+        self.assertEqual(pending.body_text, '')
+        self.assertTrue(pending.snippet.startswith('Line of message 6.'))
+        self.assertTrue(pending.has_attachments)
+        self.assertEqual(pending.attachments.get().file_name, 'document-6.pdf')
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('synced-email-detail', kwargs={'pk': str(pending.id)}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['body_status'], 'complete')
+        self.assertIn('Line of message 6.', response.data['body_text'])
+        self.assertEqual(len(self.fetch_commands()), 1)
+        self.assertEqual(pending.attachments.get().file_size, 200000)
+
+    def test_opening_email_does_not_wait_for_busy_host(self):
+        """Test a pending email is served at once while syncs hold every host slot"""
+        self.account.sync_mode = 'headers'
+        self.account.save(update_fields=['sync_mode'])
+        IMAPSyncService(self.account).sync()
+        pending = SyncedEmail.objects.get(message_id='<fake-1@example.com>')
+        limiter = HostConnectionLimiter(wait=0)
+        slots = [limiter.acquire('127.0.0.1') for _ in range(limiter.limit('127.0.0.1'))]
+        self.addCleanup(lambda: [limiter.release(slot) for slot in slots])
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('synced-email-detail', kwargs={'pk': str(pending.id)}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['body_status'], 'pending')
+        self.assertEqual(self.fetch_commands(), [])
+
+    def test_folders_reuse_pooled_connections(self):
+        """Test folders share a bounded pool of connections"""
+        for name, first in (('Sent', 10), ('Archive', 20)):
+            self.server.mailboxes[name] = FakeMailbox([build_message(index) for index in range(first, first + 3)])
+        self.account.sync_folders = ['INBOX', 'Sent', 'Archive']
+
+        result = IMAPSyncService(self.account).sync()
+
+        self.assertEqual(result['new_emails'], 11)
+        logins = [command for command in self.server.commands if ' LOGIN ' in command]
+        self.assertEqual(len(logins), 1)
+
+    def test_parallel_folders_respect_pool_size(self):
+        """Test parallel folder work never opens more than the pool size"""
+        folders = [f'Folder{index}' for index in range(6)]
+        for name in folders:
+            self.server.mailboxes[name] = FakeMailbox([build_message(1)])
+        self.server.latency = 0.01
+        pool = IMAPConnectionPool(self.account, size=2)
+
+        def count_messages(service, folder):
+            service.connection.select(folder, readonly=True)
+            return len(service.connection.uid('SEARCH', None, 'ALL')[1][0].split())
+
+        try:
+            outcomes = run_folders(pool, folders, count_messages)
+        finally:
+            pool.close()
+
+        self.assertEqual([outcomes[name] for name in folders], [(1, None)] * 6)
+        self.assertLessEqual(self.server.peak_connections, 2)
+
+    def test_accounts_sharing_a_capped_host_do_not_deadlock(self):
+        """Test pools wanting more connections than the host cap all finish"""
+        folders = [f'Folder{index}' for index in range(3)]
+        for name in folders:
+            self.server.mailboxes[name] = FakeMailbox([build_message(1)])
+        self.server.latency = 0.01
+        limiter = HostConnectionLimiter(limits={'127.0.0.1': 4}, wait=5, poll_interval=0.01)
+        accounts = [self.account] + [
+            EmailAccount(
+                email_address=f'other{index}@example.com', provider='imap',
+                imap_host='127.0.0.1', imap_port=self.server.port,
+                imap_use_ssl=False, password='secret',
+            )
+            for index in range(3)
+        ]
+
+        def sync(account):
+            pool = IMAPConnectionPool(account, size=3, limiter=limiter)
+            try:
+                return run_folders(pool, folders, lambda service, folder: folder)
+            finally:
+                pool.close()
+
+        with ThreadPoolExecutor(max_workers=len(accounts)) as executor:
+            results = list(executor.map(sync, accounts))
+
+        for outcomes in results:
+            self.assertEqual(outcomes, {folder: (folder, None) for folder in folders})
+        self.assertLessEqual(self.server.peak_connections, 4)
+
+
+class IdleDaemonTests(TestCase):
+    """Test the IDLE push-sync daemon against a local fake IMAP server"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="idle@test.com",
+            email="idle@test.com",
+            password="testpass123",
+            role="manager",
+        )
+        self.mailbox = FakeMailbox([build_message(index) for index in range(1, 4)])
+        self.server = FakeIMAPServer({'INBOX': self.mailbox}).start()
+        self.addCleanup(self.server.stop)
+        self.account = EmailAccount.objects.create(
+            user=self.user,
+            email_address="me@example.com",
+            provider="imap",
+            imap_host="127.0.0.1",
+            imap_port=self.server.port,
+            imap_use_ssl=False,
+            password="secret",
+            sync_folders=['INBOX'],
+            sync_mode='full',
+        )
+
+    def run_until(self, daemon, condition):
+        for _ in range(100):
+            daemon.run_once(timeout=0.05)
+            if condition():
+                return
+        self.fail('Daemon did not reach the expected state')
+
+    def synced_count(self):
+        return SyncedEmail.objects.filter(account=self.account).count()
+
+    def test_exists_notification_triggers_folder_sync(self):
+        """Test a pushed EXISTS syncs the folder over the idling connection"""
+        daemon = IdleDaemon(workers=0, debounce=0)
+        self.addCleanup(daemon.close)
+        self.run_until(daemon, lambda: self.synced_count() == 3)
+        watch = daemon.watches[(self.account.pk, 'INBOX')]
+        self.run_until(daemon, lambda: watch.state == 'idle')
+
+        self.mailbox.append(build_message(4))
+        self.server.notify('INBOX')
+        self.run_until(daemon, lambda: self.synced_count() == 4)
+
+        logins = [command for command in self.server.commands if ' LOGIN ' in command]
+        self.assertEqual(len(logins), 1)
+        self.assertIn('DONE', self.server.commands)
+        self.assertEqual(watch.state, 'idle')
+
+    def test_polls_servers_without_idle(self):
+        """Test folders are polled when the server lacks IDLE"""
+        self.server.idle_supported = False
+        daemon = IdleDaemon(workers=0, poll_interval=0.1)
+        self.addCleanup(daemon.close)
+        self.run_until(daemon, lambda: self.synced_count() == 3)
+
+        self.mailbox.append(build_message(4))
+        self.run_until(daemon, lambda: self.synced_count() == 4)
+
+        self.assertFalse(any(command.endswith(' IDLE') for command in self.server.commands))
+
+    def test_idle_connections_count_against_the_host_budget(self):
+        """Test folders beyond the host's IDLE budget are not watched"""
+        self.server.mailboxes['Sent'] = FakeMailbox([])
+        self.account.sync_folders = ['INBOX', 'Sent']
+        self.account.save(update_fields=['sync_folders'])
+        limiter = IdleConnectionLimiter(limits={'127.0.0.1': 1})
+        daemon = IdleDaemon(workers=0, debounce=0, limiter=limiter)
+        self.addCleanup(daemon.close)
+        self.run_until(daemon, lambda: self.synced_count() == 3)
+
+        states = {folder: watch.state for (_, folder), watch in daemon.watches.items()}
+        self.assertEqual(states, {'INBOX': 'idle', 'Sent': 'closed'})
+        self.assertEqual(self.server.peak_connections, 1)
+        # Not every folder is watched, so the periodic sync keeps the account
+        self.account.refresh_from_db()
+        self.assertIsNone(self.account.idle_seen_at)
+
+    def test_watched_accounts_skip_the_periodic_sync(self):
+        """Test the periodic sync only runs as a safety net for watched accounts"""
+        daemon = IdleDaemon(workers=0, debounce=0)
+        self.addCleanup(daemon.close)
+        self.run_until(daemon, lambda: self.synced_count() == 3)
+        self.account.refresh_from_db()
+        self.assertIsNotNone(self.account.idle_seen_at)
+
+        # Never fully synced: the safety net sync still runs
+        with patch('apps.communication.tasks.sync_email_account.delay') as delay:
+            self.assertEqual(sync_all_active_accounts(), {'queued': 1})
+
+        EmailAccount.objects.filter(pk=self.account.pk).update(last_sync_at=timezone.now())
+        with patch('apps.communication.tasks.sync_email_account.delay') as delay:
+            self.assertEqual(sync_all_active_accounts(), {'queued': 0})
+        delay.assert_not_called()
+
+    def test_folder_syncs_count_without_overwriting_account_status(self):
+        """Test a folder sync adds to the total but keeps the account's status"""
+        EmailAccount.objects.filter(pk=self.account.pk).update(
+            total_synced=10, last_sync_status='error', last_sync_error='Sent: timed out',
+        )
+        daemon = IdleDaemon(workers=0, debounce=0)
+        self.addCleanup(daemon.close)
+        self.run_until(daemon, lambda: self.synced_count() == 3)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.total_synced, 13)
+        self.assertEqual(self.account.last_sync_status, 'error')
+        self.assertEqual(self.account.last_sync_error, 'Sent: timed out')
+
+
+class HostConnectionLimiterTests(TestCase):
+    """Test the per-host connection slots"""
+
+    def test_slots_are_capped_per_host(self):
+        """Test a host hands out at most its limit of slots"""
+        limiter = HostConnectionLimiter(limits={'imap.example.com': 2}, wait=0)
+        first = limiter.acquire('imap.example.com')
+        second = limiter.acquire('imap.example.com')
+        with self.assertRaises(HostBusy):
+            limiter.acquire('imap.example.com')
+        other = limiter.acquire('imap.other.com')
+
+        limiter.release(first)
+        third = limiter.acquire('imap.example.com')
+        for slot in (second, third, other):
+            limiter.release(slot)
+
+    def test_renewal_keeps_or_retakes_the_slot(self):
+        """Test renewing extends a held slot and retakes an expired free one"""
+        limiter = HostConnectionLimiter(limits={'imap.example.com': 1}, wait=0)
+        slot = limiter.acquire('imap.example.com')
+        self.assertTrue(limiter.renew(slot))
+
+        # The lease ran out and nobody took the slot meanwhile
+        cache.delete(slot[0])
+        self.assertTrue(limiter.renew(slot))
+        with self.assertRaises(HostBusy):
+            limiter.acquire('imap.example.com')
+
+        # The lease ran out and another connection took the slot
+        cache.delete(slot[0])
+        other = limiter.acquire('imap.example.com')
+        self.assertFalse(limiter.renew(slot))
+        limiter.release(slot)
+        self.assertEqual(cache.get(other[0]), other[1])
+        limiter.release(other)
+
 
 # =============================================================================
 # API Tests
@@ -1113,6 +1490,23 @@ class SyncedEmailAPITests(APITestCase):
         emails = response.data if isinstance(response.data, list) else response.data.get('results', [])
         self.assertEqual(len(emails), 2)
 
+    def test_list_emails_with_cursor(self):
+        """Test cursor pagination walks emails newest first"""
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse('synced-email-list')
+        response = self.client.get(url, {'cursor': '', 'page_size': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [email['id'] for email in response.data['results']], [str(self.email1.id)]
+        )
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [email['id'] for email in response.data['results']], [str(self.email2.id)]
+        )
+        self.assertIsNone(response.data['next'])
+
     def test_retrieve_email_detail(self):
         """Test retrieving full email detail"""
         self.client.force_authenticate(user=self.user)
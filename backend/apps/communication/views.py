@@ -19,6 +19,9 @@ from .serializers import (
     LinkEmailSerializer, SyncAccountSerializer,
 )
 from .email_service import CommunicationEmailService
+from .pagination import SyncedEmailCursorPagination
+from apps.projects.counters import recompute_project_counters
+from apps.common.fieldsets import SparseFieldsetViewMixin
 from .tasks import send_email_async, sync_email_account
 
 
@@ -75,11 +78,11 @@ class EmailTemplateViewSet(viewsets.ModelViewSet):
         return Response(template.get_available_variables())
 
 
-class EmailLogViewSet(viewsets.ReadOnlyModelViewSet):
+class EmailLogViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for email logs (read-only)"""
-    queryset = EmailLog.objects.select_related(
-        'project', 'template', 'sent_by'
-    ).prefetch_related('attachments')
+    queryset = EmailLog.objects.all()
+    sparse_select_related = ('project', 'template', 'sent_by')
+    sparse_prefetch_related = ('attachments',)
     serializer_class = EmailLogSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
@@ -87,7 +90,7 @@ class EmailLogViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         """Filter based on query params"""
-        queryset = super().get_queryset()
+        queryset = self.apply_sparse_fieldset(super().get_queryset())
 
         # Filter by project
         project_id = self.request.query_params.get('project_id')
@@ -438,7 +441,7 @@ class EmailAccountViewSet(viewsets.ModelViewSet):
 </html>"""
 
 
-class EmailThreadViewSet(viewsets.ReadOnlyModelViewSet):
+class EmailThreadViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     View email threads from synced accounts.
     Supports filtering by account, project, client, and starred/archived status.
@@ -446,6 +449,7 @@ class EmailThreadViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['account', 'project', 'client', 'is_starred', 'is_archived']
+    sparse_select_related = ('project', 'client')
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -453,9 +457,9 @@ class EmailThreadViewSet(viewsets.ReadOnlyModelViewSet):
         return EmailThreadSerializer
 
     def get_queryset(self):
-        return EmailThread.objects.filter(
+        return self.apply_sparse_fieldset(EmailThread.objects.filter(
             account__user=self.request.user
-        ).select_related('project', 'client')
+        ))
 
     def get_queryset_for_list(self):
         queryset = self.get_queryset()
@@ -529,10 +533,13 @@ class EmailThreadViewSet(viewsets.ReadOnlyModelViewSet):
 
         if updated:
             thread.save(update_fields=updated)
-            # Propagate to all messages in thread
+            # Propagate to all messages in thread; the bulk update skips the
+            # counter signals, so recount the projects on both sides
+            affected = set(thread.messages.values_list('project_id', flat=True))
             thread.messages.update(
                 project=thread.project, client=thread.client
             )
+            recompute_project_counters((affected | {thread.project_id}) - {None})
 
         return Response(EmailThreadSerializer(thread).data)
 
@@ -540,18 +547,23 @@ class EmailThreadViewSet(viewsets.ReadOnlyModelViewSet):
     def mark_read(self, request, pk=None):
         """Mark all messages in a thread as read"""
         thread = self.get_object()
-        thread.messages.filter(is_read=False).update(is_read=True)
+        unread = thread.messages.filter(is_read=False)
+        affected = set(unread.values_list('project_id', flat=True)) - {None}
+        unread.update(is_read=True)
+        recompute_project_counters(affected)
         thread.unread_count = 0
         thread.save(update_fields=['unread_count'])
         return Response({'unread_count': 0})
 
 
-class SyncedEmailViewSet(viewsets.ReadOnlyModelViewSet):
+class SyncedEmailViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     View individual synced emails.
     Supports filtering by account, folder, direction, project, client, read status.
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = SyncedEmailCursorPagination
+    sparse_select_related = ('project', 'client')
     filter_backends = [DjangoFilterBackend]
     filterset_fields = [
         'account', 'folder', 'direction',
@@ -564,9 +576,9 @@ class SyncedEmailViewSet(viewsets.ReadOnlyModelViewSet):
         return SyncedEmailSerializer
 
     def get_queryset(self):
-        queryset = SyncedEmail.objects.filter(
+        queryset = self.apply_sparse_fieldset(SyncedEmail.objects.filter(
             account__user=self.request.user
-        ).select_related('project', 'client')
+        ))
 
         # Search
         search = self.request.query_params.get('search')
@@ -588,6 +600,18 @@ class SyncedEmailViewSet(viewsets.ReadOnlyModelViewSet):
 
         return queryset
 
+    def retrieve(self, request, *args, **kwargs):
+        """Return an email, fetching its body first if only its headers were synced"""
+        email_obj = self.get_object()
+        if email_obj.body_status == 'pending':
+            from .host_limits import interactive_host_limiter
+            from .sync_service import fetch_pending_bodies
+            # On failure, or while syncs hold every slot of the host, the
+            # email is served as is, with body_status 'pending'
+            fetch_pending_bodies([email_obj], limiter=interactive_host_limiter)
+        serializer = self.get_serializer(email_obj)
+        return Response(serializer.data)
+
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark this email as read"""
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class ProjectsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.projects"
-    verbose_name = "Projects"
\ No newline at end of file
+    verbose_name = "Projects"
+
+    def ready(self):
+        # Import and connect signals
+        from . import signals
@@ -0,0 +1,107 @@
+"""
+Bulk project updates.
+
+A field patch is applied to many projects with one ``UPDATE`` per batch
+instead of a save (and the full signal chain) per project. The previous
+values are read with one locking ``SELECT`` per batch so the same field
+change activity the save signals would have produced can be recorded; it is
+buffered in an ``activity_batch`` and written with one ``bulk_create`` when
+the batch commits.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from apps.activity.audience import rebuild_audience
+from apps.activity.buffer import activity_batch, record_activity
+from apps.activity.formatting import (
+    format_field_value, get_action_type_for_field, get_field_verbose_name,
+)
+from apps.activity.models import ActivityLog
+
+from .models import InspectionEvent, Project
+from .stats import schedule_stats_invalidation
+
+BULK_BATCH_SIZE = 500
+
+
+def apply_bulk_patch(project_ids, patch, user=None, ip_address=None, batch_size=BULK_BATCH_SIZE):
+    """
+    Apply ``patch`` (field name -> new value) to the given projects.
+
+    Returns the number of projects whose values actually changed.
+    """
+    User = get_user_model()
+    project_ids = list(project_ids)
+    attnames = {name: Project._meta.get_field(name).attname for name in patch}
+    values = {
+        attnames[name]: value.pk if name == 'mechanical_manager' and value is not None else value
+        for name, value in patch.items()
+    }
+
+    changed_total = 0
+    for start in range(0, len(project_ids), batch_size):
+        batch = project_ids[start:start + batch_size]
+        with activity_batch():
+            rows = list(
+                Project.objects.filter(pk__in=batch).select_for_update()
+                .values('id', *attnames.values())
+            )
+
+            now = timezone.now()
+            updates = dict(values, updated_at=now)
+            if 'status' in patch:
+                updates['last_status_change'] = Case(
+                    When(~Q(status=patch['status']), then=Value(now)),
+                    default=F('last_status_change'),
+                )
+            Project.objects.filter(pk__in=batch).update(**updates)
+            # Calendar entries carry a copy of the status and manager
+            event_updates = {
+                attname: values[attname] for name, attname in attnames.items()
+                if name in ('status', 'mechanical_manager')
+            }
+            if event_updates:
+                InspectionEvent.objects.filter(project_id__in=batch).update(
+                    **event_updates, updated_at=now
+                )
+
+            managers = {}
+            if 'mechanical_manager' in patch:
+                manager_ids = {row['mechanical_manager_id'] for row in rows}
+                managers = User.objects.in_bulk(manager_ids - {None})
+
+            changed_ids = set()
+            manager_changed_ids = []
+            for row in rows:
+                for name, attname in attnames.items():
+                    old_value, new_value = row[attname], values[attname]
+                    if old_value == new_value:
+                        continue
+                    if name == 'mechanical_manager':
+                        old_value, new_value = managers.get(old_value), patch[name]
+                        manager_changed_ids.append(row['id'])
+                    changed_ids.add(row['id'])
+                    record_activity(
+                        entity_type='project',
+                        project_id=row['id'],
+                        action_type=get_action_type_for_field(name),
+                        description=(
+                            f'{get_field_verbose_name(Project, name)} changed from '
+                            f'"{format_field_value(old_value)}" to "{format_field_value(new_value)}"'
+                        ),
+                        old_value=str(old_value),
+                        new_value=str(new_value),
+                        changed_field=name,
+                        user=user,
+                        ip_address=ip_address,
+                    )
+
+            if manager_changed_ids:
+                # The manager is part of who may see a project's activity
+                rebuild_audience(ActivityLog.objects.filter(project_id__in=manager_changed_ids))
+            changed_total += len(changed_ids)
+
+    if changed_total:
+        schedule_stats_invalidation()
+    return changed_total
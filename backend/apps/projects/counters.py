@@ -0,0 +1,159 @@
+"""
+Denormalized per-project counters.
+
+``ProjectCounters`` holds a project's activity, sent email, synced email and
+unread email totals plus its latest communication time. Writers adjust them
+with ``F()`` expressions as rows are created, relinked, marked read or
+deleted; buffered activity is counted once per flush, and removing a
+project's latest email recomputes its latest communication time. Bulk
+``QuerySet.update()`` paths that bypass signals recompute the projects they
+touched. ``recompute_project_counters`` rebuilds any set of projects from the
+source tables with a few grouped aggregates.
+"""
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db.models import Count, F, Max, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Project, ProjectCounters
+
+COUNTER_FIELDS = ('activity_count', 'sent_email_count', 'synced_email_count', 'unread_email_count')
+
+RECOMPUTE_BATCH_SIZE = 1000
+
+
+def create_project_counters(project_ids):
+    """Create zeroed counter rows for newly created projects"""
+    ProjectCounters.objects.bulk_create(
+        [ProjectCounters(project_id=project_id) for project_id in project_ids],
+        ignore_conflicts=True,
+    )
+
+
+def adjust_project_counters(project_ids, last_communication_at=None, **deltas):
+    """
+    Add ``deltas`` (counter name -> amount) to the counters of ``project_ids``
+    and move ``last_communication_at`` forward if the given time is later.
+    Projects without a counter row are recomputed instead.
+    """
+    project_ids = list(dict.fromkeys(pk for pk in project_ids if pk is not None))
+    updates = {
+        # Never let a drifted counter go negative (the columns are unsigned)
+        name: F(name) + delta if delta > 0 else Greatest(F(name) + delta, Value(0))
+        for name, delta in deltas.items() if delta
+    }
+    if last_communication_at is not None:
+        updates['last_communication_at'] = Greatest(
+            Coalesce(F('last_communication_at'), Value(last_communication_at)),
+            Value(last_communication_at),
+        )
+    if not project_ids or not updates:
+        return
+    updated = ProjectCounters.objects.filter(project_id__in=project_ids).update(**updates)
+    if updated < len(project_ids):
+        existing = set(ProjectCounters.objects.filter(
+            project_id__in=project_ids
+        ).values_list('project_id', flat=True))
+        recompute_project_counters([pk for pk in project_ids if pk not in existing])
+
+
+def discount_communication(project_id, at, **deltas):
+    """
+    Subtract ``deltas`` for an email removed from ``project_id`` and, if it
+    was sent at the project's latest communication time ``at``, recompute
+    that time from the remaining emails
+    """
+    adjust_project_counters([project_id], **deltas)
+    if project_id is None or at is None:
+        return
+    if ProjectCounters.objects.filter(project_id=project_id, last_communication_at__lte=at).exists():
+        EmailLog = apps.get_model('communication', 'EmailLog')
+        SyncedEmail = apps.get_model('communication', 'SyncedEmail')
+        times = [
+            EmailLog.objects.filter(project_id=project_id).aggregate(last=Max('sent_at'))['last'],
+            SyncedEmail.objects.filter(project_id=project_id).aggregate(last=Max('date'))['last'],
+        ]
+        times = [time for time in times if time]
+        ProjectCounters.objects.filter(project_id=project_id).update(
+            last_communication_at=max(times) if times else None
+        )
+
+
+def count_new_activity(entries):
+    """Count freshly inserted ActivityLog rows towards their projects"""
+    per_project = Counter(entry.project_id for entry in entries if entry.project_id)
+    # One UPDATE per distinct increment (normally just +1 for every project)
+    by_delta = defaultdict(list)
+    for project_id, delta in per_project.items():
+        by_delta[delta].append(project_id)
+    for delta, project_ids in by_delta.items():
+        adjust_project_counters(project_ids, activity_count=delta)
+
+
+def discount_activity(queryset):
+    """Subtract the ActivityLog rows in ``queryset`` (about to be deleted)"""
+    rows = queryset.exclude(project=None).order_by().values('project').annotate(n=Count('id'))
+    by_delta = defaultdict(list)
+    for row in rows:
+        by_delta[row['n']].append(row['project'])
+    for delta, project_ids in by_delta.items():
+        adjust_project_counters(project_ids, activity_count=-delta)
+
+
+def recompute_project_counters(project_ids=None, batch_size=RECOMPUTE_BATCH_SIZE):
+    """
+    Rebuild the counters of ``project_ids`` (every project when None) from
+    the source tables. Returns the number of projects recomputed.
+    """
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+    EmailLog = apps.get_model('communication', 'EmailLog')
+    SyncedEmail = apps.get_model('communication', 'SyncedEmail')
+
+    if project_ids is None:
+        project_ids = Project.objects.order_by('pk').values_list('pk', flat=True).iterator()
+    total = 0
+    batch = []
+    for project_id in project_ids:
+        batch.append(project_id)
+        if len(batch) >= batch_size:
+            total += _recompute_batch(batch, ActivityLog, EmailLog, SyncedEmail)
+            batch = []
+    if batch:
+        total += _recompute_batch(batch, ActivityLog, EmailLog, SyncedEmail)
+    return total
+
+
+def _grouped(queryset, project_ids, **aggregates):
+    rows = queryset.filter(project_id__in=project_ids).order_by().values('project_id').annotate(**aggregates)
+    return {row.pop('project_id'): row for row in rows}
+
+
+def _recompute_batch(project_ids, ActivityLog, EmailLog, SyncedEmail):
+    activity = _grouped(ActivityLog.objects, project_ids, n=Count('id'))
+    sent = _grouped(EmailLog.objects, project_ids, n=Count('id'), last=Max('sent_at'))
+    synced = _grouped(
+        SyncedEmail.objects, project_ids,
+        n=Count('id'), unread=Count('id', filter=Q(is_read=False)), last=Max('date'),
+    )
+
+    counters = []
+    for project_id in Project.objects.filter(pk__in=project_ids).values_list('pk', flat=True):
+        sent_row = sent.get(project_id, {})
+        synced_row = synced.get(project_id, {})
+        times = [time for time in (sent_row.get('last'), synced_row.get('last')) if time]
+        counters.append(ProjectCounters(
+            project_id=project_id,
+            activity_count=activity.get(project_id, {}).get('n', 0),
+            sent_email_count=sent_row.get('n', 0),
+            synced_email_count=synced_row.get('n', 0),
+            unread_email_count=synced_row.get('unread', 0),
+            last_communication_at=max(times) if times else None,
+        ))
+    ProjectCounters.objects.bulk_create(
+        counters,
+        update_conflicts=True,
+        unique_fields=['project'],
+        update_fields=[*COUNTER_FIELDS, 'last_communication_at'],
+    )
+    return len(counters)
@@ -1,11 +1,13 @@
 import django_filters
-from django.db.models import Q
-from .models import Project
+from rest_framework import filters
+from .models import Project, matching_project_type_masks, project_type_mask
+from .search import search_projects
 
 class ProjectFilter(django_filters.FilterSet):
     search = django_filters.CharFilter(method='filter_search')
     status = django_filters.MultipleChoiceFilter(choices=Project.STATUS_CHOICES)
     project_type = django_filters.CharFilter(method='filter_project_type')
+    project_type_all = django_filters.CharFilter(method='filter_project_type')
     overdue = django_filters.BooleanFilter(method='filter_overdue')
     due_date_range = django_filters.DateFromToRangeFilter(field_name='due_date')
     created_date_range = django_filters.DateFromToRangeFilter(field_name='created_at')
@@ -20,30 +22,47 @@ class ProjectFilter(django_filters.FilterSet):
         }
     
     def filter_search(self, queryset, name, value):
-        """Search across multiple fields"""
-        return queryset.filter(
-            Q(job_number__icontains=value) |
-            Q(project_name__icontains=value) |
-            Q(client__name__icontains=value) |
-            Q(architect_designer__name__icontains=value)
-        )
+        """Ranked search over job number, name, address, client and architect"""
+        return search_projects(queryset, value)
     
     def filter_project_type(self, queryset, name, value):
-        """Filter by project type (supports multiple types)"""
+        """
+        Filter by project type codes (comma-separated): ``project_type``
+        matches any of them, ``project_type_all`` requires all of them
+        """
         if value:
-            types = [pt.strip() for pt in value.split(',')]
-            query = Q()
-            for project_type in types:
-                query |= Q(project_type__icontains=project_type)
-            return queryset.filter(query)
+            mask = project_type_mask(value.split(','))
+            return queryset.filter(project_type_mask__in=matching_project_type_masks(
+                mask, match_all=(name == 'project_type_all')
+            ))
         return queryset
     
     def filter_overdue(self, queryset, name, value):
         """Filter overdue projects"""
-        from django.utils import timezone
         if value:
-            return queryset.filter(
-                due_date__lt=timezone.now().date(),
-                status__in=['not_started', 'in_progress', 'submitted']
-            )
-        return queryset
\ No newline at end of file
+            return queryset.overdue()
+        return queryset
+
+
+class ProjectOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that orders search results by relevance unless an
+    explicit ?ordering= is given, and accepts ``days_until_due``
+    """
+
+    # ?ordering=days_until_due sorts like due_date, which the index can serve
+    field_aliases = {'days_until_due': 'due_date'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            ('-' if field.startswith('-') else '') + self.field_aliases.get(field.lstrip('-'), field.lstrip('-'))
+            for field in ordering
+        ]
+
+    def filter_queryset(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset.order_by('-search_rank', *(self.get_default_ordering(view) or []))
+        return super().filter_queryset(request, queryset, view)
@@ -0,0 +1,351 @@
+"""
+Bulk project import from CSV and XLSX spreadsheets.
+
+Files are parsed as a stream (``csv.reader`` over the upload, openpyxl in
+read-only mode) and rows are validated and written in batches:
+
+* clients, architects and managers are resolved through lookup maps loaded
+  once per import (by id, name or email; managers also by username), so a row
+  costs no queries;
+* each row is checked with the model's own field validation;
+* job numbers are reserved one block per year and batch;
+* projects and their ``project_created`` activity are written with one
+  ``bulk_create`` each per batch, every batch in its own transaction.
+
+Rows that fail validation are skipped and reported with their spreadsheet
+row number; the rest of the file is still imported. Unlike the create
+endpoint, past due dates are accepted since legacy projects carry them.
+"""
+import csv
+import io
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+
+from apps.activity.buffer import activity_batch, record_activity
+from apps.architects.models import Architect
+from apps.clients.models import Client
+
+from .models import Project, allocate_job_numbers, project_type_mask
+from .counters import create_project_counters
+from .inspections import sync_inspection_events
+from .search import build_search_document
+from .stats import schedule_stats_invalidation
+
+IMPORT_BATCH_SIZE = 1000
+
+# Columns an import file may contain: model field names, the export's
+# header labels and a few common spellings all map to a field
+IMPORT_COLUMNS = {
+    'year': 'year',
+    'job_number': 'job_number',
+    'project_name': 'project_name',
+    'name': 'project_name',
+    'project_type': 'project_type',
+    'type': 'project_type',
+    'status': 'status',
+    'current_sub_status': 'current_sub_status',
+    'current_open_items': 'current_open_items',
+    'current_action_items': 'current_action_items',
+    'client': 'client',
+    'architect_designer': 'architect_designer',
+    'architect': 'architect_designer',
+    'mechanical_manager': 'mechanical_manager',
+    'manager': 'mechanical_manager',
+    'due_date': 'due_date',
+    'due_date_note': 'due_date_note',
+    'rough_in_date': 'rough_in_date',
+    'rough_in_note': 'rough_in_note',
+    'final_inspection_date': 'final_inspection_date',
+    'final_inspection_note': 'final_inspection_note',
+    'address': 'address',
+    'legal_address': 'legal_address',
+    'billing_info': 'billing_info',
+}
+
+RELATION_FIELDS = ('client', 'architect_designer', 'mechanical_manager')
+
+STATUS_VALUES = {
+    **{label.lower(): value for value, label in Project.STATUS_CHOICES},
+    **{value: value for value, _ in Project.STATUS_CHOICES},
+}
+
+# Marks a lookup key that matches more than one row
+AMBIGUOUS = object()
+
+
+class ProjectImportError(Exception):
+    """The file as a whole cannot be imported (unknown format, missing columns)"""
+
+
+def normalize_column(header):
+    return '_'.join(str(header or '').strip().lower().replace('/', ' ').split())
+
+
+def iter_csv_rows(fileobj):
+    """Yield the rows of a CSV file (bytes or text) as lists of strings"""
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    yield from csv.reader(fileobj)
+
+
+def iter_xlsx_rows(fileobj):
+    """Yield the rows of the first sheet of an XLSX workbook as lists of cell values"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(fileobj, filename):
+    """
+    Yield ``(row_number, {field: value})`` for each non-empty data row.
+
+    The first row is the header; unrecognised columns are ignored.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        rows = iter_csv_rows(fileobj)
+    elif extension == '.xlsx':
+        rows = iter_xlsx_rows(fileobj)
+    else:
+        raise ProjectImportError('Unsupported file type. Supported: csv, xlsx')
+
+    header = next(rows, None)
+    if header is None:
+        raise ProjectImportError('The file is empty')
+    columns = [IMPORT_COLUMNS.get(normalize_column(name)) for name in header]
+    missing = {'project_name', 'client', 'address'} - set(columns)
+    if missing:
+        raise ProjectImportError(f"Missing required columns: {', '.join(sorted(missing))}")
+
+    for row_number, row in enumerate(rows, start=2):
+        values = {}
+        for field, value in zip(columns, row):
+            if field is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+            if value not in (None, ''):
+                values[field] = value
+        if values:
+            yield row_number, values
+
+
+class LookupMap:
+    """Resolve a spreadsheet reference (id or any of the given keys) to a preloaded row"""
+
+    def __init__(self, objects, keys):
+        self.by_key = {}
+        for obj in objects:
+            self._add(str(obj.pk), obj)
+            for key in keys(obj):
+                if key:
+                    self._add(str(key).strip().lower(), obj)
+
+    def _add(self, key, obj):
+        existing = self.by_key.get(key)
+        self.by_key[key] = obj if existing in (None, obj) else AMBIGUOUS
+
+    def resolve(self, reference):
+        key = str(reference).strip().lower()
+        if isinstance(reference, float) and reference.is_integer():
+            key = str(int(reference))
+        obj = self.by_key.get(key)
+        if obj is None:
+            raise ValidationError(f'No match for "{reference}"')
+        if obj is AMBIGUOUS:
+            raise ValidationError(f'"{reference}" matches more than one record; use the id or email')
+        return obj
+
+
+def build_lookup_maps():
+    """Load every client, architect and manager once for the whole import"""
+    User = get_user_model()
+    return {
+        'client': LookupMap(
+            Client.objects.only('id', 'name', 'company_name', 'contact_email'),
+            lambda client: [client.name, client.contact_email],
+        ),
+        'architect_designer': LookupMap(
+            Architect.objects.only('id', 'name', 'company_name', 'contact_email'),
+            lambda architect: [architect.name, architect.contact_email],
+        ),
+        'mechanical_manager': LookupMap(
+            User.objects.filter(role__in=['manager', 'employee']).only(
+                'id', 'username', 'email', 'first_name', 'last_name'
+            ),
+            lambda user: [user.username, user.email, user.get_full_name()],
+        ),
+    }
+
+
+class ProjectImporter:
+    """
+    Import projects row by row, writing them in batches.
+
+    ``default_manager`` is used for rows without a manager, mirroring the
+    create endpoint, which assigns the requesting manager or employee.
+    """
+
+    def __init__(self, user=None, ip_address=None, default_manager=None, batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.ip_address = ip_address
+        self.default_manager = default_manager
+        self.batch_size = batch_size
+        self.lookups = build_lookup_maps()
+        self.seen_job_numbers = set()
+        self.created = 0
+        self.total_rows = 0
+        self.errors = []
+
+    def run(self, rows):
+        """Import ``(row_number, values)`` pairs and return the report"""
+        batch = []
+        for row_number, values in rows:
+            self.total_rows += 1
+            project = self.build_project(row_number, values)
+            if project is not None:
+                batch.append((row_number, project))
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+        if self.created:
+            schedule_stats_invalidation()
+        return self.report()
+
+    def report(self):
+        return {
+            'total_rows': self.total_rows,
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+    def add_error(self, row_number, errors):
+        self.errors.append({'row': row_number, 'errors': errors})
+
+    def build_project(self, row_number, values):
+        """Validate one row and return an unsaved Project, or None after recording its errors"""
+        errors = {}
+        related = {}
+        for field in RELATION_FIELDS:
+            if field in values:
+                try:
+                    related[field] = self.lookups[field].resolve(values.pop(field))
+                except ValidationError as e:
+                    errors[field] = e.messages
+        if 'mechanical_manager' not in related and 'mechanical_manager' not in errors:
+            if self.default_manager is None:
+                errors['mechanical_manager'] = ['This field is required.']
+            else:
+                related['mechanical_manager'] = self.default_manager
+
+        if 'project_type' in values:
+            types = [code.strip() for code in str(values['project_type']).split(',') if code.strip()]
+            invalid = [code for code in types if code not in Project.PROJECT_TYPE_BITS]
+            if invalid:
+                errors['project_type'] = [f"Invalid project type: {', '.join(invalid)}"]
+            values['project_type'] = ','.join(types)
+        if 'status' in values:
+            values['status'] = STATUS_VALUES.get(str(values['status']).lower(), values['status'])
+        for field in ('year', 'job_number'):
+            if isinstance(values.get(field), float) and values[field].is_integer():
+                values[field] = int(values[field])
+        if 'job_number' in values:
+            values['job_number'] = str(values['job_number'])
+            if values['job_number'] in self.seen_job_numbers:
+                errors['job_number'] = ['Duplicate job number in this file.']
+            self.seen_job_numbers.add(values['job_number'])
+
+        # Rows without a job number are numbered at write time
+        project = Project(**values, **related)
+        try:
+            project.clean_fields(exclude=['job_number', *RELATION_FIELDS, *errors])
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        if errors:
+            self.add_error(row_number, errors)
+            return None
+        return project
+
+    def write_batch(self, batch):
+        """Number and insert one batch of validated projects in a single transaction"""
+        provided = [project.job_number for _, project in batch if project.job_number]
+        taken = set(Project.objects.filter(job_number__in=provided).values_list('job_number', flat=True))
+        pending = []
+        for row_number, project in batch:
+            if project.job_number in taken:
+                self.add_error(row_number, {'job_number': ['A project with this job number already exists.']})
+            else:
+                pending.append((row_number, project))
+        if not pending:
+            return
+
+        try:
+            with activity_batch():
+                self.assign_job_numbers([project for _, project in pending])
+                projects = []
+                for _, project in pending:
+                    # bulk_create bypasses Project.save, which maintains these
+                    project.project_type_mask = project_type_mask(project.get_project_types_list())
+                    project.search_document = build_search_document(project)
+                    projects.append(project)
+                Project.objects.bulk_create(projects)
+                create_project_counters([project.pk for project in projects])
+                sync_inspection_events(projects)
+                for project in projects:
+                    record_activity(
+                        entity_type='project',
+                        project_id=project.pk,
+                        action_type='project_created',
+                        description=f'Project {project.job_number} was created',
+                        user=self.user,
+                        ip_address=self.ip_address,
+                    )
+        except IntegrityError as e:
+            # A concurrent create took one of the provided job numbers
+            for row_number, _ in pending:
+                self.add_error(row_number, {'non_field_errors': [str(e)]})
+            return
+        self.created += len(projects)
+
+    def assign_job_numbers(self, projects):
+        """Give every project without a job number one from its year's block"""
+        by_year = {}
+        for project in projects:
+            if not project.job_number:
+                by_year.setdefault(project.year, []).append(project)
+        for year, unnumbered in by_year.items():
+            numbers = []
+            while len(numbers) < len(unnumbered):
+                # Skip numbers the file itself assigns to rows not yet written
+                numbers += [
+                    job_number
+                    for job_number in allocate_job_numbers(year, len(unnumbered) - len(numbers))
+                    if job_number not in self.seen_job_numbers
+                ]
+            for project, job_number in zip(unnumbered, numbers):
+                project.job_number = job_number
+
+
+def import_projects(fileobj, filename, user=None, ip_address=None, default_manager=None,
+                    batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import projects from a CSV or XLSX file and return the report
+    (``total_rows``, ``created``, ``failed`` and per-row ``errors``).
+
+    Raises ProjectImportError when the file itself cannot be read.
+    """
+    importer = ProjectImporter(
+        user=user, ip_address=ip_address, default_manager=default_manager, batch_size=batch_size,
+    )
+    return importer.run(iter_import_rows(fileobj, filename))
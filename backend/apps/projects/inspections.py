@@ -0,0 +1,197 @@
+"""
+Inspection calendar.
+
+A project's rough-in and final inspection dates are mirrored into
+``InspectionEvent`` rows, one per scheduled inspection, together with the
+project's status and manager. Calendar queries are then a range scan on
+``(manager|kind|status, date)`` indexes instead of an OR across two nullable
+project columns.
+
+Field staff subscribe to an iCal feed addressed by a signed per-user token
+(calendar apps cannot send our auth header). The token carries the user's
+feed key, so issuing a new key revokes every earlier feed URL. Its ETag is derived from the
+number and last change of the events in the feed, so an unchanged calendar
+is answered with a 304 after one aggregate query.
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import InspectionEvent, InspectionFeedKey, new_feed_key
+
+# kind -> (date field, note field) on Project
+INSPECTION_FIELDS = {
+    'rough_in': ('rough_in_date', 'rough_in_note'),
+    'final': ('final_inspection_date', 'final_inspection_note'),
+}
+
+# Project fields copied into, deciding the existence of, or shown with
+# (and so versioning the feed ETag of) inspection events
+INSPECTION_SOURCE_FIELDS = (
+    'rough_in_date', 'rough_in_note', 'final_inspection_date', 'final_inspection_note',
+    'status', 'mechanical_manager', 'job_number', 'project_name', 'address',
+)
+
+# Longest range a calendar request may span
+MAX_CALENDAR_DAYS = 366
+
+# Window of the iCal feed around today
+FEED_PAST_DAYS = 30
+FEED_FUTURE_DAYS = 365
+
+FEED_TOKEN_SALT = 'projects.inspections.feed'
+
+
+def sync_inspection_events(projects):
+    """Create, update or delete the inspection events of ``projects``"""
+    events = []
+    cleared = {}
+    for project in projects:
+        for kind, (date_field, note_field) in INSPECTION_FIELDS.items():
+            date = getattr(project, date_field)
+            if date is None:
+                cleared.setdefault(kind, []).append(project.pk)
+                continue
+            events.append(InspectionEvent(
+                project_id=project.pk,
+                kind=kind,
+                date=date,
+                note=getattr(project, note_field),
+                status=project.status,
+                mechanical_manager_id=project.mechanical_manager_id,
+            ))
+
+    for kind, project_ids in cleared.items():
+        InspectionEvent.objects.filter(kind=kind, project_id__in=project_ids).delete()
+    if events:
+        InspectionEvent.objects.bulk_create(
+            events,
+            update_conflicts=True,
+            unique_fields=['project', 'kind'],
+            update_fields=['date', 'note', 'status', 'mechanical_manager', 'updated_at'],
+        )
+
+
+def calendar_events(queryset, start, end, managers=None, kinds=None, statuses=None):
+    """Return the events of ``queryset`` between ``start`` and ``end`` (inclusive)"""
+    queryset = queryset.filter(date__range=(start, end))
+    if managers:
+        queryset = queryset.filter(mechanical_manager__in=managers)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset.select_related('project', 'mechanical_manager').only(
+        'id', 'kind', 'date', 'note', 'status', 'updated_at',
+        'project__id', 'project__job_number', 'project__project_name', 'project__address',
+        'mechanical_manager__id', 'mechanical_manager__first_name', 'mechanical_manager__last_name',
+        'mechanical_manager__username',
+    )
+
+
+def feed_events(user):
+    """
+    Events in a user's personal feed: managers and employees get the
+    inspections of projects they manage, clients and architects those of
+    their own projects, admins every inspection
+    """
+    events = InspectionEvent.objects.all()
+    if user.role in ['manager', 'employee']:
+        return events.filter(mechanical_manager=user)
+    if user.role == 'admin':
+        return events
+    if user.role == 'client':
+        return events.filter(project__client__user_account=user)
+    if user.role == 'architect':
+        return events.filter(project__architect_designer__user_account=user)
+    return events.none()
+
+
+def feed_window(today=None):
+    today = today or timezone.now().date()
+    return today - timedelta(days=FEED_PAST_DAYS), today + timedelta(days=FEED_FUTURE_DAYS)
+
+
+def make_feed_token(user, rotate=False):
+    """Return the user's feed token; ``rotate`` revokes the earlier ones first"""
+    if rotate:
+        feed_key, _ = InspectionFeedKey.objects.update_or_create(
+            user=user, defaults={'key': new_feed_key()}
+        )
+    else:
+        feed_key, _ = InspectionFeedKey.objects.get_or_create(user=user)
+    return signing.dumps([user.pk, feed_key.key], salt=FEED_TOKEN_SALT)
+
+
+def read_feed_token(token):
+    """Return the active user a feed token was issued for, or None if it is invalid or revoked"""
+    try:
+        user_id, key = signing.loads(token, salt=FEED_TOKEN_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    feed_key = InspectionFeedKey.objects.select_related('user').filter(
+        user_id=user_id, key=key, user__is_active=True
+    ).first()
+    return feed_key.user if feed_key else None
+
+
+def feed_etag(queryset, user, start):
+    """ETag of a feed: changes whenever an event in it is added, changed or removed"""
+    state = queryset.aggregate(count=Count('id'), changed=Max('updated_at'))
+    key = f"{user.pk}:{start}:{state['count']}:{state['changed'] and state['changed'].isoformat()}"
+    return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def _escape(value):
+    return (
+        str(value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    # Content lines are limited to 75 octets; continuations start with a space
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        chunk = encoded[:limit]
+        # Do not split a multi-byte character
+        while chunk and (encoded[len(chunk):len(chunk) + 1] or b'\x00')[0] & 0xC0 == 0x80:
+            chunk = chunk[:-1]
+        parts.append(chunk.decode())
+        encoded = encoded[len(chunk):]
+    return '\r\n '.join(parts)
+
+
+def render_ical(events, name='Inspections'):
+    """Render events as an iCalendar (RFC 5545) document of all-day entries"""
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//KeenEng CRM//Inspections//EN',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ]
+    for event in events:
+        project = event.project
+        stamp = event.updated_at.astimezone(dt_timezone.utc) if event.updated_at else timezone.now()
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:inspection-{project.pk}-{event.kind}@keeneng-crm',
+            f'DTSTAMP:{stamp:%Y%m%dT%H%M%SZ}',
+            f'DTSTART;VALUE=DATE:{event.date:%Y%m%d}',
+            f'DTEND;VALUE=DATE:{event.date + timedelta(days=1):%Y%m%d}',
+            f'SUMMARY:{_escape(f"{event.get_kind_display()}: {project.job_number} {project.project_name}")}',
+            f'LOCATION:{_escape(project.address)}',
+        ]
+        if event.note:
+            lines.append(f'DESCRIPTION:{_escape(event.note)}')
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
@@ -0,0 +1,74 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects.importer import IMPORT_BATCH_SIZE, ProjectImportError, import_projects
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports projects from a CSV or XLSX file, skipping rows that fail '
+        'validation and reporting them by row number'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument(
+            '--user',
+            help='Username recorded as the creator in the activity log',
+        )
+        parser.add_argument(
+            '--default-manager',
+            help='Username or email of the manager for rows without one',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Number of rows written per transaction',
+        )
+        parser.add_argument(
+            '--report',
+            help='Write the per-row error report to this JSON file',
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        default_manager = self.get_user(options['default_manager'])
+
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                report = import_projects(
+                    fileobj, options['path'],
+                    user=user,
+                    default_manager=default_manager,
+                    batch_size=options['batch_size'],
+                )
+        except (OSError, ProjectImportError) as e:
+            raise CommandError(str(e))
+
+        if options['report']:
+            with open(options['report'], 'w') as output:
+                json.dump(report, output, indent=2, default=str)
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {error['errors']}"))
+        if report['failed'] > 20:
+            self.stdout.write(f"... {report['failed'] - 20} more rows failed")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} of {report['total_rows']} rows "
+            f"({report['failed']} failed)."
+        ))
+
+    def get_user(self, reference):
+        if not reference:
+            return None
+        user = User.objects.filter(username=reference).first() or User.objects.filter(
+            email__iexact=reference
+        ).first()
+        if user is None:
+            raise CommandError(f'User "{reference}" not found')
+        return user
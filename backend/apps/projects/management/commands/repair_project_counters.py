@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.projects.counters import RECOMPUTE_BATCH_SIZE, recompute_project_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the denormalized per-project activity and email counters '
+        'from the source tables'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'project_ids',
+            nargs='*',
+            type=int,
+            help='Projects to repair (all projects when omitted)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECOMPUTE_BATCH_SIZE,
+            help='Number of projects recomputed per round of aggregate queries',
+        )
+
+    def handle(self, *args, **options):
+        total = recompute_project_counters(
+            options['project_ids'] or None, batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Recomputed counters for {total} projects.'))
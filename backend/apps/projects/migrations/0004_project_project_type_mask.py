@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+# Bit per type, in Project.PROJECT_TYPE_CHOICES order (frozen here so the
+# migration does not depend on the current model)
+PROJECT_TYPE_BITS = {
+    'M': 1 << 0,
+    'E': 1 << 1,
+    'P': 1 << 2,
+    'EM': 1 << 3,
+    'FP': 1 << 4,
+    'TI': 1 << 5,
+    'VI': 1 << 6,
+}
+
+BATCH_SIZE = 2000
+
+
+def backfill_project_type_mask(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+
+    batch = []
+    projects = Project.objects.only('id', 'project_type').order_by('id')
+    for project in projects.iterator(chunk_size=BATCH_SIZE):
+        mask = 0
+        for project_type in (project.project_type or '').split(','):
+            mask |= PROJECT_TYPE_BITS.get(project_type.strip(), 0)
+        if mask:
+            project.project_type_mask = mask
+            batch.append(project)
+        if len(batch) >= BATCH_SIZE:
+            Project.objects.bulk_update(batch, ['project_type_mask'])
+            batch = []
+    if batch:
+        Project.objects.bulk_update(batch, ['project_type_mask'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0003_alter_project_year"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="project_type_mask",
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_project_type_mask, migrations.RunPython.noop),
+    ]
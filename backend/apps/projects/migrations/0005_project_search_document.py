@@ -0,0 +1,72 @@
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Index expressions must match apps/projects/search.py
+SEARCH_INDEXES = (
+    ('projects_project_search_tsv',
+     'USING GIN (to_tsvector(\'simple\', "search_document"))'),
+    ('projects_project_search_trgm',
+     'USING GIN ("search_document" gin_trgm_ops)'),
+    ('projects_project_job_number_prefix',
+     '("job_number" varchar_pattern_ops)'),
+)
+
+
+def _names(entity):
+    if entity is None:
+        return []
+    return [entity.name, entity.company_name]
+
+
+def backfill_search_document(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+
+    batch = []
+    projects = Project.objects.select_related('client', 'architect_designer').order_by('id')
+    for project in projects.iterator(chunk_size=BATCH_SIZE):
+        parts = [project.job_number, project.project_name, project.address]
+        parts += _names(project.client) + _names(project.architect_designer)
+        text = ' '.join(part for part in parts if part)
+        project.search_document = ' '.join(re.findall(r'\w+', text.lower()))
+        batch.append(project)
+        if len(batch) >= BATCH_SIZE:
+            Project.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Project.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "projects_project" {definition}'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0004_project_project_type_mask"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0005_project_search_document"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobNumberSequence",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("year", models.IntegerField(unique=True)),
+                ("last_value", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0006_jobnumbersequence"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("status__in", ["not_started", "in_progress", "submitted"])),
+                fields=["due_date"],
+                name="project_active_due_date_idx",
+            ),
+        ),
+    ]
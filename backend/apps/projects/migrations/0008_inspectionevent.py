@@ -0,0 +1,72 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# kind -> (date field, note field); must match apps/projects/inspections.py
+INSPECTION_FIELDS = {
+    'rough_in': ('rough_in_date', 'rough_in_note'),
+    'final': ('final_inspection_date', 'final_inspection_note'),
+}
+
+
+def backfill_inspection_events(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    InspectionEvent = apps.get_model('projects', 'InspectionEvent')
+
+    batch = []
+    for kind, (date_field, note_field) in INSPECTION_FIELDS.items():
+        rows = Project.objects.filter(**{f'{date_field}__isnull': False}).values_list(
+            'id', date_field, note_field, 'status', 'mechanical_manager_id'
+        ).order_by('id')
+        for project_id, date, note, status, manager_id in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(InspectionEvent(
+                project_id=project_id,
+                kind=kind,
+                date=date,
+                note=note,
+                status=status,
+                mechanical_manager_id=manager_id,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                InspectionEvent.objects.bulk_create(batch)
+                batch = []
+    if batch:
+        InspectionEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("projects", "0007_project_active_due_date_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InspectionEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("rough_in", "Rough-in Inspection"), ("final", "Final Inspection")], max_length=20)),
+                ("date", models.DateField()),
+                ("note", models.TextField(blank=True, null=True)),
+                ("status", models.CharField(choices=[("not_started", "Not Started"), ("in_progress", "In Progress"), ("submitted", "Submitted"), ("completed", "Completed"), ("closed_paid", "Closed & Paid"), ("cancelled", "Cancelled / Voided"), ("on_hold", "On Hold")], max_length=20)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("mechanical_manager", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="inspection_events", to=settings.AUTH_USER_MODEL)),
+                ("project", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="inspection_events", to="projects.project")),
+            ],
+            options={
+                "ordering": ["date", "kind", "project"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("project", "kind"), name="inspection_event_project_kind_uniq"),
+                ],
+                "indexes": [
+                    models.Index(fields=["date"], name="inspection_event_date_idx"),
+                    models.Index(fields=["mechanical_manager", "date"], name="inspection_event_mgr_date_idx"),
+                    models.Index(fields=["kind", "date"], name="inspection_event_kind_date_idx"),
+                    models.Index(fields=["status", "date"], name="inspection_event_status_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_inspection_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("architects", "0001_initial"),
+        ("clients", "0001_initial"),
+        ("projects", "0008_inspectionevent"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["due_date"], name="project_due_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["-created_at", "-id"], name="project_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["status", "-created_at"], name="project_status_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["mechanical_manager", "-created_at"], name="project_manager_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["client", "-created_at"], name="project_client_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["architect_designer", "-created_at"], name="project_architect_created_idx"),
+        ),
+        # The composites above lead with these columns, so the single-column
+        # foreign key indexes are redundant
+        migrations.AlterField(
+            model_name="project",
+            name="client",
+            field=models.ForeignKey(
+                db_index=False, on_delete=django.db.models.deletion.PROTECT, to="clients.client"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="project",
+            name="architect_designer",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="architects.architect",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="project",
+            name="mechanical_manager",
+            field=models.ForeignKey(
+                db_index=False,
+                limit_choices_to={"role": "manager"},
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="managed_projects",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+BATCH_SIZE = 1000
+
+
+def _grouped(queryset, project_ids, **aggregates):
+    rows = queryset.filter(project_id__in=project_ids).order_by().values('project_id').annotate(**aggregates)
+    return {row.pop('project_id'): row for row in rows}
+
+
+def backfill_project_counters(apps, schema_editor):
+    # Mirrors apps/projects/counters.py recompute_project_counters
+    Project = apps.get_model('projects', 'Project')
+    ProjectCounters = apps.get_model('projects', 'ProjectCounters')
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+    EmailLog = apps.get_model('communication', 'EmailLog')
+    SyncedEmail = apps.get_model('communication', 'SyncedEmail')
+
+    project_ids = list(Project.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(project_ids), BATCH_SIZE):
+        batch = project_ids[start:start + BATCH_SIZE]
+        activity = _grouped(ActivityLog.objects, batch, n=Count('id'))
+        sent = _grouped(EmailLog.objects, batch, n=Count('id'), last=Max('sent_at'))
+        synced = _grouped(
+            SyncedEmail.objects, batch,
+            n=Count('id'), unread=Count('id', filter=Q(is_read=False)), last=Max('date'),
+        )
+        counters = []
+        for project_id in batch:
+            sent_row = sent.get(project_id, {})
+            synced_row = synced.get(project_id, {})
+            times = [time for time in (sent_row.get('last'), synced_row.get('last')) if time]
+            counters.append(ProjectCounters(
+                project_id=project_id,
+                activity_count=activity.get(project_id, {}).get('n', 0),
+                sent_email_count=sent_row.get('n', 0),
+                synced_email_count=synced_row.get('n', 0),
+                unread_email_count=synced_row.get('unread', 0),
+                last_communication_at=max(times) if times else None,
+            ))
+        ProjectCounters.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("activity", "0006_partition_activitylog"),
+        ("communication", "0003_emailaccount_emailthread_synccursor_syncedemail_and_more"),
+        ("projects", "0009_project_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectCounters",
+            fields=[
+                ("project", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="counters", serialize=False, to="projects.project")),
+                ("activity_count", models.PositiveIntegerField(default=0)),
+                ("sent_email_count", models.PositiveIntegerField(default=0)),
+                ("synced_email_count", models.PositiveIntegerField(default=0)),
+                ("unread_email_count", models.PositiveIntegerField(default=0)),
+                ("last_communication_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_project_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_projectcounters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='job_number',
+            field=models.CharField(editable=False, max_length=50, unique=True),
+        ),
+    ]
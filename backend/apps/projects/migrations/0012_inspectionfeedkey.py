@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:55
+
+import apps.projects.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0011_alter_project_job_number'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InspectionFeedKey',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inspection_feed_key', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('key', models.CharField(default=apps.projects.models.new_feed_key, max_length=32)),
+                ('rotated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,25 +1,126 @@
-from django.db import models
+import secrets
+
+from django.db import models, transaction
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
 
-import random
-import string
+from apps.activity.tracker import FieldTrackerMixin
+
+from .search import SEARCH_DOCUMENT_FIELDS, build_search_document
+
+# Job numbers are YYYY-XXXX; past 9999 a year keeps counting with a wider
+# suffix (2026-10000) rather than wrapping or failing
+JOB_NUMBER_DIGITS = 4
 
 def default_due_date():
     return timezone.now().date() + timedelta(weeks=2)
 
+def format_job_number(year, number):
+    return f"{year}-{number:0{JOB_NUMBER_DIGITS}d}"
+
+def allocate_job_numbers(year, count=1):
+    """
+    Reserve ``count`` consecutive unused job numbers for ``year``.
+
+    Numbers come from the year's JobNumberSequence row, which is locked for
+    the duration of the allocation so concurrent creates never collide. One
+    extra query skips numbers already taken by projects created before the
+    sequence existed (the old allocator picked random suffixes). Reserving a
+    block up front lets bulk imports number many projects with one allocation.
+    """
+    with transaction.atomic():
+        sequence, _ = JobNumberSequence.objects.select_for_update().get_or_create(year=year)
+        allocated = []
+        while len(allocated) < count:
+            start = sequence.last_value + 1
+            sequence.last_value += count - len(allocated)
+            candidates = [
+                format_job_number(year, number)
+                for number in range(start, sequence.last_value + 1)
+            ]
+            taken = set(Project.objects.filter(job_number__in=candidates).values_list(
+                'job_number', flat=True
+            ))
+            allocated += [job_number for job_number in candidates if job_number not in taken]
+        sequence.save(update_fields=['last_value'])
+    return allocated
+
 def generate_job_number():
     """Generate a unique job number in format: YYYY-XXXX"""
-    year = timezone.now().year
-    # Try to find an available job number
-    while True:
-        random_part = ''.join(random.choices(string.digits, k=4))
-        job_number = f"{year}-{random_part}"
-        if not Project.objects.filter(job_number=job_number).exists():
-            return job_number
-
-class Project(models.Model):
+    return allocate_job_numbers(timezone.now().year)[0]
+
+class ProjectQuerySet(models.QuerySet):
+    """Due-date predicates shared by the list filters, actions and dashboard"""
+
+    @staticmethod
+    def overdue_condition(today=None):
+        today = today or timezone.now().date()
+        return models.Q(due_date__lt=today, status__in=Project.ACTIVE_STATUSES)
+
+    @staticmethod
+    def due_soon_condition(today=None, days=7):
+        today = today or timezone.now().date()
+        return models.Q(
+            due_date__range=[today, today + timedelta(days=days)],
+            status__in=Project.ACTIVE_STATUSES,
+        )
+
+    def overdue(self):
+        return self.filter(self.overdue_condition())
+
+    def due_soon(self, days=7):
+        return self.filter(self.due_soon_condition(days=days))
+
+    def with_due_info(self):
+        """
+        Annotate ``overdue`` and ``time_until_due`` (a timedelta) computed in
+        SQL against today's date; is_overdue/days_until_due read them
+        """
+        today = timezone.now().date()
+        return self.annotate(
+            overdue=models.Case(
+                models.When(self.overdue_condition(today), then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            time_until_due=models.ExpressionWrapper(
+                models.F('due_date') - models.Value(today, output_field=models.DateField()),
+                output_field=models.DurationField(),
+            ),
+        )
+
+class JobNumberSequence(models.Model):
+    """Last job number handed out per year (see allocate_job_numbers)"""
+    year = models.IntegerField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+
+def project_type_mask(types):
+    """Return the bitmask for an iterable of project type codes (unknown codes are ignored)"""
+    mask = 0
+    for project_type in types:
+        mask |= Project.PROJECT_TYPE_BITS.get(project_type.strip(), 0)
+    return mask
+
+def matching_project_type_masks(mask, match_all=False):
+    """
+    Return every stored mask value that contains any (or all) of ``mask``'s bits.
+
+    There are only 2**len(PROJECT_TYPE_CHOICES) possible masks, so a type
+    filter becomes ``project_type_mask IN (...)``, which the index on the
+    column can serve, instead of a bitwise expression over every row.
+    """
+    if not mask:
+        return []
+    return [
+        value for value in range(1, 1 << len(Project.PROJECT_TYPE_CHOICES))
+        if (value & mask == mask if match_all else value & mask)
+    ]
+
+class Project(FieldTrackerMixin, models.Model):
     # Project Type Choices with multiple selection capability
     PROJECT_TYPE_CHOICES = [
         ('M', 'Mechanical'),
@@ -30,6 +131,8 @@ class Project(models.Model):
         ('TI', 'Tenant Improvement'),
         ('VI', 'Verification Pending'),
     ]
+    # One bit per type, in PROJECT_TYPE_CHOICES order (never reorder: stored in project_type_mask)
+    PROJECT_TYPE_BITS = {code: 1 << index for index, (code, _) in enumerate(PROJECT_TYPE_CHOICES)}
     
     # Status Choices
     STATUS_CHOICES = [
@@ -41,19 +144,24 @@ class Project(models.Model):
         ('cancelled', 'Cancelled / Voided'),
         ('on_hold', 'On Hold'),
     ]
+    # Statuses that can still become overdue
+    ACTIVE_STATUSES = ['not_started', 'in_progress', 'submitted']
     
     # Basic Information
     year = models.IntegerField(default=timezone.now().year)
+    # Allocated by save() when the project is first inserted, so unsaved
+    # instances (form and serializer validation) never use up a number
     job_number = models.CharField(
         max_length=50, 
         unique=True,
-        default=generate_job_number,  # Add this line
         editable=False  # Prevents manual editing
     )
     project_name = models.CharField(max_length=255)
     
     # Project Type (multiple selection using CharField with comma-separated values)
     project_type = models.CharField(max_length=50, help_text="Comma-separated types: M,E,P,EM,FP,TI,VI")
+    # Bitmask of project_type (see PROJECT_TYPE_BITS), kept in sync on save and used for filtering
+    project_type_mask = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
     
     # Status Information
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='not_started')
@@ -62,11 +170,13 @@ class Project(models.Model):
     current_action_items = models.TextField(blank=True, null=True)
     
     # Relationships
-    client = models.ForeignKey('clients.Client', on_delete=models.PROTECT)
-    architect_designer = models.ForeignKey('architects.Architect', on_delete=models.SET_NULL, null=True, blank=True)
+    # Indexed through the (relation, -created_at) composites in Meta.indexes
+    client = models.ForeignKey('clients.Client', on_delete=models.PROTECT, db_index=False)
+    architect_designer = models.ForeignKey('architects.Architect', on_delete=models.SET_NULL, null=True, blank=True,
+                                           db_index=False)
     mechanical_manager = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT,
                                           limit_choices_to={'role': 'manager'},
-                                          related_name='managed_projects')
+                                          related_name='managed_projects', db_index=False)
     
     # uncomment when all clients and architects supposed to be users
     # client = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, 
@@ -96,17 +206,37 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     last_status_change = models.DateTimeField(auto_now_add=True)
+
+    # Lower-cased job number, name, address and client/architect names (see search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    # Fields snapshotted on load for activity change tracking
+    tracked_fields = [
+        'year', 'job_number', 'project_name', 'project_type', 'status',
+        'current_sub_status', 'current_open_items', 'current_action_items',
+        'client', 'architect_designer', 'mechanical_manager',
+        'due_date', 'due_date_note', 'rough_in_date', 'rough_in_note',
+        'final_inspection_date', 'final_inspection_note',
+        'address', 'legal_address', 'billing_info',
+    ]
     
+    objects = ProjectQuerySet.as_manager()
+
     @property
     def is_overdue(self):
         """Check if project is overdue"""
-        if self.due_date and self.status in ['not_started', 'in_progress', 'submitted']:
+        if 'overdue' in self.__dict__:
+            # Annotated by ProjectQuerySet.with_due_info()
+            return self.overdue
+        if self.due_date and self.status in self.ACTIVE_STATUSES:
             return self.due_date < timezone.now().date()
         return False
 
     @property
     def days_until_due(self):
         """Calculate days until due date"""
+        if 'time_until_due' in self.__dict__:
+            return self.time_until_due.days if self.time_until_due is not None else None
         if self.due_date:
             delta = self.due_date - timezone.now().date()
             return delta.days
@@ -127,10 +257,128 @@ class Project(models.Model):
     def set_project_types(self, types_list):
         """Set project types from a list"""
         self.project_type = ','.join(types_list)
+        self.project_type_mask = project_type_mask(types_list)
     
     def has_project_type(self, project_type):
         """Check if project has specific type"""
         return project_type in self.get_project_types_list()
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.job_number:
+            self.job_number = generate_job_number()
+        # Keep the filterable bitmask in step with the comma-separated types
+        if 'project_type' in self.__dict__:
+            self.project_type_mask = project_type_mask(self.get_project_types_list())
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'project_type' in update_fields:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'project_type_mask'}
+
+        if self._search_document_stale(update_fields):
+            self.search_document = build_search_document(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'search_document'}
+        super().save(*args, **kwargs)
+
+    def _search_document_stale(self, update_fields):
+        """
+        Whether a save must rebuild the search document: on create, or when
+        a field feeding it is saved with a new value. Other saves leave it
+        alone, so they never load the client or architect just to rebuild it.
+        """
+        if self._state.adding:
+            return True
+        if update_fields is not None:
+            return any(name in update_fields for name in SEARCH_DOCUMENT_FIELDS)
+        return any(name in SEARCH_DOCUMENT_FIELDS for name in self.changed_fields())
     
     class Meta:
-        ordering = ['-year', 'job_number']
\ No newline at end of file
+        ordering = ['-year', 'job_number']
+        # Derived from the list endpoint's access paths: role scoping and
+        # ProjectFilter narrow by one of these columns, then the default
+        # ordering (and keyset pagination) reads newest first. The query plan
+        # tests in tests.py check each combination on PostgreSQL.
+        indexes = [
+            # Overdue / due-soon lookups only ever consider active projects
+            models.Index(
+                fields=['due_date'],
+                name='project_active_due_date_idx',
+                condition=models.Q(status__in=['not_started', 'in_progress', 'submitted']),
+            ),
+            models.Index(fields=['due_date'], name='project_due_date_idx'),
+            models.Index(fields=['-created_at', '-id'], name='project_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='project_status_created_idx'),
+            models.Index(fields=['mechanical_manager', '-created_at'], name='project_manager_created_idx'),
+            models.Index(fields=['client', '-created_at'], name='project_client_created_idx'),
+            models.Index(fields=['architect_designer', '-created_at'], name='project_architect_created_idx'),
+        ]
+
+class InspectionEvent(models.Model):
+    """
+    One row per scheduled project inspection, kept in step with the
+    project's inspection dates (see inspections.py). The project's status
+    and manager are copied here so calendar filters stay on this table's
+    indexes.
+    """
+    KIND_CHOICES = [
+        ('rough_in', 'Rough-in Inspection'),
+        ('final', 'Final Inspection'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='inspection_events')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    date = models.DateField()
+    note = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Project.STATUS_CHOICES)
+    mechanical_manager = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                           related_name='inspection_events')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.date} ({self.project_id})"
+
+    class Meta:
+        ordering = ['date', 'kind', 'project']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'kind'], name='inspection_event_project_kind_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='inspection_event_date_idx'),
+            models.Index(fields=['mechanical_manager', 'date'], name='inspection_event_mgr_date_idx'),
+            models.Index(fields=['kind', 'date'], name='inspection_event_kind_date_idx'),
+            models.Index(fields=['status', 'date'], name='inspection_event_status_idx'),
+        ]
+
+
+def new_feed_key():
+    return secrets.token_hex(16)
+
+class InspectionFeedKey(models.Model):
+    """
+    Per-user secret signed into iCal feed tokens (see inspections.py);
+    replacing it revokes every feed URL issued before
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+                                related_name='inspection_feed_key')
+    key = models.CharField(max_length=32, default=new_feed_key)
+    rotated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Feed key of {self.user_id}"
+
+
+class ProjectCounters(models.Model):
+    """
+    Per-project activity and email totals, adjusted in place as rows are
+    written (see counters.py) so project views never count related tables.
+    ``repair_project_counters`` recomputes them from the source tables.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='counters')
+    activity_count = models.PositiveIntegerField(default=0)
+    sent_email_count = models.PositiveIntegerField(default=0)
+    synced_email_count = models.PositiveIntegerField(default=0)
+    unread_email_count = models.PositiveIntegerField(default=0)
+    last_communication_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Counters for {self.project_id}"
@@ -1,12 +1,30 @@
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from apps.common.pagination import KeysetPagination
+
+
+class ProjectCursorPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
 class ProjectPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_pagination_class = ProjectCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # ?cursor= switches to keyset pagination (fixed newest-first ordering)
+        self.cursor_paginator = self.cursor_pagination_class()
+        if self.cursor_paginator.is_requested(request):
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
     
     def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
         return Response({
             'count': self.page.paginator.count,
             'total_pages': self.page.paginator.num_pages,
@@ -14,4 +32,4 @@ class ProjectPagination(PageNumberPagination):
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'results': data
-        })
\ No newline at end of file
+        })
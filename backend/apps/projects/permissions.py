@@ -11,7 +11,7 @@ class ProjectPermissions(permissions.BasePermission):
             return request.user.is_authenticated
         
         # Only admins, managers, and employees can create projects
-        if view.action == 'create':
+        if view.action in ['create', 'import_projects']:
             return request.user.role in ['admin', 'manager', 'employee']
         
         return request.user.is_authenticated
@@ -34,4 +34,13 @@ class ProjectPermissions(permissions.BasePermission):
             return True
         
         # Clients and architects can only view (handled by get_queryset)
-        return False
\ No newline at end of file
+        return False
+
+    def filter_modifiable(self, request, queryset):
+        """
+        Restrict ``queryset`` to the projects has_object_permission would let
+        this user modify, so bulk operations check every row in one query
+        """
+        if request.user.role in ['admin', 'manager', 'employee']:
+            return queryset
+        return queryset.none()
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Ranked project search.
+
+Every project keeps a ``search_document``: the words of its job number, name,
+address and client/architect names, lower-cased and space-separated, rebuilt
+on save and when a client or architect is renamed. A query matches when its
+words appear in that order with the last one as a prefix (``project 2``
+matches "Test Project 2", not "Test Project 1" at "123 Street").
+
+On PostgreSQL the document is matched through GIN indexes
+(``to_tsvector('simple', ...)`` for the phrase-prefix match and ``pg_trgm``
+word similarity for typos), ``job_number`` through a ``varchar_pattern_ops``
+index for prefix matches, and results are ranked. Other backends (SQLite in
+tests) use the equivalent substring match with a simple prefix-based rank.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# Project fields that feed the search document
+SEARCH_DOCUMENT_FIELDS = ('job_number', 'project_name', 'address', 'client', 'architect_designer')
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def _entity_names(entity):
+    if entity is None:
+        return []
+    return [entity.name, entity.company_name]
+
+
+def build_search_document(project):
+    """Return the search document text for ``project``"""
+    parts = [project.job_number, project.project_name, project.address]
+    parts += _entity_names(project.client if project.client_id else None)
+    parts += _entity_names(project.architect_designer if project.architect_designer_id else None)
+    return ' '.join(search_terms(' '.join(part for part in parts if part)))
+
+
+def refresh_search_documents(queryset):
+    """Rebuild the search document of every project in ``queryset``"""
+    projects = list(queryset.select_related('client', 'architect_designer').only(
+        'id', 'job_number', 'project_name', 'address', 'client', 'architect_designer',
+        'client__name', 'client__company_name',
+        'architect_designer__name', 'architect_designer__company_name',
+    ))
+    for project in projects:
+        project.search_document = build_search_document(project)
+    queryset.model._base_manager.bulk_update(projects, ['search_document'], batch_size=500)
+    return len(projects)
+
+
+def search_terms(query):
+    return [term.lower() for term in _TERM_RE.findall(query or '')]
+
+
+def search_projects(queryset, query):
+    """
+    Filter ``queryset`` to projects matching ``query`` and annotate ``search_rank``.
+
+    The caller decides whether to order by ``-search_rank``.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    query = query.strip()
+    if connections[queryset.db].vendor == 'postgresql':
+        return _search_postgresql(queryset, query, terms)
+    return _search_fallback(queryset, query, terms)
+
+
+def _search_postgresql(queryset, query, terms):
+    table = queryset.model._meta.db_table
+    document = f'"{table}"."search_document"'
+    job_number = f'"{table}"."job_number"'
+    # Expressions must match the index definitions in migration 0005
+    vector = f"to_tsvector('simple', {document})"
+    tsquery = ' <-> '.join(terms) + ':*'
+
+    job_prefix = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    # "<%%" is pg_trgm's word similarity operator (pg_trgm.word_similarity_threshold)
+    matches = RawSQL(
+        f"({vector} @@ to_tsquery('simple', %s)"
+        f" OR %s <%% {document}"
+        f" OR {job_number} LIKE %s)",
+        (tsquery, query.lower(), job_prefix),
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"(ts_rank({vector}, to_tsquery('simple', %s))"
+        f" + word_similarity(%s, {document})"
+        f" + CASE WHEN {job_number} LIKE %s THEN 1.0 ELSE 0.0 END)",
+        (tsquery, query.lower(), job_prefix),
+        output_field=FloatField(),
+    )
+    return queryset.filter(matches).annotate(search_rank=rank)
+
+
+def _search_fallback(queryset, query, terms):
+    phrase = ' '.join(terms)
+    condition = (
+        Q(job_number__istartswith=query)
+        | Q(search_document__startswith=phrase)
+        | Q(search_document__contains=f' {phrase}')
+    )
+    rank = Case(
+        When(job_number__istartswith=query, then=Value(3)),
+        When(project_name__istartswith=query, then=Value(2)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+    return queryset.filter(condition).annotate(search_rank=rank)
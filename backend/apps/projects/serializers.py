@@ -1,11 +1,13 @@
 from rest_framework import serializers
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from .models import Project
+from .models import InspectionEvent, Project
+from apps.common.fieldsets import SparseFieldsetMixin
+from .inspections import MAX_CALENDAR_DAYS
 
 User = get_user_model()
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     client_name = serializers.CharField(source='client.name', read_only=True)
     client_email = serializers.EmailField(source='client.contact_email', read_only=True)
     architect_name = serializers.CharField(source='architect_designer.name', read_only=True)
@@ -14,6 +16,11 @@ class ProjectSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     is_overdue = serializers.SerializerMethodField()
     days_until_due = serializers.SerializerMethodField()
+    # Denormalized totals (see counters.py)
+    sent_email_count = serializers.IntegerField(source='counters.sent_email_count', read_only=True)
+    synced_email_count = serializers.IntegerField(source='counters.synced_email_count', read_only=True)
+    unread_email_count = serializers.IntegerField(source='counters.unread_email_count', read_only=True)
+    last_communication_at = serializers.DateTimeField(source='counters.last_communication_at', read_only=True)
 
     class Meta:
         model = Project
@@ -25,31 +32,34 @@ class ProjectSerializer(serializers.ModelSerializer):
             'manager_name', 'due_date', 'due_date_note', 'rough_in_date', 'rough_in_note',
             'final_inspection_date', 'final_inspection_note', 'address',
             'legal_address', 'billing_info', 'created_at', 'updated_at',
-            'is_overdue', 'days_until_due'
+            'is_overdue', 'days_until_due', 'sent_email_count', 'synced_email_count',
+            'unread_email_count', 'last_communication_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'job_number']
+
+    sparse_dependencies = {
+        'project_types_list': ['project_type'],
+        'status_display': ['status'],
+        'is_overdue': ['due_date', 'status'],
+        'days_until_due': ['due_date'],
+    }
     
     def get_project_types_list(self, obj):
         return obj.get_project_types_list()
     
     def get_is_overdue(self, obj):
-        return obj.due_date < timezone.now().date() if obj.due_date else False
+        # Uses the with_due_info() annotation when the queryset provides it
+        return obj.is_overdue
     
     def get_days_until_due(self, obj):
-        if obj.due_date:
-            delta = obj.due_date - timezone.now().date()
-            return delta.days
-        return None
+        return obj.days_until_due
 
 class ProjectDetailSerializer(ProjectSerializer):
     """Extended serializer for detailed project view"""
-    activity_logs_count = serializers.SerializerMethodField()
+    activity_logs_count = serializers.IntegerField(source='counters.activity_count', read_only=True)
     
     class Meta(ProjectSerializer.Meta):
         fields = ProjectSerializer.Meta.fields + ['activity_logs_count']
-    
-    def get_activity_logs_count(self, obj):
-        return obj.activity_logs.count()
 
 class ProjectCreateSerializer(serializers.ModelSerializer):
     """Serializer for project creation with validation"""
@@ -113,4 +123,91 @@ class ProjectUpdateSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+
+class ProjectBulkPatchSerializer(serializers.Serializer):
+    """Fields a bulk update may change"""
+    status = serializers.ChoiceField(choices=Project.STATUS_CHOICES, required=False)
+    mechanical_manager = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(role__in=['manager', 'employee']),
+        required=False
+    )
+    due_date = serializers.DateField(required=False)
+    current_sub_status = serializers.CharField(
+        max_length=200, required=False, allow_null=True, allow_blank=True
+    )
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError("Provide at least one field to change")
+        return data
+
+
+class ProjectBulkUpdateSerializer(serializers.Serializer):
+    """Serializer for bulk project updates selected by ids or by list filters"""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    filter = serializers.DictField(required=False)
+    patch = ProjectBulkPatchSerializer()
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Provide exactly one of 'ids' or 'filter'")
+        return data
+
+
+
+class InspectionEventSerializer(serializers.ModelSerializer):
+    """Serializer for inspection calendar entries"""
+    job_number = serializers.CharField(source='project.job_number', read_only=True)
+    project_name = serializers.CharField(source='project.project_name', read_only=True)
+    address = serializers.CharField(source='project.address', read_only=True)
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    manager_name = serializers.CharField(source='mechanical_manager.get_full_name', read_only=True)
+
+    class Meta:
+        model = InspectionEvent
+        fields = [
+            'id', 'project', 'job_number', 'project_name', 'address', 'kind',
+            'kind_display', 'date', 'note', 'status', 'status_display',
+            'mechanical_manager', 'manager_name',
+        ]
+        read_only_fields = fields
+
+
+class InspectionCalendarQuerySerializer(serializers.Serializer):
+    """Query parameters of the inspection calendar; list filters are comma-separated"""
+    start = serializers.DateField()
+    end = serializers.DateField()
+    manager = serializers.CharField(required=False)
+    kind = serializers.CharField(required=False)
+    status = serializers.CharField(required=False)
+
+    def _split(self, value, choices=None):
+        values = [item.strip() for item in value.split(',') if item.strip()]
+        if choices is not None:
+            invalid = [item for item in values if item not in dict(choices)]
+            if invalid:
+                raise serializers.ValidationError(f"Invalid value: {', '.join(invalid)}")
+        return values
+
+    def validate_manager(self, value):
+        values = self._split(value)
+        if not all(item == 'me' or item.isdigit() for item in values):
+            raise serializers.ValidationError("Expected manager ids or 'me'")
+        return values
+
+    def validate_kind(self, value):
+        return self._split(value, InspectionEvent.KIND_CHOICES)
+
+    def validate_status(self, value):
+        return self._split(value, Project.STATUS_CHOICES)
+
+    def validate(self, data):
+        if data['end'] < data['start']:
+            raise serializers.ValidationError("'end' must not be before 'start'")
+        if (data['end'] - data['start']).days > MAX_CALENDAR_DAYS:
+            raise serializers.ValidationError(f"The range may span at most {MAX_CALENDAR_DAYS} days")
+        return data
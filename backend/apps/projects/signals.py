@@ -0,0 +1,64 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.clients.models import Client
+from apps.architects.models import Architect
+from .models import Project
+from .counters import create_project_counters
+from .inspections import INSPECTION_SOURCE_FIELDS, sync_inspection_events
+from .search import refresh_search_documents
+from .stats import schedule_stats_invalidation
+
+# Client/architect fields that appear in project search documents
+SEARCH_NAME_FIELDS = ('name', 'company_name')
+
+
+def _names_changed(instance):
+    # post_save runs before FieldTrackerMixin re-baselines, so this still
+    # compares against the values loaded before the save
+    return any(field in SEARCH_NAME_FIELDS for field in instance.changed_fields())
+
+
+@receiver(post_save, sender=Client)
+def refresh_client_project_search(sender, instance, created, **kwargs):
+    """
+    Rebuild the search documents of a client's projects when it is renamed
+    """
+    if not created and _names_changed(instance):
+        refresh_search_documents(Project.objects.filter(client=instance))
+
+
+@receiver(post_save, sender=Architect)
+def refresh_architect_project_search(sender, instance, created, **kwargs):
+    """
+    Rebuild the search documents of an architect's projects when it is renamed
+    """
+    if not created and _names_changed(instance):
+        refresh_search_documents(Project.objects.filter(architect_designer=instance))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_stats(sender, instance, **kwargs):
+    """
+    Drop cached dashboard stats whenever a project is written
+    """
+    schedule_stats_invalidation()
+
+
+@receiver(post_save, sender=Project)
+def sync_project_inspections(sender, instance, created, **kwargs):
+    """
+    Keep the project's inspection calendar entries in step with its
+    inspection dates, status and manager
+    """
+    if created or any(field in INSPECTION_SOURCE_FIELDS for field in instance.changed_fields()):
+        sync_inspection_events([instance])
+
+
+@receiver(post_save, sender=Project)
+def create_counters(sender, instance, created, **kwargs):
+    """
+    Give every new project its (zeroed) counters row
+    """
+    if created:
+        create_project_counters([instance.pk])
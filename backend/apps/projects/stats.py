@@ -0,0 +1,143 @@
+"""
+Dashboard statistics for projects.
+
+The stats are computed with one conditional aggregation grouped by status
+and manager, and cached per role scope. Every cache key carries a version
+that project save/delete signals bump, so a write invalidates all cached
+scopes at once without enumerating them. Concurrent misses for the same key
+share one computation: within a process through a per-key lock, across
+processes through a short-lived cache lock the other workers wait on.
+"""
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Project, ProjectQuerySet
+
+STATS_CACHE_TIMEOUT = 300
+STATS_LOCK_TIMEOUT = 30
+STATS_VERSION_KEY = 'projects:dashboard_stats:version'
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+def compute_dashboard_stats(queryset, include_managers=False):
+    """Compute the dashboard payload for ``queryset`` in a single aggregate query"""
+    today = timezone.now().date()
+    now = timezone.now()
+    rows = queryset.select_related(None).prefetch_related(None).order_by().values(
+        'status', 'mechanical_manager'
+    ).annotate(
+        total=Count('id'),
+        overdue_count=Count('id', filter=ProjectQuerySet.overdue_condition(today)),
+        due_soon_count=Count('id', filter=ProjectQuerySet.due_soon_condition(today)),
+        completed_count=Count('id', filter=Q(
+            status='completed',
+            updated_at__month=now.month,
+            updated_at__year=now.year,
+        )),
+    )
+
+    by_status = {value: 0 for value, _ in Project.STATUS_CHOICES}
+    by_manager_id = {}
+    stats = {
+        'total_projects': 0,
+        'overdue_projects': 0,
+        'due_soon_projects': 0,
+        'completed_this_month': 0,
+    }
+    for row in rows:
+        by_status[row['status']] = by_status.get(row['status'], 0) + row['total']
+        by_manager_id[row['mechanical_manager']] = (
+            by_manager_id.get(row['mechanical_manager'], 0) + row['total']
+        )
+        stats['total_projects'] += row['total']
+        stats['overdue_projects'] += row['overdue_count']
+        stats['due_soon_projects'] += row['due_soon_count']
+        stats['completed_this_month'] += row['completed_count']
+
+    labels = dict(Project.STATUS_CHOICES)
+    stats['by_status'] = {labels[value]: by_status[value] for value in labels}
+
+    if include_managers:
+        managers = get_user_model().objects.filter(
+            role__in=['manager', 'employee']
+        ).only('id', 'username', 'first_name', 'last_name')
+        stats['by_manager'] = {
+            manager.get_full_name() or manager.username: by_manager_id.get(manager.id, 0)
+            for manager in managers
+        }
+    return stats
+
+
+def get_stats_version():
+    version = cache.get(STATS_VERSION_KEY)
+    if version is None:
+        cache.add(STATS_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(STATS_VERSION_KEY)
+    return version
+
+
+def invalidate_dashboard_stats():
+    """Make every cached dashboard payload stale"""
+    cache.set(STATS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def schedule_stats_invalidation():
+    # Invalidate now, and again once the write is visible to other
+    # connections so a request racing the commit cannot cache old counts
+    invalidate_dashboard_stats()
+    transaction.on_commit(invalidate_dashboard_stats)
+
+
+def _local_lock(key):
+    with _local_locks_guard:
+        return _local_locks.setdefault(key, threading.Lock())
+
+
+def get_dashboard_stats(scope, queryset, include_managers=False):
+    """
+    Return cached dashboard stats for a role ``scope`` (see
+    ProjectViewSet.get_stats_scope), computing them at most once per
+    invalidation, day and cache timeout.
+    """
+    key = (
+        f'projects:dashboard_stats:{get_stats_version()}:{timezone.now().date()}'
+        f':{scope}:{int(include_managers)}'
+    )
+    stats = cache.get(key)
+    if stats is not None:
+        return stats
+
+    with _local_lock(key):
+        stats = cache.get(key)
+        if stats is not None:
+            return stats
+
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        if not cache.add(lock_key, token, timeout=STATS_LOCK_TIMEOUT):
+            # Another worker is computing this key; wait for its result
+            deadline = time.monotonic() + STATS_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                stats = cache.get(key)
+                if stats is not None:
+                    return stats
+        try:
+            stats = compute_dashboard_stats(queryset, include_managers)
+            cache.set(key, stats, timeout=STATS_CACHE_TIMEOUT)
+        finally:
+            # After a timed-out wait the lock is another worker's; leave it
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+    with _local_locks_guard:
+        _local_locks.pop(key, None)
+    return stats
@@ -1,13 +1,20 @@
+import json
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from apps.clients.models import Client
 from apps.architects.models import Architect
-from .models import Project
+from apps.activity.models import ActivityLog
+from .models import Project, allocate_job_numbers, project_type_mask
 
 User = get_user_model()
 
@@ -75,7 +82,76 @@ class ProjectModelTests(TestCase):
         self.assertIn('M', project.project_types_list)
         self.assertIn('E', project.project_types_list)
         self.assertNotIn('P', project.project_types_list)
+
+    def test_project_type_mask_follows_project_type(self):
+        """Test the type bitmask is kept in sync with the comma-separated types"""
+        project = Project.objects.create(**self.project_data)
+        bits = Project.PROJECT_TYPE_BITS
+        self.assertEqual(project.project_type_mask, bits['M'] | bits['E'])
+
+        project.set_project_types(['EM', 'FP'])
+        project.save(update_fields=['project_type'])
+        project.refresh_from_db()
+        self.assertEqual(project.project_type, 'EM,FP')
+        self.assertEqual(project.project_type_mask, bits['EM'] | bits['FP'])
     
+    def test_search_document_rebuilt_only_when_its_fields_change(self):
+        """Test saves that leave searchable fields alone skip the rebuild"""
+        project = Project.objects.create(**self.project_data)
+        self.assertIn('test client', project.search_document)
+
+        project = Project.objects.get(pk=project.pk)
+        project.current_open_items = 'Ductwork drawings'
+        with CaptureQueriesContext(connection) as ctx:
+            project.save()
+        statements = [q['sql'].split()[0].upper() for q in ctx.captured_queries]
+        self.assertNotIn('SELECT', statements)
+
+        project.project_name = 'Renamed Project'
+        project.save()
+        project.refresh_from_db()
+        self.assertIn('renamed project', project.search_document)
+
+    def test_activity_count_follows_each_flush(self):
+        """Test the activity counter is incremented when buffered activity is written"""
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(**self.project_data)
+        project.counters.refresh_from_db()
+        self.assertEqual(project.counters.activity_count, ActivityLog.objects.filter(project=project).count())
+
+        project.project_name = 'Renamed'
+        project.address = '2 Other Street'
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                project.save()
+
+        project.counters.refresh_from_db()
+        self.assertEqual(project.counters.activity_count, ActivityLog.objects.filter(project=project).count())
+        counter_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "projects_projectcounters"')]
+        self.assertEqual(len(counter_updates), 1)
+
+    def test_job_numbers_are_sequential_per_year(self):
+        """Test job numbers come from the per-year sequence and skip taken ones"""
+        Project.objects.create(**{**self.project_data, 'job_number': '2031-0002'})
+
+        self.assertEqual(allocate_job_numbers(2031), ['2031-0001'])
+        self.assertEqual(allocate_job_numbers(2031, 3), ['2031-0003', '2031-0004', '2031-0005'])
+        self.assertEqual(allocate_job_numbers(2032), ['2032-0001'])
+
+    def test_unsaved_projects_do_not_use_up_job_numbers(self):
+        """Test a job number is only allocated when a project is inserted"""
+        unsaved = Project(**self.project_data)
+        self.assertEqual(unsaved.job_number, '')
+
+        first = Project.objects.create(**self.project_data)
+        second = Project.objects.create(**self.project_data)
+        year, number = first.job_number.split('-')
+        self.assertEqual(second.job_number, f'{year}-{int(number) + 1:04d}')
+
+        first.project_name = 'Renamed'
+        first.save()
+        self.assertEqual(Project.objects.get(pk=first.pk).job_number, first.job_number)
+
     def test_is_overdue_calculation(self):
         """Test overdue project calculation"""
         # Past due date
@@ -320,6 +396,32 @@ class ProjectAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)  # Only project1 has M
         self.assertEqual(response.data[0]['project_name'], 'Test Project 1')
+
+    def test_filter_project_type_is_exact(self):
+        """Test type filtering matches whole codes with any/all-of semantics"""
+        token = self.get_token('admin@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        Project.objects.create(
+            year=2025,
+            project_name="Energy Project",
+            project_type="EM",
+            client=self.client_obj,
+            mechanical_manager=self.manager_user,
+            address="789 Test Road"
+        )
+
+        response = self.client.get(reverse('project-list'), {'project_type': 'E'})
+        self.assertEqual(
+            [p['project_name'] for p in response.data['results']], ['Test Project 1']
+        )
+
+        response = self.client.get(reverse('project-list'), {'project_type': 'E,EM'})
+        self.assertEqual(response.data['count'], 2)
+
+        response = self.client.get(reverse('project-list'), {'project_type_all': 'M,E'})
+        self.assertEqual(response.data['count'], 1)
+        response = self.client.get(reverse('project-list'), {'project_type_all': 'M,P'})
+        self.assertEqual(response.data['count'], 0)
     
     def test_search_projects(self):
         """Test searching projects"""
@@ -332,6 +434,23 @@ class ProjectAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['project_name'], 'Test Project 2')
+
+    def test_search_projects_ranked(self):
+        """Test search covers related names and ranks job number prefixes first"""
+        token = self.get_token('admin@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('project-list')
+
+        response = self.client.get(url, {'search': 'api test archi'})
+        self.assertEqual(response.data['count'], 2)
+
+        response = self.client.get(url, {'search': self.project1.job_number})
+        self.assertEqual(response.data['results'][0]['id'], self.project1.id)
+
+        self.client_obj.name = 'Renamed Client'
+        self.client_obj.save()
+        response = self.client.get(url, {'search': 'renamed'})
+        self.assertEqual(response.data['count'], 2)
     
     def test_dashboard_stats(self):
         """Test dashboard statistics endpoint"""
@@ -346,6 +465,272 @@ class ProjectAPITests(APITestCase):
         self.assertIn('by_status', response.data)
         self.assertEqual(response.data['total_projects'], 2)
     
+    def test_dashboard_stats_cached_until_project_write(self):
+        """Test dashboard stats are served from cache and refreshed on writes"""
+        token = self.get_token('admin@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('project-dashboard-stats')
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['by_status']['In Progress'], 1)
+        self.assertEqual(response.data['by_manager']['Employee User'], 1)
+
+        with patch('apps.projects.stats.compute_dashboard_stats') as compute:
+            response = self.client.get(url)
+        compute.assert_not_called()
+        self.assertEqual(response.data['total_projects'], 2)
+
+        self.project1.status = 'in_progress'
+        self.project1.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['total_projects'], 2)
+        self.assertEqual(response.data['by_status']['In Progress'], 2)
+
+    def test_list_projects_with_cursor(self):
+        """Test ?cursor= switches the project list to keyset pagination"""
+        token = self.get_token('admin@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        url = reverse('project-list')
+        response = self.client.get(url, {'cursor': '', 'page_size': 1, 'count': 'approximate'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # A planner estimate on PostgreSQL, so only its presence is certain
+        self.assertIsInstance(response.data['count'], int)
+        self.assertEqual(response.data['results'][0]['id'], self.project2.id)
+        self.assertNotIn('current_page', response.data)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['id'], self.project1.id)
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(url, {'cursor': '', 'count': 'exact'})
+        self.assertEqual(response.data['count'], 2)
+
+        response = self.client.get(url, {'cursor': '', 'ordering': 'job_number'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', response.data)
+
+    def test_export_projects_streams_filtered_csv(self):
+        """Test CSV export streams rows and honours list filters"""
+        token = self.get_token('admin@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        url = reverse('project-export')
+        response = self.client.get(url, {'status': 'in_progress'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('Year,Job Number,Project Name'))
+        self.assertIn(self.project2.job_number, lines[1])
+        self.assertIn('"P, FP",In Progress', lines[1])
+        self.assertIn('API Test Client', lines[1])
+        self.assertIn('Employee User', lines[1])
+
+    def test_order_projects_by_days_until_due(self):
+        """Test due info is annotated in SQL and usable as an ordering"""
+        token = self.get_token('admin@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        response = self.client.get(reverse('project-list'), {'ordering': 'days_until_due'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([p['id'] for p in results], [self.project2.id, self.project1.id])
+        self.assertEqual(results[0]['days_until_due'], 15)
+        self.assertFalse(results[0]['is_overdue'])
+
+        annotated = Project.objects.with_due_info().get(pk=self.project1.pk)
+        self.assertEqual(annotated.days_until_due, 30)
+    
+    def test_list_projects_sparse_fieldset(self):
+        """Test ?fields= and ?exclude= trim the payload and the query"""
+        token = self.get_token('admin@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('project-list')
+
+        response = self.client.get(url, {'fields': 'id,job_number,status_display,client_name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'job_number', 'status_display', 'client_name'},
+        )
+
+        response = self.client.get(url, {'exclude': 'billing_info,current_open_items'})
+        self.assertNotIn('billing_info', response.data['results'][0])
+        self.assertIn('project_name', response.data['results'][0])
+    
+    def test_patch_project_fetches_row_once(self):
+        """Test a PATCH reads the project once and returns fresh due info"""
+        token = self.get_token('manager@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('project-detail', args=[self.project1.id])
+        past = timezone.now().date() - timedelta(days=2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'due_date': past.isoformat()}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_overdue'])
+        self.assertEqual(response.data['days_until_due'], -2)
+        project_selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "projects_project"' in query['sql']
+        ]
+        self.assertEqual(len(project_selects), 1)
+    
+    def test_bulk_update_projects(self):
+        """Test bulk updates report a dry run, then patch rows and log activity"""
+        token = self.get_token('manager@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('project-bulk')
+        payload = {
+            'ids': [self.project1.id, self.project2.id],
+            'patch': {'status': 'in_progress', 'mechanical_manager': self.manager_user.id},
+            'dry_run': True,
+        }
+
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['affected'], 2)
+        self.project1.refresh_from_db()
+        self.assertEqual(self.project1.status, 'not_started')
+
+        payload['dry_run'] = False
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['changed'], 2)
+        self.project1.refresh_from_db()
+        self.project2.refresh_from_db()
+        self.assertEqual(self.project1.status, 'in_progress')
+        self.assertEqual(self.project2.mechanical_manager, self.manager_user)
+        self.assertTrue(ActivityLog.objects.filter(
+            project=self.project1, action_type='status_change'
+        ).exists())
+        self.assertTrue(ActivityLog.objects.filter(
+            project=self.project2, action_type='manager_changed'
+        ).exists())
+
+    def test_bulk_update_denied_for_clients(self):
+        """Test bulk updates never touch rows the user may not modify"""
+        token = self.get_token('clientuser@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        response = self.client.post(reverse('project-bulk'), {
+            'filter': {'status': ['not_started']},
+            'patch': {'status': 'cancelled'},
+        }, format='json')
+
+        self.assertEqual(response.data['denied'], [self.project1.id])
+        self.assertEqual(response.data['changed'], 0)
+        self.project1.refresh_from_db()
+        self.assertEqual(self.project1.status, 'not_started')
+    
+    def test_import_projects_from_csv(self):
+        """Test the CSV import creates valid rows and reports the rest"""
+        token = self.get_token('manager@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        upload = SimpleUploadedFile('projects.csv', (
+            'Project Name,Project Type,Status,Client,Architect/Designer,Mechanical Manager,Due Date,Address\n'
+            'Imported One,"M,P",In Progress,API Test Client,,,2020-01-31,1 Import Road\n'
+            'Imported Two,E,not_started,apiclient@test.com,API Test Architect,employee@test.com,,2 Import Road\n'
+            'Broken,X,not_started,Nobody,,,,3 Import Road\n'
+        ).encode())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('project-import-projects'), {'file': upload})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 4)
+        self.assertEqual(set(response.data['errors'][0]['errors']), {'client', 'project_type'})
+
+        first = Project.objects.get(project_name='Imported One')
+        self.assertEqual(first.status, 'in_progress')
+        self.assertEqual(first.mechanical_manager, self.manager_user)
+        self.assertEqual(first.project_type_mask, project_type_mask(['M', 'P']))
+        self.assertIn('imported one', first.search_document)
+        second = Project.objects.get(project_name='Imported Two')
+        self.assertEqual(second.mechanical_manager, self.employee_user)
+        self.assertEqual(second.architect_designer, self.architect)
+        self.assertNotEqual(first.job_number, second.job_number)
+        self.assertTrue(ActivityLog.objects.filter(
+            project=second, action_type='project_created'
+        ).exists())
+
+    def test_inspection_calendar_and_feed(self):
+        """Test inspection dates feed the calendar endpoint and the iCal feed"""
+        inspection_date = timezone.now().date() + timedelta(days=3)
+        self.project1.rough_in_date = inspection_date
+        self.project1.save()
+        token = self.get_token('manager@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        response = self.client.get(reverse('project-calendar'), {
+            'start': inspection_date.isoformat(),
+            'end': (inspection_date + timedelta(days=7)).isoformat(),
+            'manager': 'me',
+            'kind': 'rough_in',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['job_number'], self.project1.job_number)
+
+        feed_url = self.client.get(reverse('project-calendar-feed-url')).data['url']
+        self.client.credentials()
+        response = self.client.get(feed_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(f'DTSTART;VALUE=DATE:{inspection_date:%Y%m%d}', response.content.decode())
+        response = self.client.get(feed_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        new_feed_url = self.client.post(reverse('project-calendar-feed-url')).data['url']
+        self.client.credentials()
+        self.assertEqual(self.client.get(feed_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(new_feed_url).status_code, status.HTTP_200_OK)
+
+        self.project1.rough_in_date = None
+        self.project1.save()
+        self.assertFalse(self.project1.inspection_events.exists())
+
+    def test_project_timeline_merges_sources(self):
+        """Test the timeline merges activity and emails newest first across pages"""
+        from apps.communication.models import EmailLog
+
+        ActivityLog.objects.create(
+            entity_type='project',
+            project=self.project1,
+            action_type='status_change',
+            description='Status changed',
+            user=self.manager_user,
+        )
+        EmailLog.objects.create(
+            project=self.project1,
+            recipient_email='apiclient@test.com',
+            subject='Kick-off',
+            body_html='<p>Hello</p>',
+            status='sent',
+        )
+        token = self.get_token('manager@test.com', 'testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        url = reverse('project-timeline', args=[self.project1.id])
+        response = self.client.get(url, {'page_size': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['kind'] for item in response.data['results']], ['email'])
+        self.assertEqual(response.data['results'][0]['title'], 'Kick-off')
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['kind'] for item in response.data['results']], ['activity'])
+        self.assertEqual(response.data['results'][0]['actor'], 'manager@test.com')
+        self.assertIsNone(response.data['next'])
+
     def test_overdue_projects(self):
         """Test overdue projects endpoint"""
         # Create an overdue project
@@ -419,4 +804,133 @@ class ProjectValidationTests(APITestCase):
         
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn('due_date', response.data)
\ No newline at end of file
+        self.assertIn('due_date', response.data)
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are only checked on PostgreSQL')
+class ProjectQueryPlanTests(APITestCase):
+    """
+    Run EXPLAIN on the project queries behind each list/filter/ordering
+    combination and fail when one reads projects_project with a sequential
+    scan it has to filter or sort, i.e. when no index serves the access path
+    """
+    # Tables smaller than this may legitimately be scanned sequentially
+    SEQ_SCAN_ROW_THRESHOLD = 1000
+    PROJECT_COUNT = 10000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='plan-admin', password='x', role='admin')
+        cls.managers = [
+            User.objects.create_user(username=f'plan-manager-{i}', password='x', role='manager')
+            for i in range(25)
+        ]
+        cls.client_user = User.objects.create_user(username='plan-client', password='x', role='client')
+        cls.architect_user = User.objects.create_user(username='plan-architect', password='x', role='architect')
+        clients = Client.objects.bulk_create([Client(name=f'Plan Client {i}') for i in range(100)])
+        architects = Architect.objects.bulk_create([Architect(name=f'Plan Architect {i}') for i in range(50)])
+        Client.objects.filter(pk=clients[0].pk).update(user_account=cls.client_user)
+        Architect.objects.filter(pk=architects[0].pk).update(user_account=cls.architect_user)
+        cls.client_obj = clients[0]
+
+        today = timezone.now().date()
+        # Mostly closed projects, so status and overdue filters are selective
+        statuses = ['closed_paid'] * 40 + ['completed'] * 6 + ['in_progress', 'submitted', 'on_hold', 'not_started']
+        Project.objects.bulk_create([
+            Project(
+                year=2020 + i % 6,
+                job_number=f'PLAN-{i:05d}',
+                project_name=f'Plan Project {i}',
+                project_type='M',
+                status=statuses[i % len(statuses)],
+                client=clients[i % len(clients)],
+                architect_designer=architects[i % len(architects)],
+                mechanical_manager=cls.managers[i % len(cls.managers)],
+                due_date=today + timedelta(days=i % 730 - 365),
+                address=f'{i} Plan Street',
+            )
+            for i in range(cls.PROJECT_COUNT)
+        ], batch_size=2000)
+
+        with connection.cursor() as cursor:
+            for table in ('projects_project', 'clients_client', 'architects_architect', 'users_user'):
+                cursor.execute(f'ANALYZE {table}')
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']
+
+    def plan_nodes(self, node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from self.plan_nodes(child)
+
+    def table_rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [table])
+            return cursor.fetchone()[0]
+
+    def assertIndexedPlans(self, user, url, params=None):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        if self.table_rows('projects_project') <= self.SEQ_SCAN_ROW_THRESHOLD:
+            return
+
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or '"projects_project"' not in sql:
+                continue
+            plan = self.explain(sql)
+            nodes = list(self.plan_nodes(plan))
+            limited = any(node['Node Type'] == 'Limit' for node in nodes)
+            for node in nodes:
+                if node['Node Type'] != 'Seq Scan' or node.get('Relation Name') != 'projects_project':
+                    continue
+                # A full read is only acceptable when every row is needed
+                # (e.g. an unfiltered COUNT), not to filter or page through them
+                self.assertFalse(
+                    'Filter' in node or limited,
+                    f'Sequential scan on projects_project for {url} {params}:\n{sql}\n{json.dumps(plan, indent=2)}',
+                )
+
+    def test_default_list(self):
+        self.assertIndexedPlans(self.admin, reverse('project-list'))
+
+    def test_keyset_list(self):
+        self.assertIndexedPlans(self.admin, reverse('project-list'), {'cursor': ''})
+
+    def test_status_filter(self):
+        self.assertIndexedPlans(self.admin, reverse('project-list'), {'status': 'on_hold'})
+
+    def test_manager_filter(self):
+        self.assertIndexedPlans(self.admin, reverse('project-list'), {'mechanical_manager': self.managers[3].pk})
+
+    def test_my_projects(self):
+        self.assertIndexedPlans(self.managers[0], reverse('project-list'), {'my_projects': 'true'})
+
+    def test_client_filter(self):
+        self.assertIndexedPlans(self.admin, reverse('project-list'), {'client': self.client_obj.pk})
+
+    def test_overdue_filter(self):
+        self.assertIndexedPlans(self.admin, reverse('project-list'), {'overdue': 'true'})
+
+    def test_due_date_range(self):
+        today = timezone.now().date()
+        self.assertIndexedPlans(self.admin, reverse('project-list'), {
+            'due_date_range_after': today.isoformat(),
+            'due_date_range_before': (today + timedelta(days=7)).isoformat(),
+        })
+
+    def test_due_date_ordering(self):
+        self.assertIndexedPlans(self.admin, reverse('project-list'), {'ordering': 'due_date'})
+
+    def test_client_role_list(self):
+        self.assertIndexedPlans(self.client_user, reverse('project-list'))
+
+    def test_architect_role_list(self):
+        self.assertIndexedPlans(self.architect_user, reverse('project-list'))
@@ -0,0 +1,133 @@
+"""
+Merged project timeline.
+
+A project's activity entries, sent emails and synced emails are read as one
+newest-first stream. Each source is projected onto the same compact columns
+(``kind``, ``id``, ``time``, ``title``, ``detail``, ``actor``), narrowed to
+the rows after the page's cursor and combined with ``UNION ALL``; the
+database orders the union and cuts the page. Where the backend allows
+ordered, limited compound parts (PostgreSQL), every source first takes only
+its own newest rows through its ``(project, time)`` index, so a page reads
+at most ``page_size + 1`` rows per source however long the history is.
+"""
+import base64
+import json
+
+from django.apps import apps
+from django.db import connections
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import Cast
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+
+from apps.common.pagination import KeysetPagination
+
+TIMELINE_COLUMNS = ('kind', 'item_id', 'time', 'title', 'detail', 'actor')
+
+
+def _project(queryset, kind, time, title, detail, actor):
+    return queryset.annotate(
+        kind=Value(kind, output_field=CharField()),
+        item_id=Cast('id', CharField()),
+        time=F(time),
+        title=F(title),
+        detail=F(detail),
+        actor=F(actor),
+    ).values(*TIMELINE_COLUMNS)
+
+
+def timeline_sources(project, user):
+    """Return the projected querysets (kind -> queryset) merged into a project's timeline"""
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+    EmailLog = apps.get_model('communication', 'EmailLog')
+    SyncedEmail = apps.get_model('communication', 'SyncedEmail')
+    return {
+        'activity': _project(
+            ActivityLog.objects.filter(project=project),
+            'activity', 'timestamp', 'description', 'action_type', 'user__username',
+        ),
+        'email': _project(
+            EmailLog.objects.filter(project=project),
+            'email', 'sent_at', 'subject', 'status', 'recipient_email',
+        ),
+        # Synced mailboxes are private to the account owner
+        'synced_email': _project(
+            SyncedEmail.objects.filter(project=project, account__user=user),
+            'synced_email', 'date', 'subject', 'direction', 'from_address',
+        ),
+    }
+
+
+def _after(kind, position):
+    """Rows of source ``kind`` that sort after ``position`` in (-time, -kind, -id) order"""
+    time, last_kind, last_id = position
+    if kind < last_kind:
+        return Q(time__lte=time)
+    if kind > last_kind:
+        return Q(time__lt=time)
+    return Q(time__lt=time) | Q(time=time, item_id__lt=last_id)
+
+
+def timeline_page(project, user, position=None, limit=50):
+    """Return up to ``limit`` timeline rows after ``position`` as dicts"""
+    parts = []
+    for kind, queryset in timeline_sources(project, user).items():
+        if position is not None:
+            queryset = queryset.filter(_after(kind, position))
+        parts.append(queryset)
+
+    ordering = ('-time', '-kind', '-item_id')
+    if connections[parts[0].db].features.supports_slicing_ordering_in_compound:
+        parts = [part.order_by(*ordering)[:limit] for part in parts]
+    else:
+        parts = [part.order_by() for part in parts]
+    return list(parts[0].union(*parts[1:], all=True).order_by(*ordering)[:limit])
+
+
+class TimelinePagination(KeysetPagination):
+    """
+    Keyset pagination over the merged timeline. Always active; the cursor
+    is the (time, kind, id) of the last row served.
+    """
+    ordering = ('-time', '-kind', '-item_id')
+    page_size = 50
+    max_page_size = 200
+
+    def is_requested(self, request):
+        return True
+
+    def paginate_timeline(self, project, request):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.count = None
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param, ''))
+
+        rows = timeline_page(project, request.user, position, limit=self.page_size_value + 1)
+        self.has_next = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        self.next_position = (
+            [rows[-1]['time'], rows[-1]['kind'], rows[-1]['item_id']] if self.has_next else None
+        )
+        return [
+            {
+                'kind': row['kind'],
+                'id': row['item_id'],
+                'time': row['time'],
+                'title': row['title'],
+                'detail': row['detail'],
+                'actor': row['actor'],
+            }
+            for row in rows
+        ]
+
+    def decode_cursor(self, cursor, model=None):
+        if not cursor:
+            return None
+        try:
+            time, kind, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, TypeError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor.')
+        time = parse_datetime(time) if isinstance(time, str) else None
+        if time is None or not isinstance(kind, str) or not isinstance(item_id, str):
+            raise NotFound('Invalid cursor.')
+        return time, kind, item_id
@@ -1,46 +1,58 @@
-from rest_framework import viewsets, permissions, status, filters
+from rest_framework import viewsets, permissions, status
 from django.contrib.auth import get_user_model
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Count, Case, When, IntegerField
+from django.db.models import Count, Case, When, IntegerField
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
-from .models import Project
+import logging
+from .models import InspectionEvent, Project
 from .serializers import (
     ProjectSerializer, 
     ProjectDetailSerializer, 
     ProjectCreateSerializer,
-    ProjectStatusUpdateSerializer
+    ProjectStatusUpdateSerializer,
+    ProjectBulkUpdateSerializer,
+    InspectionEventSerializer,
+    InspectionCalendarQuerySerializer
 )
-from .filters import ProjectFilter
+from .filters import ProjectFilter, ProjectOrderingFilter
 from .permissions import ProjectPermissions
 from .pagination import ProjectPagination
+from apps.common.fieldsets import SparseFieldsetViewMixin
+from .stats import get_dashboard_stats
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing projects with role-based access control
     """
-    queryset = Project.objects.all().select_related(
-        'client', 'architect_designer', 'mechanical_manager'
-    ).prefetch_related('activity_logs')
+    queryset = Project.objects.all()
+    sparse_select_related = ('client', 'architect_designer', 'mechanical_manager', 'counters')
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # ?search= is handled by ProjectFilter's ranked search (see search.py)
+    filter_backends = [DjangoFilterBackend, ProjectOrderingFilter]
     filterset_class = ProjectFilter
-    search_fields = ['job_number', 'project_name', 'client__name', 'architect_designer__name']
-    ordering_fields = ['job_number', 'project_name', 'due_date', 'created_at', 'status']
+    ordering_fields = ['job_number', 'project_name', 'due_date', 'days_until_due', 'created_at', 'status']
     ordering = ['-created_at']
     pagination_class = ProjectPagination
     permission_classes = [permissions.IsAuthenticated, ProjectPermissions]
+    lock_on_update = True
 
     def get_queryset(self):
         """
         Return projects based on user role with optimized queries
         """
         user = self.request.user
-        queryset = super().get_queryset()
+        queryset = self.apply_sparse_fieldset(super().get_queryset()).with_due_info()
+        if self.lock_on_update and self.action in ['update', 'partial_update']:
+            # Serialise concurrent edits of the same project
+            queryset = queryset.select_for_update(of=('self',))
 
         if user.role == 'admin':
             return queryset
@@ -60,6 +72,19 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return queryset.filter(architect_designer__user_account=user)
         return queryset.none()
 
+    def get_stats_scope(self):
+        """
+        Return a cache key part identifying the rows get_queryset() exposes
+        """
+        user = self.request.user
+        if user.role == 'manager' and self.request.query_params.get('my_projects'):
+            return f'manager:{user.pk}'
+        if user.role in ['admin', 'manager', 'employee']:
+            return 'all'
+        if user.role in ['client', 'architect']:
+            return f'{user.role}:{user.pk}'
+        return 'none'
+
     def get_serializer_class(self):
         """
         Return appropriate serializer based on action
@@ -73,6 +98,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return ProjectSerializer
         elif self.action == 'update_status':
             return ProjectStatusUpdateSerializer
+        elif self.action == 'bulk':
+            return ProjectBulkUpdateSerializer
+        elif self.action == 'calendar':
+            return InspectionEventSerializer
         return ProjectSerializer
 
     def perform_create(self, serializer):
@@ -87,55 +116,54 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         """
-        Track changes before saving
+        Save the update; change tracking diffs against the snapshot taken
+        when the instance was loaded, so no re-fetch is needed here
         """
-        instance = self.get_object()
-        # Store old instance for change tracking
-        self._old_instance = Project.objects.get(pk=instance.pk)
         serializer.save()
+        # The due-date annotations describe the row as loaded; drop them so
+        # the response recomputes is_overdue/days_until_due from the new values
+        for name in ('overdue', 'time_until_due'):
+            serializer.instance.__dict__.pop(name, None)
 
     def update(self, request, *args, **kwargs):
         """
-        Override update to debug validation errors and handle partial updates
+        Update a project from a single fetch of its row. The same instance
+        feeds validation, change tracking and the response, and with
+        lock_on_update the row stays locked until the update commits
         """
-        print("=== UPDATE REQUEST DEBUG ===")
-        print("URL:", request.path)
-        print("Method:", request.method)
-        print("User:", request.user.username)
-        print("User role:", request.user.role)
-        print("Request data:", request.data)
-        print("Content type:", request.content_type)
-        
-        instance = self.get_object()
-        print("Project being updated:", instance.id, instance.project_name)
-        
-        # For partial updates, use partial=True
-        partial = kwargs.pop('partial', False)
-        if request.method == 'PATCH':
-            partial = True
-        
-        serializer = self.get_serializer(instance, data=request.data, partial=partial)
-        
-        print("=== SERIALIZER VALIDATION ===")
-        print("Serializer is valid:", serializer.is_valid())
-        if not serializer.is_valid():
-            print("Validation errors:", serializer.errors)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            self.perform_update(serializer)
-            print("=== UPDATE SUCCESS ===")
-            print("Updated data:", serializer.data)
-            return Response(serializer.data)
-        except Exception as e:
-            print("=== UPDATE ERROR ===")
-            print("Exception:", str(e))
-            print("Exception type:", type(e))
+        partial = kwargs.pop('partial', False) or request.method == 'PATCH'
+        error = None
+        with transaction.atomic():
+            instance = self.get_object()
+            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            if not serializer.is_valid():
+                logger.info(
+                    "Project %s update by %s rejected: %s",
+                    instance.pk, request.user.username, serializer.errors,
+                )
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                self.perform_update(serializer)
+            except Exception as e:
+                error = e
+                transaction.set_rollback(True)
+
+        if error is not None:
+            logger.error(
+                "Project %s update by %s failed",
+                instance.pk, request.user.username, exc_info=error,
+            )
             return Response(
-                {'error': str(e)}, 
+                {'error': str(error)}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        logger.info(
+            "Project %s updated by %s (fields: %s)",
+            instance.pk, request.user.username, ', '.join(sorted(serializer.validated_data)),
+        )
+        return Response(serializer.data)
+
     def partial_update(self, request, *args, **kwargs):
         """
         Handle PATCH requests for partial updates
@@ -143,6 +171,84 @@ class ProjectViewSet(viewsets.ModelViewSet):
         kwargs['partial'] = True
         return self.update(request, *args, **kwargs)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Apply one field patch to many projects, selected by ``ids`` or by the
+        list endpoint's ``filter`` parameters; ``dry_run`` only reports counts
+        """
+        from apps.activity.context import get_client_ip
+        from .bulk import apply_bulk_patch
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = Project.objects.filter(pk__in=self.get_queryset().values('pk'))
+        if 'ids' in data:
+            queryset = queryset.filter(pk__in=data['ids'])
+        else:
+            filterset = ProjectFilter(data=data['filter'], queryset=self.get_queryset(), request=request)
+            if not filterset.is_valid():
+                return Response({'filter': filterset.errors}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(pk__in=filterset.qs.values('pk'))
+
+        matched = set(queryset.values_list('pk', flat=True))
+        permitted = set(
+            ProjectPermissions().filter_modifiable(request, queryset).values_list('pk', flat=True)
+        )
+        result = {
+            'dry_run': data['dry_run'],
+            'matched': len(matched),
+            'denied': sorted(matched - permitted),
+        }
+        if 'ids' in data:
+            result['not_found'] = sorted(set(data['ids']) - matched)
+        if data['dry_run']:
+            result['affected'] = len(permitted)
+            return Response(result)
+
+        result['updated'] = len(permitted)
+        result['changed'] = apply_bulk_patch(
+            sorted(permitted), data['patch'],
+            user=request.user, ip_address=get_client_ip(request),
+        )
+        logger.info(
+            "Bulk update by %s: %s projects, %s changed (fields: %s)",
+            request.user.username, result['updated'], result['changed'],
+            ', '.join(sorted(data['patch'])),
+        )
+        return Response(result)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_projects(self, request):
+        """
+        Create projects from an uploaded CSV or XLSX ``file``; rows that fail
+        validation are skipped and listed in the response with their errors
+        """
+        from apps.activity.context import get_client_ip
+        from .importer import ProjectImportError, import_projects
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': 'No file provided.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        try:
+            report = import_projects(
+                upload.file, upload.name,
+                user=user, ip_address=get_client_ip(request),
+                default_manager=user if user.role in ['manager', 'employee'] else None,
+            )
+        except ProjectImportError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(
+            "Project import of %s by %s: %s rows, %s created, %s failed",
+            upload.name, user.username, report['total_rows'], report['created'], report['failed'],
+        )
+        return Response(report)
+
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """
@@ -166,47 +272,14 @@ class ProjectViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
         """
-        Comprehensive dashboard statistics
+        Comprehensive dashboard statistics, cached per role scope
         """
         user = request.user
-        queryset = self.get_queryset()
-        
-        # Calculate overdue projects
-        overdue = queryset.filter(
-            due_date__lt=timezone.now().date(),
-            status__in=['not_started', 'in_progress', 'submitted']
-        ).count()
-
-        # Projects due in next 7 days
-        due_soon = queryset.filter(
-            due_date__range=[timezone.now().date(), timezone.now().date() + timedelta(days=7)],
-            status__in=['not_started', 'in_progress', 'submitted']
-        ).count()
-
-        stats = {
-            'total_projects': queryset.count(),
-            'by_status': {
-                status_label: queryset.filter(status=status_value).count()
-                for status_value, status_label in Project.STATUS_CHOICES
-            },
-            'overdue_projects': overdue,
-            'due_soon_projects': due_soon,
-            'completed_this_month': queryset.filter(
-                status='completed',
-                updated_at__month=timezone.now().month,
-                updated_at__year=timezone.now().year
-            ).count(),
-        }
-        
-        # Add manager-specific stats
-        if user.role in ['manager', 'admin']:
-            stats['by_manager'] = {
-                manager.get_full_name() or manager.username: queryset.filter(
-                    mechanical_manager=manager
-                ).count()
-                for manager in User.objects.filter(role__in=['manager', 'employee'])
-            }
-
+        stats = get_dashboard_stats(
+            self.get_stats_scope(),
+            self.get_queryset(),
+            include_managers=user.role in ['manager', 'admin'],
+        )
         return Response(stats)
 
     @action(detail=False, methods=['get'])
@@ -214,10 +287,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """
         Get all overdue projects with detailed information
         """
-        queryset = self.get_queryset().filter(
-            due_date__lt=timezone.now().date(),
-            status__in=['not_started', 'in_progress', 'submitted']
-        ).select_related('client', 'mechanical_manager')
+        queryset = self.get_queryset().overdue().select_related('client', 'mechanical_manager')
         
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -233,16 +303,96 @@ class ProjectViewSet(viewsets.ModelViewSet):
         Get projects with upcoming inspections
         """
         next_week = timezone.now().date() + timedelta(days=7)
-        queryset = self.get_queryset().filter(
-            Q(rough_in_date__lte=next_week) | Q(final_inspection_date__lte=next_week),
-            status__in=['in_progress', 'submitted']
-        ).exclude(
-            Q(rough_in_date__isnull=True) & Q(final_inspection_date__isnull=True)
+        events = InspectionEvent.objects.filter(
+            date__lte=next_week,
+            status__in=['in_progress', 'submitted'],
         )
+        queryset = self.get_queryset().filter(pk__in=events.values('project'))
         
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def get_inspection_events(self):
+        """
+        Return the inspection events of the projects get_queryset() exposes,
+        using the events' own manager column where the scope allows
+        """
+        scope = self.get_stats_scope()
+        events = InspectionEvent.objects.all()
+        if scope == 'all':
+            return events
+        if scope.startswith('manager:'):
+            return events.filter(mechanical_manager=self.request.user)
+        return events.filter(project__in=self.get_queryset().order_by().values('pk'))
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Inspections between ``start`` and ``end``, optionally filtered by
+        ``manager`` (ids or ``me``), ``kind`` and ``status``
+        """
+        from .inspections import calendar_events
+
+        params = InspectionCalendarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        managers = [
+            request.user.pk if manager == 'me' else int(manager)
+            for manager in data.get('manager', [])
+        ]
+
+        events = calendar_events(
+            self.get_inspection_events(), data['start'], data['end'],
+            managers=managers, kinds=data.get('kind'), statuses=data.get('status'),
+        )
+        serializer = self.get_serializer(events, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get', 'post'], url_path='calendar/feed-url')
+    def calendar_feed_url(self, request):
+        """
+        Return the URL of the current user's iCal inspection feed; POST
+        issues a new URL and revokes the earlier ones
+        """
+        from django.urls import reverse
+        from .inspections import make_feed_token
+
+        token = make_feed_token(request.user, rotate=request.method == 'POST')
+        url = request.build_absolute_uri(reverse('project-calendar-feed'))
+        return Response({'url': f'{url}?token={token}'})
+
+    @action(
+        detail=False, methods=['get'], url_path='calendar/feed',
+        permission_classes=[permissions.AllowAny], authentication_classes=[],
+    )
+    def calendar_feed(self, request):
+        """
+        iCal feed of a user's inspections, addressed by the signed token from
+        calendar/feed-url; unchanged feeds are answered with 304 Not Modified
+        """
+        from django.http import HttpResponse, HttpResponseNotModified
+        from .inspections import (
+            calendar_events, feed_etag, feed_events, feed_window, read_feed_token, render_ical,
+        )
+
+        user = read_feed_token(request.query_params.get('token', ''))
+        if user is None:
+            return Response({'detail': 'Invalid feed token.'}, status=status.HTTP_404_NOT_FOUND)
+
+        start, end = feed_window()
+        events = calendar_events(feed_events(user), start, end)
+        etag = feed_etag(events, user, start)
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                render_ical(events, name=f'Inspections - {user.get_full_name() or user.username}'),
+                content_type='text/calendar; charset=utf-8',
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=300'
+        return response
+
     @action(detail=True, methods=['get'])
     def activity_logs(self, request, pk=None):
         """
@@ -255,71 +405,29 @@ class ProjectViewSet(viewsets.ModelViewSet):
         serializer = ActivityLogSerializer(activity_logs, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """
+        Activity, sent emails and synced emails of a project merged newest
+        first, one keyset-paginated page (``?cursor=``) at a time
+        """
+        from .timeline import TimelinePagination
+
+        project = self.get_object()
+        paginator = TimelinePagination()
+        events = paginator.paginate_timeline(project, request)
+        return paginator.get_paginated_response(events)
+
     @action(detail=False, methods=['get'])
     def export(self, request):
         """
-        Export projects to CSV with all fields from the Project model
+        Stream projects as CSV with all fields from the Project model,
+        honouring the list endpoint's filters and role scoping
         """
-        import csv
-        from django.http import HttpResponse
+        from django.http import StreamingHttpResponse
+        from .export import iter_export_rows
 
-        queryset = self.get_queryset()
-        response = HttpResponse(content_type='text/csv')
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(iter_export_rows(queryset), content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename="projects_export.csv"'
-
-        writer = csv.writer(response)
-        # Header row with all Project model fields
-        writer.writerow([
-            'Year',
-            'Job Number',
-            'Project Name',
-            'Project Type',
-            'Status',
-            'Current Sub Status',
-            'Current Open Items',
-            'Current Action Items',
-            'Client',
-            'Architect/Designer',
-            'Mechanical Manager',
-            'Due Date',
-            'Due Date Note',
-            'Rough In Date',
-            'Rough In Note',
-            'Final Inspection Date',
-            'Final Inspection Note',
-            'Address',
-            'Legal Address',
-            'Billing Info',
-            'Created At',
-            'Updated At',
-            'Last Status Change'
-        ])
-
-        for project in queryset:
-            writer.writerow([
-                project.year,
-                project.job_number,
-                project.project_name,
-                ', '.join(project.get_project_types_list()),
-                project.get_status_display(),
-                project.current_sub_status or '',
-                project.current_open_items or '',
-                project.current_action_items or '',
-                str(project.client) if project.client else '',
-                str(project.architect_designer) if project.architect_designer else '',
-                project.mechanical_manager.get_full_name() if project.mechanical_manager else '',
-                project.due_date.strftime('%Y-%m-%d') if project.due_date else '',
-                project.due_date_note or '',
-                project.rough_in_date.strftime('%Y-%m-%d') if project.rough_in_date else '',
-                project.rough_in_note or '',
-                project.final_inspection_date.strftime('%Y-%m-%d') if project.final_inspection_date else '',
-                project.final_inspection_note or '',
-                project.address or '',
-                project.legal_address or '',
-                project.billing_info or '',
-                project.created_at.strftime('%Y-%m-%d %H:%M:%S') if project.created_at else '',
-                project.updated_at.strftime('%Y-%m-%d %H:%M:%S') if project.updated_at else '',
-                project.last_status_change.strftime('%Y-%m-%d %H:%M:%S') if project.last_status_change else ''
-            ])
-
         return response
\ No newline at end of file
@@ -254,6 +254,19 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# IMAP sync concurrency: connections one account syncs its folders over,
+# and the cap on simultaneous connections per IMAP host (see
+# apps/communication/host_limits.py for per-provider caps). The caps are
+# shared between workers through the cache.
+EMAIL_SYNC_ACCOUNT_CONNECTIONS = int(os.environ.get('EMAIL_SYNC_ACCOUNT_CONNECTIONS', 3))
+EMAIL_SYNC_DEFAULT_HOST_CONNECTIONS = int(os.environ.get('EMAIL_SYNC_DEFAULT_HOST_CONNECTIONS', 5))
+
+# `manage.py email_idle` holds IDLE connections under a separate per-host
+# budget. Accounts it watches are skipped by the periodic sync until their
+# last full sync is this old.
+EMAIL_IDLE_DEFAULT_HOST_CONNECTIONS = int(os.environ.get('EMAIL_IDLE_DEFAULT_HOST_CONNECTIONS', 50))
+EMAIL_IDLE_SAFETY_SYNC_SECONDS = int(os.environ.get('EMAIL_IDLE_SAFETY_SYNC_SECONDS', 3600))
+
 # Celery Beat schedule for periodic tasks
 CELERY_BEAT_SCHEDULE = {
     'sync-all-email-accounts': {
@@ -264,8 +277,24 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.communication.tasks.link_unlinked_emails',
         'schedule': int(os.environ.get('EMAIL_LINK_INTERVAL_SECONDS', 900)),  # 15 min default
     },
+    'fetch-pending-email-bodies': {
+        'task': 'apps.communication.tasks.fetch_pending_email_bodies',
+        'schedule': int(os.environ.get('EMAIL_BODY_FETCH_INTERVAL_SECONDS', 600)),  # 10 min default
+    },
 }
 
+# =============================================================================
+# Activity Log Configuration
+# =============================================================================
+# Repeated edits of the same field by the same user within this many seconds
+# update the previous activity entry instead of adding a new one (0 disables)
+ACTIVITY_COALESCE_WINDOW_SECONDS = int(os.environ.get('ACTIVITY_COALESCE_WINDOW_SECONDS', 60))
+
+# Months of activity kept in the live table; older months are exported by
+# the archive_activity_logs command to gzip-compressed JSONL files
+ACTIVITY_RETENTION_MONTHS = int(os.environ.get('ACTIVITY_RETENTION_MONTHS', 24))
+ACTIVITY_ARCHIVE_DIR = os.environ.get('ACTIVITY_ARCHIVE_DIR', str(BASE_DIR / 'archives' / 'activity'))
+
 # =============================================================================
 # Email Sync Configuration
 # =============================================================================